@@ -1 +1 @@
-from . import v1, v2, errors
+from . import v1, v2, service, errors
@@ -0,0 +1,215 @@
+import hashlib
+import math
+import time
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services import metrics, profiling
+from services.caching import cache_namespaces_var
+from services.load_shedding import AdmissionController, LastGoodResponses
+from services.request_timing import RequestTiming, RequestTraces, request_timing_var
+from services.priorities import Priority
+
+__all__ = (
+    'AdmissionControlMiddleware',
+    'MetricsMiddleware',
+    'ServerTimingMiddleware',
+)
+
+
+def find_route_path(scope: Scope) -> str | None:
+    for route in scope['app'].router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return route.path
+    return None
+
+
+def get_route_path(scope: Scope) -> str:
+    # unknown paths share one label, so scanners can't blow up per-route state and metrics
+    return find_route_path(scope) or 'unmatched'
+
+
+def get_queued_upstream_calls_count(scope: Scope) -> int:
+    registry = getattr(scope['app'].state, 'http_client_registry', None)
+    if registry is None:
+        return 0
+    # under overload most calls wait in the session bulkheads, before they reach the shared scheduler
+    queued_count = registry.bulkheads.queued
+    if registry.scheduler is not None:
+        queued_count += sum(registry.scheduler.get_queued(priority) for priority in Priority)
+    return queued_count
+
+
+# headers of the request that produced a response, which must not be replayed to other requests
+REQUEST_SCOPED_HEADERS = frozenset({b'server-timing', b'x-request-id'})
+
+
+def build_response_key(scope: Scope) -> str:
+    # responses depend on credentials of the caller, so they are never served to anyone else
+    headers = Headers(scope=scope)
+    parts = (
+        scope['path'],
+        scope['query_string'].decode('latin-1'),
+        headers.get('Authorization', ''),
+        headers.get('Cookie', ''),
+    )
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+class AdmissionControlMiddleware:
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            *,
+            controller: AdmissionController,
+            last_good_responses: LastGoodResponses,
+            retry_after: float,
+            exempt_path_prefixes: tuple[str, ...],
+    ):
+        self.app = app
+        self.controller = controller
+        self.last_good_responses = last_good_responses
+        self.__retry_after = retry_after
+        self.__exempt_path_prefixes = exempt_path_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'].startswith(self.__exempt_path_prefixes):
+            await self.app(scope, receive, send)
+            return
+        route = get_route_path(scope)
+        response_key = build_response_key(scope) if scope['method'] == 'GET' else None
+        if not self.controller.try_admit(route, get_queued_upstream_calls_count(scope)):
+            await self.__reject(route, response_key)(scope, receive, send)
+            return
+        try:
+            if response_key is None:
+                await self.app(scope, receive, send)
+            else:
+                # the report cache the response comes through labels it when it is served stale
+                cache_namespaces: list[str] = []
+                token = cache_namespaces_var.set(cache_namespaces)
+                try:
+                    await self.app(scope, receive, self.__remember_response(response_key, cache_namespaces, send))
+                finally:
+                    cache_namespaces_var.reset(token)
+        finally:
+            self.controller.release(route)
+
+    def __reject(self, route: str, response_key: str | None) -> Response:
+        stored_response = None if response_key is None else self.last_good_responses.get(response_key)
+        if stored_response is None:
+            return JSONResponse(
+                content={'detail': 'Service is overloaded'},
+                status_code=503,
+                headers={'Retry-After': str(math.ceil(self.__retry_after))},
+            )
+        metrics.STALE_RESPONSES.inc(route=route, namespace=stored_response.cache_namespace)
+        response = Response(content=stored_response.body)
+        response.raw_headers = [
+            *stored_response.headers,
+            (b'age', str(int(time.monotonic() - stored_response.stored_at)).encode()),
+        ]
+        return response
+
+    def __remember_response(self, response_key: str, cache_namespaces: list[str], send: Send) -> Send:
+        headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+        body_size = 0
+        is_remembered = False
+
+        async def wrapped_send(message: Message) -> None:
+            nonlocal body_size, is_remembered
+            if message['type'] == 'http.response.start':
+                is_remembered = message['status'] == 200
+                headers.extend(
+                    (name, value) for name, value in message.get('headers', ())
+                    if name.lower() not in REQUEST_SCOPED_HEADERS
+                )
+            elif message['type'] == 'http.response.body' and is_remembered:
+                body = message.get('body', b'')
+                body_size += len(body)
+                if body_size > self.last_good_responses.max_body_size:
+                    is_remembered = False
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+                if not message.get('more_body', False) and is_remembered:
+                    cache_namespace = cache_namespaces[0] if cache_namespaces else ''
+                    self.last_good_responses.set(response_key, headers, b''.join(chunks), cache_namespace)
+            await send(message)
+
+        return wrapped_send
+
+
+class MetricsMiddleware:
+
+    def __init__(self, app: ASGIApp, *, exempt_path_prefixes: tuple[str, ...]):
+        self.app = app
+        self.__exempt_path_prefixes = exempt_path_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'].startswith(self.__exempt_path_prefixes):
+            await self.app(scope, receive, send)
+            return
+        route = get_route_path(scope)
+        status = '500'
+
+        async def wrapped_send(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = str(message['status'])
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            with metrics.HTTP_REQUESTS_IN_FLIGHT.track_in_progress(route=route), profiling.track_route(route):
+                await self.app(scope, receive, wrapped_send)
+        finally:
+            metrics.HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started_at,
+                route=route,
+                method=scope['method'],
+                status=status,
+            )
+
+
+class ServerTimingMiddleware:
+
+    def __init__(self, app: ASGIApp, *, path_prefixes: tuple[str, ...], traces: RequestTraces | None):
+        self.app = app
+        self.__path_prefixes = path_prefixes
+        # traces are kept in debug mode only
+        self.__traces = traces
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not scope['path'].startswith(self.__path_prefixes):
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming(method=scope['method'], path=scope['path'], is_tracing=self.__traces is not None)
+        status_code = 500
+
+        async def wrapped_send(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                headers = [
+                    *message.get('headers', ()),
+                    (b'server-timing', timing.build_server_timing(time.perf_counter()).encode()),
+                ]
+                if self.__traces is not None:
+                    headers.append((b'x-request-id', timing.request_id.encode()))
+                message = message | {'headers': headers}
+            await send(message)
+
+        token = request_timing_var.set(timing)
+        try:
+            await self.app(scope, receive, wrapped_send)
+        finally:
+            request_timing_var.reset(token)
+            if self.__traces is not None:
+                self.__traces.add(timing.build_trace(time.perf_counter(), status_code))
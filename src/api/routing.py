@@ -0,0 +1,30 @@
+import functools
+import time
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+
+from services.request_timing import request_timing_var
+
+__all__ = ('TimedRoute',)
+
+
+def mark_endpoint_finished(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timing = request_timing_var.get()
+            if timing is not None:
+                timing.endpoint_finished_at = time.perf_counter()
+
+    return wrapper
+
+
+# what happens between the endpoint return and the response start is serialization of the result
+class TimedRoute(APIRoute):
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs):
+        super().__init__(path, mark_endpoint_finished(endpoint), **kwargs)
@@ -0,0 +1 @@
+from . import health, loop_stalls, metrics, profile, rate_limits, request_traces
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Request, Response, status
+
+router = APIRouter(prefix='/health', tags=['Service'])
+
+
+@router.get(
+    path='/live',
+)
+async def get_liveness() -> dict[str, str]:
+    return {'status': 'alive'}
+
+
+@router.get(
+    path='/ready',
+)
+async def get_readiness(request: Request, response: Response) -> dict[str, str]:
+    if not request.app.state.is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {'status': 'warming up'}
+    return {'status': 'ready'}
@@ -0,0 +1,18 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Request
+
+from api.service import schemas
+
+router = APIRouter(prefix='/service', tags=['Service'])
+
+
+@router.get(
+    path='/loop-stalls',
+)
+async def get_loop_stalls(request: Request) -> list[schemas.LoopStall]:
+    # most recent first, with the stack of the code that blocked the event loop
+    monitor = request.app.state.loop_lag_monitor
+    if monitor is None:
+        return []
+    return [schemas.LoopStall(**asdict(stall)) for stall in reversed(monitor.stalls)]
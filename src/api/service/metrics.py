@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from services import metrics
+
+router = APIRouter(tags=['Service'])
+
+
+@router.get(
+    path='/metrics',
+    response_class=PlainTextResponse,
+)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,45 @@
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+
+from core.config import app_settings
+from services.profiling import SamplingProfiler, render_folded_stacks
+
+router = APIRouter(prefix='/service', tags=['Service'])
+
+
+def check_profiling_access(profiler_secret: str | None) -> None:
+    if app_settings.is_debug:
+        return
+    if app_settings.profiler_secret is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Profiling is disabled')
+    if profiler_secret is None or not secrets.compare_digest(profiler_secret, app_settings.profiler_secret):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Invalid profiler secret')
+
+
+@router.get(
+    path='/profile',
+    response_class=PlainTextResponse,
+)
+async def get_profile(
+        request: Request,
+        duration: float = Query(10, gt=0),
+        interval: float = Query(0.01, ge=0.001, le=1),
+        include_awaiting: bool = Query(True),
+        profiler_secret: str | None = Header(None),
+) -> PlainTextResponse:
+    # folded stacks for flamegraph.pl or speedscope, every stack starts with the route of the request
+    check_profiling_access(profiler_secret)
+    if duration > app_settings.profiler_max_duration:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f'Profile duration is limited to {app_settings.profiler_max_duration} seconds',
+        )
+    lock = request.app.state.profiler_lock
+    if lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Another profile is being taken')
+    async with lock:
+        profiler = SamplingProfiler(interval=interval, is_awaiting_included=include_awaiting)
+        samples = await profiler.run(duration)
+    return PlainTextResponse(render_folded_stacks(samples))
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Request
+
+from api.service import schemas
+
+router = APIRouter(prefix='/service', tags=['Service'])
+
+
+@router.get(
+    path='/rate-limits',
+)
+async def get_rate_limits(request: Request) -> list[schemas.TokenBucketState]:
+    # keys are hashes of upstream credentials, so they tell consumers apart without exposing them
+    rate_limiters = request.app.state.http_client_registry.rate_limiters
+    if rate_limiters is None:
+        return []
+    return await rate_limiters.get_states()
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+router = APIRouter(prefix='/service/request-traces', tags=['Service'])
+
+
+def get_request_traces(request: Request):
+    traces = request.app.state.request_traces
+    if traces is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Request traces are kept in debug mode only')
+    return traces
+
+
+@router.get(
+    path='',
+)
+async def get_recent_request_traces(request: Request) -> list[dict]:
+    return get_request_traces(request).get_all()
+
+
+@router.get(
+    path='/{request_id}',
+)
+async def get_request_trace(request: Request, request_id: str) -> dict:
+    trace = get_request_traces(request).get(request_id)
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Request trace is not found')
+    return trace
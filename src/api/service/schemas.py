@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+
+__all__ = (
+    'TokenBucketState',
+    'LoopStall',
+)
+
+
+class TokenBucketState(BaseModel):
+    key: str
+    tokens: float
+    capacity: int
+    rate: float
+    waiting: int
+
+
+class LoopStall(BaseModel):
+    started_at: float
+    duration: float
+    location: str
+    stack: list[str]
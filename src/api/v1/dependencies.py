@@ -2,40 +2,45 @@ from fastapi import Request
 
 from api import common_schemas
 from core import config
+from services import priorities
 from services.http_client_factories import (
-    closing_public_api_client_factory,
-    closing_office_manager_api_client_factory,
+    public_api_client_factory,
+    office_manager_api_client_factory,
     AsyncHTTPClient,
     HTTPClient,
     closing_export_service_api_client_factory,
-    closing_shift_manager_api_client_factory,
+    shift_manager_api_client_factory,
 )
 
 __all__ = (
-    'get_closing_public_api_client',
-    'get_closing_office_manager_api_client',
-    'get_closing_shift_manager_api_client',
+    'get_public_api_client',
+    'get_office_manager_api_client',
+    'get_shift_manager_api_client',
     'get_closing_export_service_api_client',
+    'use_bulk_priority',
 )
 
 
-def get_closing_public_api_client(*, country_code: common_schemas.CountryCode) -> AsyncHTTPClient:
-    return closing_public_api_client_factory(country_code=country_code.value, app_user_agent=config.APP_USER_AGENT)
+def get_public_api_client(*, request: Request, country_code: common_schemas.CountryCode) -> AsyncHTTPClient:
+    return public_api_client_factory(
+        registry=request.app.state.http_client_registry,
+        country_code=country_code.value,
+    )
 
 
-def get_closing_office_manager_api_client(*, request: Request, country_code: common_schemas.CountryCode) -> AsyncHTTPClient:
-    return closing_office_manager_api_client_factory(
+def get_office_manager_api_client(*, request: Request, country_code: common_schemas.CountryCode) -> AsyncHTTPClient:
+    return office_manager_api_client_factory(
+        registry=request.app.state.http_client_registry,
         cookies=request.cookies,
         country_code=country_code.value,
-        app_user_agent=config.APP_USER_AGENT,
     )
 
 
-def get_closing_shift_manager_api_client(*, request: Request, country_code: common_schemas.CountryCode) -> AsyncHTTPClient:
-    return closing_shift_manager_api_client_factory(
+def get_shift_manager_api_client(*, request: Request, country_code: common_schemas.CountryCode) -> AsyncHTTPClient:
+    return shift_manager_api_client_factory(
+        registry=request.app.state.http_client_registry,
         cookies=request.cookies,
         country_code=country_code.value,
-        app_user_agent=config.APP_USER_AGENT,
     )
 
 
@@ -45,3 +50,8 @@ def get_closing_export_service_api_client(*, request: Request, country_code: com
         country_code=country_code.value,
         app_user_agent=config.APP_USER_AGENT,
     )
+
+
+async def use_bulk_priority() -> None:
+    # heavy uncached exports only take upstream capacity that interactive reports do not need
+    priorities.set_priority(priorities.Priority.BULK)
@@ -3,13 +3,14 @@ import asyncio
 from fastapi import APIRouter, Depends, Query
 
 from api import common_schemas
+from api.routing import TimedRoute
 from api.v1 import schemas, dependencies
 from core import exceptions
 from models.external_api_responses import office_manager as office_manager_models
 from services.external_dodo_api import OfficeManagerAPI
 from services.http_client_factories import AsyncHTTPClient
 
-router = APIRouter(prefix='/v1/{country_code}', tags=['Stocks'])
+router = APIRouter(prefix='/v1/{country_code}', tags=['Stocks'], route_class=TimedRoute)
 
 
 @router.get(
@@ -18,12 +19,11 @@ router = APIRouter(prefix='/v1/{country_code}', tags=['Stocks'])
 async def get_ingredient_stocks(
         unit_ids: common_schemas.UnitIDs = Query(),
         days_left_threshold: int = Query(),
-        closing_office_manager_api_client: AsyncHTTPClient = Depends(dependencies.get_closing_office_manager_api_client),
+        office_manager_api_client: AsyncHTTPClient = Depends(dependencies.get_office_manager_api_client),
 ) -> schemas.StockBalanceStatistics:
-    async with closing_office_manager_api_client as client:
-        api = OfficeManagerAPI(client)
-        tasks = (api.get_stocks_balance(unit_id) for unit_id in unit_ids)
-        units_stocks_balance = await asyncio.gather(*tasks, return_exceptions=True)
+    api = OfficeManagerAPI(office_manager_api_client)
+    tasks = (api.get_stocks_balance(unit_id) for unit_id in unit_ids)
+    units_stocks_balance = await asyncio.gather(*tasks, return_exceptions=True)
     stocks_balances = [
         ingredient_stocks
         for unit_stocks_balance in units_stocks_balance
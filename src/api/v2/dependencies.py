@@ -1,18 +1,29 @@
-from fastapi import Depends
+from fastapi import Depends, Header, Query, Request
 
 from api import common_schemas
-from core import config
-from services.http_client_factories import closing_dodo_is_api_client_factory
+from services import deadlines
+from services.http_client_factories import dodo_is_api_client_factory, AsyncHTTPClient
 from api.v2.bearer import AccessTokenBearer
 
 
-def get_closing_dodo_is_api_client(
+def get_dodo_is_api_client(
         *,
+        request: Request,
         country_code: common_schemas.CountryCode,
         token: str = Depends(AccessTokenBearer()),
-):
-    return closing_dodo_is_api_client_factory(
+) -> AsyncHTTPClient:
+    return dodo_is_api_client_factory(
+        registry=request.app.state.http_client_registry,
         country_code=country_code.value,
         token=token,
-        app_user_agent=config.APP_USER_AGENT,
     )
+
+
+async def apply_deadline(
+        deadline: float | None = Query(default=None, gt=0),
+        x_deadline: float | None = Header(default=None, gt=0),
+) -> bool:
+    # budget in seconds for all upstream calls of the request, the query parameter wins over the header
+    deadlines.set_deadline(deadline or x_deadline)
+    # callers with a deadline get partial reports, the rest get plain lists of results
+    return (deadline or x_deadline) is not None
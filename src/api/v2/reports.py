@@ -1,17 +1,22 @@
-import asyncio
-
 from fastapi import APIRouter, Depends, Query
 from fastapi_cache.decorator import cache
 
 from api import common_schemas
+from api.routing import TimedRoute
 from api.v2 import schemas, dependencies
+from services import deadlines
+from services.domain import common as common_services
 from services.domain import delivery as delivery_services
 from services.domain import production as production_services
 from services.external_dodo_api import DodoISAPI
 from services.http_client_factories import AsyncHTTPClient
 from services.periods import Period
 
-router = APIRouter(prefix='/v2/{country_code}/reports', tags=['Reports'])
+router = APIRouter(
+    prefix='/v2/{country_code}/reports',
+    tags=['Reports'],
+    route_class=TimedRoute,
+)
 
 
 @router.get(
@@ -20,23 +25,31 @@ router = APIRouter(prefix='/v2/{country_code}/reports', tags=['Reports'])
 @cache(expire=60, namespace='productivity-balance')
 async def get_productivity_balance_statistics(
         unit_uuids: common_schemas.UnitUUIDs = Query(),
-        closing_dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_closing_dodo_is_api_client),
-) -> list[schemas.UnitProductivityBalanceStatistics]:
+        dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_dodo_is_api_client),
+        is_partial_report: bool = Depends(dependencies.apply_deadline),
+) -> list[schemas.UnitProductivityBalanceStatistics] | schemas.PartialReport[schemas.UnitProductivityBalanceStatistics]:
     period = Period.today()
-    async with closing_dodo_is_api_client as client:
-        api = DodoISAPI(client)
-        productivity_statistics, delivery_statistics, stop_sales = await asyncio.gather(
-            api.get_production_productivity_statistics(period, unit_uuids),
-            api.get_delivery_statistics(period, unit_uuids),
-            api.get_stop_sales_by_sales_channels(period, unit_uuids),
-        )
-    return production_services.calculate_productivity_balance(
+    api = DodoISAPI(dodo_is_api_client)
+    datasets = await deadlines.gather_datasets(
+        productivity_statistics=api.get_production_productivity_statistics(period, unit_uuids),
+        delivery_statistics=api.get_delivery_statistics(period, unit_uuids),
+        stop_sales=api.get_stop_sales_by_sales_channels(period, unit_uuids),
+    )
+    units_productivity_balance = production_services.calculate_productivity_balance(
         unit_uuids=unit_uuids,
-        productivity_statistics=productivity_statistics,
-        delivery_statistics=delivery_statistics,
-        stop_sales=stop_sales,
+        productivity_statistics=datasets.get('productivity_statistics'),
+        delivery_statistics=datasets.get('delivery_statistics'),
+        stop_sales=datasets.get('stop_sales'),
         now=period.end,
     )
+    if not is_partial_report:
+        return units_productivity_balance
+    return common_services.build_partial_report(
+        unit_uuids=unit_uuids,
+        results=units_productivity_balance,
+        missing_datasets=datasets.missing,
+        arrived_items=datasets.arrived_items,
+    )
 
 
 @router.get(
@@ -45,13 +58,26 @@ async def get_productivity_balance_statistics(
 @cache(expire=60, namespace='restaurant-cooking-time')
 async def get_restaurant_cooking_time_statistics(
         unit_uuids: common_schemas.UnitUUIDs = Query(),
-        closing_dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_closing_dodo_is_api_client),
-) -> list[schemas.UnitRestaurantCookingTimeStatistics]:
+        dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_dodo_is_api_client),
+        is_partial_report: bool = Depends(dependencies.apply_deadline),
+) -> (
+        list[schemas.UnitRestaurantCookingTimeStatistics]
+        | schemas.PartialReport[schemas.UnitRestaurantCookingTimeStatistics]
+):
     period = Period.today()
-    async with closing_dodo_is_api_client as client:
-        api = DodoISAPI(client)
-        orders = await api.get_orders_handover_time_statistics(period, unit_uuids)
-    return production_services.calculate_restaurant_cooking_time(unit_uuids, orders)
+    api = DodoISAPI(dodo_is_api_client)
+    datasets = await deadlines.gather_datasets(
+        orders=api.get_orders_handover_time_statistics(period, unit_uuids),
+    )
+    units_cooking_time = production_services.calculate_restaurant_cooking_time(unit_uuids, datasets.get('orders'))
+    if not is_partial_report:
+        return units_cooking_time
+    return common_services.build_partial_report(
+        unit_uuids=unit_uuids,
+        results=units_cooking_time,
+        missing_datasets=datasets.missing,
+        arrived_items=datasets.arrived_items,
+    )
 
 
 @router.get(
@@ -60,13 +86,25 @@ async def get_restaurant_cooking_time_statistics(
 @cache(expire=60, namespace='heated-shelf-time')
 async def get_heated_shelf_time_statistics(
         unit_uuids: common_schemas.UnitUUIDs = Query(),
-        closing_dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_closing_dodo_is_api_client),
-) -> list[schemas.UnitHeatedShelfTimeStatistics]:
+        dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_dodo_is_api_client),
+        is_partial_report: bool = Depends(dependencies.apply_deadline),
+) -> list[schemas.UnitHeatedShelfTimeStatistics] | schemas.PartialReport[schemas.UnitHeatedShelfTimeStatistics]:
     period = Period.today()
-    async with closing_dodo_is_api_client as client:
-        api = DodoISAPI(client)
-        production_productivity_statistics = await api.get_production_productivity_statistics(period, unit_uuids)
-    return production_services.calculate_units_heated_shelf_time_statistics(production_productivity_statistics)
+    api = DodoISAPI(dodo_is_api_client)
+    datasets = await deadlines.gather_datasets(
+        productivity_statistics=api.get_production_productivity_statistics(period, unit_uuids),
+    )
+    units_heated_shelf_time_statistics = production_services.calculate_units_heated_shelf_time_statistics(
+        datasets.get('productivity_statistics'),
+    )
+    if not is_partial_report:
+        return units_heated_shelf_time_statistics
+    return common_services.build_partial_report(
+        unit_uuids=unit_uuids,
+        results=units_heated_shelf_time_statistics,
+        missing_datasets=datasets.missing,
+        arrived_items=datasets.arrived_items,
+    )
 
 
 @router.get(
@@ -75,15 +113,25 @@ async def get_heated_shelf_time_statistics(
 @cache(expire=60, namespace='delivery-speed')
 async def get_delivery_speed_statistics(
         unit_uuids: common_schemas.UnitUUIDs = Query(),
-        closing_dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_closing_dodo_is_api_client),
-) -> list[schemas.UnitDeliverySpeedStatistics]:
+        dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_dodo_is_api_client),
+        is_partial_report: bool = Depends(dependencies.apply_deadline),
+) -> list[schemas.UnitDeliverySpeedStatistics] | schemas.PartialReport[schemas.UnitDeliverySpeedStatistics]:
     period = Period.today()
-    async with closing_dodo_is_api_client as client:
-        api = DodoISAPI(client)
-        units_delivery_statistics = await api.get_delivery_statistics(period, unit_uuids)
-    return delivery_services.calculate_units_delivery_speed_statistics(
+    api = DodoISAPI(dodo_is_api_client)
+    datasets = await deadlines.gather_datasets(
+        delivery_statistics=api.get_delivery_statistics(period, unit_uuids),
+    )
+    units_delivery_speed_statistics = delivery_services.calculate_units_delivery_speed_statistics(
         all_unit_uuids=unit_uuids,
-        delivery_statistics=units_delivery_statistics,
+        delivery_statistics=datasets.get('delivery_statistics'),
+    )
+    if not is_partial_report:
+        return units_delivery_speed_statistics
+    return common_services.build_partial_report(
+        unit_uuids=unit_uuids,
+        results=units_delivery_speed_statistics,
+        missing_datasets=datasets.missing,
+        arrived_items=datasets.arrived_items,
     )
 
 
@@ -93,19 +141,30 @@ async def get_delivery_speed_statistics(
 @cache(expire=60, namespace='delivery-productivity')
 async def get_delivery_productivity_statistics(
         unit_uuids: common_schemas.UnitUUIDs = Query(),
-        closing_dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_closing_dodo_is_api_client),
-) -> list[schemas.UnitDeliveryProductivityStatistics]:
+        dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_dodo_is_api_client),
+        is_partial_report: bool = Depends(dependencies.apply_deadline),
+) -> (
+        list[schemas.UnitDeliveryProductivityStatistics]
+        | schemas.PartialReport[schemas.UnitDeliveryProductivityStatistics]
+):
     today_period, week_before_period = Period.today(), Period.week_before_to_this_time()
-    async with closing_dodo_is_api_client as client:
-        api = DodoISAPI(client)
-        today_delivery_statistics, week_before_delivery_statistics = await asyncio.gather(
-            api.get_delivery_statistics(today_period, unit_uuids),
-            api.get_delivery_statistics(week_before_period, unit_uuids),
-        )
-    return delivery_services.calculate_units_delivery_productivity_statistics(
+    api = DodoISAPI(dodo_is_api_client)
+    datasets = await deadlines.gather_datasets(
+        today_delivery_statistics=api.get_delivery_statistics(today_period, unit_uuids),
+        week_before_delivery_statistics=api.get_delivery_statistics(week_before_period, unit_uuids),
+    )
+    units_delivery_productivity_statistics = delivery_services.calculate_units_delivery_productivity_statistics(
         unit_uuids=unit_uuids,
-        today_delivery_statistics=today_delivery_statistics,
-        week_before_delivery_statistics=week_before_delivery_statistics,
+        today_delivery_statistics=datasets.get('today_delivery_statistics'),
+        week_before_delivery_statistics=datasets.get('week_before_delivery_statistics'),
+    )
+    if not is_partial_report:
+        return units_delivery_productivity_statistics
+    return common_services.build_partial_report(
+        unit_uuids=unit_uuids,
+        results=units_delivery_productivity_statistics,
+        missing_datasets=datasets.missing,
+        arrived_items=datasets.arrived_items,
     )
 
 
@@ -115,17 +174,28 @@ async def get_delivery_productivity_statistics(
 @cache(expire=60, namespace='being-late-certificates')
 async def get_being_late_certificates_for_today_and_week_before(
         unit_uuids: common_schemas.UnitUUIDs = Query(),
-        closing_dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_closing_dodo_is_api_client),
-) -> list[schemas.UnitLateDeliveryVouchersTodayAndWeekBefore]:
+        dodo_is_api_client: AsyncHTTPClient = Depends(dependencies.get_dodo_is_api_client),
+        is_partial_report: bool = Depends(dependencies.apply_deadline),
+) -> (
+        list[schemas.UnitLateDeliveryVouchersTodayAndWeekBefore]
+        | schemas.PartialReport[schemas.UnitLateDeliveryVouchersTodayAndWeekBefore]
+):
     today, week_before = Period.today(), Period.week_before()
-    async with closing_dodo_is_api_client as client:
-        api = DodoISAPI(client)
-        today_vouchers, week_before_vouchers = await asyncio.gather(
-            api.get_late_delivery_vouchers(today, unit_uuids),
-            api.get_late_delivery_vouchers(week_before, unit_uuids),
-        )
-    return delivery_services.calculate_units_late_delivery_vouchers(
+    api = DodoISAPI(dodo_is_api_client)
+    datasets = await deadlines.gather_datasets(
+        today_vouchers=api.get_late_delivery_vouchers(today, unit_uuids),
+        week_before_vouchers=api.get_late_delivery_vouchers(week_before, unit_uuids),
+    )
+    units_late_delivery_vouchers = delivery_services.calculate_units_late_delivery_vouchers(
+        unit_uuids=unit_uuids,
+        today_vouchers=datasets.get('today_vouchers'),
+        week_before_vouchers=datasets.get('week_before_vouchers'),
+    )
+    if not is_partial_report:
+        return units_late_delivery_vouchers
+    return common_services.build_partial_report(
         unit_uuids=unit_uuids,
-        today_vouchers=today_vouchers,
-        week_before_vouchers=week_before_vouchers,
+        results=units_late_delivery_vouchers,
+        missing_datasets=datasets.missing,
+        arrived_items=datasets.arrived_items,
     )
@@ -1,8 +1,11 @@
+from typing import Generic, TypeVar
 from uuid import UUID
 
 from pydantic import BaseModel, NonNegativeInt, NonNegativeFloat
+from pydantic.generics import GenericModel
 
 __all__ = (
+    'PartialReport',
     'UnitProductivityBalanceStatistics',
     'UnitRestaurantCookingTimeStatistics',
     'UnitHeatedShelfTimeStatistics',
@@ -11,6 +14,14 @@ __all__ = (
     'UnitDeliverySpeedStatistics',
 )
 
+T = TypeVar('T')
+
+
+class PartialReport(GenericModel, Generic[T]):
+    results: list[T]
+    missing_datasets: list[str]
+    missing_unit_uuids: list[UUID]
+
 
 class UnitProductivityBalanceStatistics(BaseModel):
     unit_uuid: UUID
@@ -1,17 +1,163 @@
+import asyncio
+import contextlib
+import functools
+
+import httpx
 from fastapi import FastAPI
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from redis import asyncio as aioredis
 
 import api
-from core.config import app_settings
+from api.middlewares import AdmissionControlMiddleware, MetricsMiddleware, ServerTimingMiddleware
+from core.config import app_settings, APP_USER_AGENT
+from services.bulkheads import BulkheadRegistry
+from services.caching import ReportCacheBackend, ReportCoder
+from services.hedging import RequestHedger
+from services.load_shedding import AdmissionController, LastGoodResponses
+from services import offloading, parse_cache
+from services.loop_lag import LoopLagMonitor
+from services.http_client_factories import HTTPClientRegistry, Upstream
+from services.priorities import PriorityScheduler
+from services.quarantine import UnitQuarantine
+from services.rate_limiting import RateLimiterRegistry
+from services.record_replay import RecordingTransport, ReplayTransport
+from services.request_timing import RequestTraces
+from services.resilience import CircuitBreakerRegistry, RetryPolicy
+from services.single_flight import SingleFlight
 
 __all__ = ('get_application',)
 
 
-async def on_startup():
+async def warm_up(app: FastAPI) -> None:
+    await asyncio.gather(
+        app.state.http_client_registry.prewarm(
+            upstreams=tuple(Upstream),
+            country_codes=app_settings.prewarm_country_codes,
+            connections_per_host=app_settings.prewarm_connections_per_host,
+        ),
+        app.state.offload_executor.wait_until_warm(),
+    )
+
+
+async def prewarm(app: FastAPI) -> None:
+    try:
+        # the gathering is awaited inside a coroutine, so its cancellation is retrieved when prewarm is cancelled
+        await asyncio.wait_for(warm_up(app), timeout=app_settings.prewarm_timeout)
+    except asyncio.TimeoutError:
+        pass
+    app.state.is_ready = True
+
+
+def get_upstream_transport(limits: httpx.Limits) -> httpx.AsyncBaseTransport | None:
+    if app_settings.upstream_replay_path is not None:
+        return ReplayTransport.from_cassette(
+            app_settings.upstream_replay_path,
+            latency_scale=app_settings.upstream_replay_latency_scale,
+        )
+    if app_settings.upstream_record_path is not None:
+        return RecordingTransport(
+            httpx.AsyncHTTPTransport(limits=limits, http2=app_settings.http2),
+            app_settings.upstream_record_path,
+        )
+    return None
+
+
+async def on_startup(app: FastAPI):
+    app.state.is_ready = False
+    app.state.profiler_lock = asyncio.Lock()
+    app.state.loop_lag_monitor = None
+    if app_settings.is_loop_lag_monitor_enabled:
+        app.state.loop_lag_monitor = LoopLagMonitor(
+            interval=app_settings.loop_lag_interval,
+            stall_threshold=app_settings.loop_stall_threshold,
+            max_stalls_count=app_settings.loop_stalls_max_count,
+        )
+        app.state.loop_lag_monitor.start()
+    app.state.offload_executor = offloading.OffloadExecutor(
+        workers_count=app_settings.offload_workers_count,
+        max_queued_count=app_settings.offload_max_queued_count,
+        is_process_pool_enabled=app_settings.is_offload_process_pool_enabled,
+        max_pool_restarts_count=app_settings.offload_max_pool_restarts_count,
+    )
+    app.state.offload_executor.start()
+    offloading.set_executor(app.state.offload_executor)
+    if app_settings.parse_cache_max_count > 0:
+        parse_cache.set_cache(parse_cache.ParseCache(app_settings.parse_cache_max_count))
     redis = await aioredis.from_url(app_settings.redis_url, encoding='utf-8', decode_responses=True)
-    FastAPICache.init(RedisBackend(redis), prefix='fastapi-cache')
+    # benchmarks and tests put stand-ins for Redis and upstream here before startup
+    cache_backend = getattr(app.state, 'cache_backend', None) or RedisBackend(redis)
+    FastAPICache.reset()
+    FastAPICache.init(ReportCacheBackend(cache_backend), prefix='fastapi-cache', coder=ReportCoder)
+    limits = httpx.Limits(
+        max_connections=app_settings.http_max_connections,
+        max_keepalive_connections=app_settings.http_max_keepalive_connections,
+        keepalive_expiry=app_settings.http_keepalive_expiry,
+    )
+    app.state.http_client_registry = HTTPClientRegistry(
+        app_user_agent=APP_USER_AGENT,
+        timeout=httpx.Timeout(app_settings.http_timeout, connect=app_settings.http_connect_timeout),
+        limits=limits,
+        http2=app_settings.http2,
+        bulkheads=BulkheadRegistry(
+            initial_limit=app_settings.bulkhead_initial_concurrency,
+            min_limit=app_settings.bulkhead_min_concurrency,
+            max_limit=app_settings.bulkhead_max_concurrency,
+            latency_threshold=app_settings.bulkhead_latency_threshold,
+            idle_timeout=app_settings.bulkhead_idle_timeout,
+        ),
+        single_flight=SingleFlight() if app_settings.is_single_flight_enabled else None,
+        retry_policy=RetryPolicy(
+            max_attempts=app_settings.retry_max_attempts,
+            backoff_base=app_settings.retry_backoff_base,
+            backoff_cap=app_settings.retry_backoff_cap,
+        ),
+        circuit_breakers=CircuitBreakerRegistry(
+            failure_threshold=app_settings.circuit_breaker_failure_threshold,
+            reset_timeout=app_settings.circuit_breaker_reset_timeout,
+        ),
+        hedger=RequestHedger(
+            percentile=app_settings.hedging_percentile,
+            min_delay=app_settings.hedging_min_delay,
+            budget_ratio=app_settings.hedging_budget_ratio,
+        ) if app_settings.is_hedging_enabled else None,
+        quarantine=UnitQuarantine(
+            failure_threshold=app_settings.unit_quarantine_failure_threshold,
+            base_window=app_settings.unit_quarantine_base_window,
+            max_window=app_settings.unit_quarantine_max_window,
+            max_probe_attempts=app_settings.unit_quarantine_max_probe_attempts,
+            idle_timeout=app_settings.unit_quarantine_idle_timeout,
+            max_probes_count=app_settings.unit_quarantine_max_probes_count,
+            max_tracked_count=app_settings.unit_quarantine_max_tracked_count,
+        ) if app_settings.is_unit_quarantine_enabled else None,
+        rate_limiters=RateLimiterRegistry(
+            rate=app_settings.rate_limit_per_second,
+            capacity=app_settings.rate_limit_burst,
+            max_wait=app_settings.rate_limit_max_wait,
+            redis=redis if app_settings.is_rate_limiting_shared else None,
+            idle_timeout=app_settings.rate_limit_idle_timeout,
+        ) if app_settings.is_rate_limiting_enabled else None,
+        scheduler=PriorityScheduler(
+            max_concurrency=app_settings.upstream_max_concurrency,
+            reserved_for_interactive=app_settings.upstream_reserved_for_interactive,
+        ) if app_settings.is_priority_scheduling_enabled else None,
+        transport=getattr(app.state, 'upstream_transport', None) or get_upstream_transport(limits),
+    )
+    # pre-warming runs in background, so the process is alive but not ready until it finishes
+    app.state.prewarm_task = asyncio.create_task(prewarm(app))
+
+
+async def on_shutdown(app: FastAPI):
+    app.state.prewarm_task.cancel()
+    # shutdown may come before warming up finishes
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.prewarm_task
+    if app.state.loop_lag_monitor is not None:
+        await app.state.loop_lag_monitor.stop()
+    await app.state.http_client_registry.close()
+    parse_cache.set_cache(None)
+    offloading.set_executor(None)
+    app.state.offload_executor.shutdown()
 
 
 def get_application() -> FastAPI:
@@ -22,6 +168,39 @@ def get_application() -> FastAPI:
     app.include_router(api.v1.stop_sales.router)
     app.include_router(api.v2.reports.router)
     app.include_router(api.v2.stop_sales.router)
+    app.include_router(api.service.rate_limits.router)
+    app.include_router(api.service.health.router)
+    app.include_router(api.service.metrics.router)
+    app.include_router(api.service.request_traces.router)
+    app.include_router(api.service.loop_stalls.router)
+    app.include_router(api.service.profile.router)
     api.errors.include_exception_handlers(app)
-    app.add_event_handler('startup', on_startup)
+    app.state.request_traces = RequestTraces(app_settings.request_traces_max_count) if app_settings.is_debug else None
+    app.add_middleware(
+        ServerTimingMiddleware,
+        path_prefixes=('/v1/', '/v2/'),
+        traces=app.state.request_traces,
+    )
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=AdmissionController(
+            max_in_flight=app_settings.admission_max_in_flight,
+            max_in_flight_per_route=app_settings.admission_max_in_flight_per_route,
+            max_queued_upstream_calls=app_settings.admission_max_queued_upstream_calls,
+        ),
+        last_good_responses=LastGoodResponses(
+            max_count=app_settings.last_good_responses_max_count,
+            max_age=app_settings.last_good_responses_max_age,
+            max_body_size=app_settings.last_good_responses_max_body_size,
+        ),
+        retry_after=app_settings.admission_retry_after,
+        exempt_path_prefixes=('/service', '/health', '/metrics', '/docs', '/redoc', '/openapi.json'),
+    )
+    # added last, so it is the outermost and rejected requests are counted too
+    app.add_middleware(
+        MetricsMiddleware,
+        exempt_path_prefixes=('/service', '/health', '/metrics', '/docs', '/redoc', '/openapi.json'),
+    )
+    app.add_event_handler('startup', functools.partial(on_startup, app))
+    app.add_event_handler('shutdown', functools.partial(on_shutdown, app))
     return app
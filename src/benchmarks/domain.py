@@ -0,0 +1,236 @@
+import argparse
+import datetime
+import gc
+import json
+import pathlib
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+import pandas as pd
+from pydantic import parse_obj_as
+
+from models.external_api_responses import public_api as public_api_models
+from models.external_api_responses.dodo_is_api import delivery as delivery_models
+from models.external_api_responses.dodo_is_api import production as production_models
+from services.domain import delivery as delivery_services
+from services.domain import production as production_services
+from services.domain import sales as sales_services
+from simulator import generators
+
+__all__ = (
+    'DomainBenchmark',
+    'BENCHMARKS',
+    'measure',
+    'run_domain_benchmarks',
+)
+
+SEED = 0
+
+
+@dataclass(frozen=True, slots=True)
+class DomainBenchmark:
+    name: str
+    # builds the dataset for the given units and items count, returns the function to measure
+    setup: Callable[[int, int], Callable[[], Any]]
+    # per-unit statistics don't depend on orders, vouchers or stop sales count
+    is_scaled_by_items: bool = True
+
+
+def get_unit_uuids(units_count: int) -> list:
+    return [generators.get_unit_uuid(unit_id) for unit_id in range(1, units_count + 1)]
+
+
+def get_day() -> datetime.date:
+    return datetime.date(2023, 1, 2)
+
+
+def decode(model: type, payload: list[dict]) -> Callable[[], Any]:
+    return lambda: parse_obj_as(tuple[model, ...], payload)
+
+
+def setup_orders_handover_time_decoding(units_count: int, items_count: int) -> Callable[[], Any]:
+    payload = generators.generate_orders_handover_time(
+        SEED, get_unit_uuids(units_count), get_day(), items_count // units_count,
+    )
+    return decode(production_models.OrdersHandoverTime, payload)
+
+
+def setup_late_delivery_vouchers_decoding(units_count: int, items_count: int) -> Callable[[], Any]:
+    payload = generators.generate_late_delivery_vouchers(
+        SEED, get_unit_uuids(units_count), get_day(), items_count // units_count,
+    )
+    return decode(delivery_models.LateDeliveryVoucher, payload)
+
+
+def setup_stop_sales_decoding(units_count: int, items_count: int) -> Callable[[], Any]:
+    payload = generators.generate_stop_sales_by_sales_channels(
+        SEED, get_unit_uuids(units_count), get_day(), items_count // units_count,
+    )
+    return decode(production_models.StopSaleBySalesChannels, payload)
+
+
+def setup_restaurant_cooking_time(units_count: int, items_count: int) -> Callable[[], Any]:
+    unit_uuids = get_unit_uuids(units_count)
+    orders = parse_obj_as(
+        tuple[production_models.OrdersHandoverTime, ...],
+        generators.generate_orders_handover_time(SEED, unit_uuids, get_day(), items_count // units_count),
+    )
+    return lambda: production_services.calculate_restaurant_cooking_time(unit_uuids, orders)
+
+
+def setup_productivity_balance(units_count: int, items_count: int) -> Callable[[], Any]:
+    unit_uuids = get_unit_uuids(units_count)
+    productivity_statistics = parse_obj_as(
+        tuple[production_models.UnitProductivityStatistics, ...],
+        generators.generate_productivity_statistics(SEED, unit_uuids),
+    )
+    delivery_statistics = parse_obj_as(
+        tuple[delivery_models.UnitDeliveryStatistics, ...],
+        generators.generate_delivery_statistics(SEED, unit_uuids, get_day()),
+    )
+    stop_sales = parse_obj_as(
+        tuple[production_models.StopSaleBySalesChannels, ...],
+        generators.generate_stop_sales_by_sales_channels(SEED, unit_uuids, get_day(), items_count // units_count),
+    )
+    now = datetime.datetime.combine(get_day(), datetime.time(23))
+    return lambda: production_services.calculate_productivity_balance(
+        unit_uuids=unit_uuids,
+        productivity_statistics=productivity_statistics,
+        delivery_statistics=delivery_statistics,
+        stop_sales=stop_sales,
+        now=now,
+    )
+
+
+def setup_late_delivery_vouchers(units_count: int, items_count: int) -> Callable[[], Any]:
+    unit_uuids = get_unit_uuids(units_count)
+    # today and week before share the items count
+    vouchers_per_unit = items_count // units_count // 2
+    today_vouchers, week_before_vouchers = (
+        parse_obj_as(
+            tuple[delivery_models.LateDeliveryVoucher, ...],
+            generators.generate_late_delivery_vouchers(SEED, unit_uuids, day, vouchers_per_unit),
+        ) for day in (get_day(), get_day() - datetime.timedelta(days=7))
+    )
+    return lambda: delivery_services.calculate_units_late_delivery_vouchers(
+        unit_uuids=unit_uuids,
+        today_vouchers=today_vouchers,
+        week_before_vouchers=week_before_vouchers,
+    )
+
+
+def setup_revenue(units_count: int, items_count: int) -> Callable[[], Any]:
+    now = datetime.datetime.combine(get_day(), datetime.time(23))
+    units = parse_obj_as(
+        tuple[public_api_models.UnitOperationalStatisticsForTodayAndWeekBefore, ...],
+        [generators.generate_operational_statistics(SEED, unit_id, now) for unit_id in range(1, units_count + 1)],
+    )
+    return lambda: (sales_services.calculate_units_revenue(units), sales_services.calculate_total_revenue(units))
+
+
+def setup_cheated_orders(units_count: int, items_count: int) -> Callable[[], Any]:
+    rows = generators.generate_restaurant_orders(
+        SEED, range(1, units_count + 1), get_day(), items_count // units_count,
+    )
+    # orders without phone numbers are empty cells, like in the parsed report
+    data_frame = pd.DataFrame(
+        [(*row[:3], row[3] or None, row[4]) for row in rows],
+        columns=generators.RESTAURANT_ORDERS_HEADERS,
+    )
+    return lambda: sales_services.restaurant_orders_to_cheated_orders(data_frame.groupby('Отдел'), 3)
+
+
+# items are orders, vouchers or stop sales of all units together, vouchers count is random around it
+BENCHMARKS = (
+    DomainBenchmark('decode.orders_handover_time', setup_orders_handover_time_decoding),
+    DomainBenchmark('decode.late_delivery_vouchers', setup_late_delivery_vouchers_decoding),
+    DomainBenchmark('decode.stop_sales_by_sales_channels', setup_stop_sales_decoding),
+    DomainBenchmark('production.calculate_restaurant_cooking_time', setup_restaurant_cooking_time),
+    DomainBenchmark('production.calculate_productivity_balance', setup_productivity_balance),
+    DomainBenchmark('delivery.calculate_units_late_delivery_vouchers', setup_late_delivery_vouchers),
+    DomainBenchmark('sales.calculate_revenue', setup_revenue, is_scaled_by_items=False),
+    DomainBenchmark('sales.restaurant_orders_to_cheated_orders', setup_cheated_orders),
+)
+
+
+def measure(function: Callable[[], Any], *, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+    # allocations are measured in a separate run, because tracing slows everything down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        # the result is kept alive, so retained size is what the response is built from
+        result = function()
+        retained_size, peak_size = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return {
+        'best_seconds': round(min(timings), 6),
+        'mean_seconds': round(sum(timings) / len(timings), 6),
+        'retained_bytes': retained_size,
+        'peak_allocated_bytes': peak_size,
+    }
+
+
+def run_domain_benchmarks(
+        *,
+        units_counts: Iterable[int],
+        items_counts: Iterable[int],
+        repeat: int,
+        name_pattern: str = '',
+) -> list[dict]:
+    results = []
+    for benchmark in BENCHMARKS:
+        if not re.search(name_pattern, benchmark.name):
+            continue
+        for units_count in units_counts:
+            for items_count in items_counts if benchmark.is_scaled_by_items else (None,):
+                if items_count is not None and items_count < units_count:
+                    continue
+                function = benchmark.setup(units_count, items_count or 0)
+                results.append({
+                    'name': benchmark.name,
+                    'units': units_count,
+                    'items': items_count,
+                    **measure(function, repeat=repeat),
+                })
+    return results
+
+
+def parse_counts(value: str) -> list[int]:
+    return [int(count) for count in value.split(',')]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Microbenchmarks of the domain aggregation services')
+    parser.add_argument('--units', type=parse_counts, default=[1, 10, 100, 1000])
+    parser.add_argument('--items', type=parse_counts, default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default='', help='regular expression for benchmark names')
+    parser.add_argument('--output', type=pathlib.Path, help='JSON report path, stdout by default')
+    arguments = parser.parse_args()
+    results = run_domain_benchmarks(
+        units_counts=arguments.units,
+        items_counts=arguments.items,
+        repeat=arguments.repeat,
+        name_pattern=arguments.only,
+    )
+    report = json.dumps(results, indent=2)
+    if arguments.output is None:
+        sys.stdout.write(report + '\n')
+    else:
+        arguments.output.write_text(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import collections
+import contextvars
+import json
+import multiprocessing
+import pathlib
+import random
+import socket
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from typing import Sequence
+
+import httpx
+import uvicorn
+from fastapi_cache.backends import Backend
+
+from app import get_application
+from benchmarks.scenarios import DEFAULT_MIX, PreparedRequest, Scenario, User
+from simulator import LatencyDistribution, SimulatorASGIApp, SimulatorConfig, UpstreamSimulator
+
+__all__ = (
+    'LoadTestConfig',
+    'InMemoryCacheBackend',
+    'run_load_test',
+)
+
+# route of the request being sent, upstream calls and cache lookups are attributed to it
+route_var: contextvars.ContextVar[str | None] = contextvars.ContextVar('benchmark_route', default=None)
+
+
+@dataclass(frozen=True, slots=True)
+class LoadTestConfig:
+    rps: float = 20
+    duration: float = 30
+    units_count: int = 100
+    users_count: int = 10
+    units_per_user: int = 10
+    country_code: str = 'ru'
+    seed: int = 0
+    mix: Sequence[Scenario] = DEFAULT_MIX
+    simulator: SimulatorConfig = field(default_factory=lambda: SimulatorConfig(
+        latency=LatencyDistribution(median=0.1),
+    ))
+
+
+# stands in for Redis, counts hits and misses per route
+class InMemoryCacheBackend(Backend):
+
+    def __init__(self):
+        self.hits: collections.Counter[str] = collections.Counter()
+        self.misses: collections.Counter[str] = collections.Counter()
+        self.__values: dict[str, tuple[str, float | None]] = {}
+
+    async def get_with_ttl(self, key: str) -> tuple[int, str | None]:
+        value, expires_at = self.__values.get(key, (None, None))
+        if value is not None and expires_at is not None and expires_at <= time.monotonic():
+            del self.__values[key]
+            value = None
+        counter = self.misses if value is None else self.hits
+        counter[route_var.get()] += 1
+        if value is None:
+            return 0, None
+        return -1 if expires_at is None else int(expires_at - time.monotonic()), value
+
+    async def get(self, key: str) -> str | None:
+        _, value = await self.get_with_ttl(key)
+        return value
+
+    async def set(self, key: str, value: str, expire: int | None = None) -> None:
+        self.__values[key] = (value, None if expire is None else time.monotonic() + expire)
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        if key is not None:
+            return int(self.__values.pop(key, None) is not None)
+        keys = [cached_key for cached_key in self.__values if namespace is None or namespace in cached_key]
+        for cached_key in keys:
+            del self.__values[cached_key]
+        return len(keys)
+
+
+def serve_simulator(config: SimulatorConfig, connection: Connection) -> None:
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    connection.send(sock.getsockname()[1])
+    connection.close()
+    server = uvicorn.Server(uvicorn.Config(SimulatorASGIApp(UpstreamSimulator(config)), log_level='warning'))
+    server.run(sockets=[sock])
+
+
+# serves the simulator from a separate process, so generating its pages doesn't slow down the app under test
+class SimulatorProcessTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, config: SimulatorConfig):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self.__process = multiprocessing.get_context('spawn').Process(
+            target=serve_simulator,
+            args=(config, sender),
+            name='upstream-simulator',
+            daemon=True,
+        )
+        self.__process.start()
+        sender.close()
+        self.__url = httpx.URL(f'http://127.0.0.1:{receiver.recv()}')
+        receiver.close()
+        self.__transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=None))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # the simulator routes by path only, so any upstream host is sent to it
+        request.url = request.url.copy_with(scheme=self.__url.scheme, host=self.__url.host, port=self.__url.port)
+        return await self.__transport.handle_async_request(request)
+
+    # app clients share the transport and close it on their own, the process is stopped once the run is over
+    async def stop(self) -> None:
+        await self.__transport.aclose()
+        self.__process.terminate()
+        await asyncio.to_thread(self.__process.join)
+
+
+class CountingTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.__transport = transport
+        self.calls_count: collections.Counter[str] = collections.Counter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls_count[route_var.get()] += 1
+        return await self.__transport.handle_async_request(request)
+
+
+@dataclass(slots=True)
+class RouteStatistics:
+    latencies: list[float] = field(default_factory=list)
+    status_codes: collections.Counter[str] = field(default_factory=collections.Counter)
+
+
+def get_percentile(values: Sequence[float], percentile: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percentile - 1]
+
+
+def build_users(config: LoadTestConfig, rng: random.Random) -> list[User]:
+    unit_ids = range(1, config.units_count + 1)
+    return [
+        User(
+            token=f'token-{user_index}',
+            cookies={'.AspNetCore.Cookies': f'cookie-{user_index}'},
+            unit_ids=tuple(sorted(rng.sample(unit_ids, min(config.units_per_user, config.units_count)))),
+        )
+        for user_index in range(config.users_count)
+    ]
+
+
+def build_report(
+        config: LoadTestConfig,
+        routes_statistics: dict[str, RouteStatistics],
+        cache_backend: InMemoryCacheBackend,
+        transport: CountingTransport,
+        elapsed: float,
+) -> dict:
+    routes = {}
+    for route, route_statistics in sorted(routes_statistics.items()):
+        requests_count = len(route_statistics.latencies)
+        cache_lookups_count = cache_backend.hits[route] + cache_backend.misses[route]
+        routes[route] = {
+            'requests': requests_count,
+            'status_codes': dict(route_statistics.status_codes),
+            'throughput': round(requests_count / elapsed, 2),
+            'latency_ms': {
+                f'p{percentile}': round(get_percentile(route_statistics.latencies, percentile) * 1000, 1)
+                for percentile in (50, 95, 99)
+            },
+            'upstream_calls_per_request': round(transport.calls_count[route] / requests_count, 2),
+            'cache_hit_rate': (
+                round(cache_backend.hits[route] / cache_lookups_count, 3) if cache_lookups_count else None
+            ),
+        }
+    all_latencies = [latency for route in routes_statistics.values() for latency in route.latencies]
+    return {
+        'config': {
+            'rps': config.rps,
+            'duration': config.duration,
+            'units_count': config.units_count,
+            'users_count': config.users_count,
+            'units_per_user': config.units_per_user,
+            'seed': config.seed,
+        },
+        'elapsed': round(elapsed, 2),
+        'requests': len(all_latencies),
+        'throughput': round(len(all_latencies) / elapsed, 2),
+        'latency_ms': {
+            f'p{percentile}': round(get_percentile(all_latencies, percentile) * 1000, 1)
+            for percentile in (50, 95, 99)
+        } if all_latencies else {},
+        'upstream_calls': sum(transport.calls_count.values()),
+        'routes': routes,
+    }
+
+
+async def run_load_test(config: LoadTestConfig) -> dict:
+    rng = random.Random(config.seed)
+    users = build_users(config, rng)
+    simulator_transport = SimulatorProcessTransport(config.simulator)
+    transport = CountingTransport(simulator_transport)
+    cache_backend = InMemoryCacheBackend()
+    routes_statistics: dict[str, RouteStatistics] = collections.defaultdict(RouteStatistics)
+
+    app = get_application()
+    app.state.upstream_transport = transport
+    app.state.cache_backend = cache_backend
+
+    async def send(client: httpx.AsyncClient, scenario: Scenario, request: PreparedRequest) -> None:
+        route_var.set(scenario.route)
+        started_at = time.perf_counter()
+        try:
+            response = await client.request(
+                method=request.method,
+                url=request.url,
+                params=request.params,
+                headers=request.headers,
+                cookies=request.cookies,
+                json=request.json,
+            )
+            status = str(response.status_code)
+        except Exception as error:
+            status = type(error).__name__
+        route_statistics = routes_statistics[scenario.route]
+        route_statistics.latencies.append(time.perf_counter() - started_at)
+        route_statistics.status_codes[status] += 1
+
+    await app.router.startup()
+    try:
+        weights = [scenario.weight for scenario in config.mix]
+        tasks = []
+        # open model: requests arrive at the configured rate no matter how fast the app answers
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://testserver') as client:
+            started_at = time.perf_counter()
+            next_arrival = 0.0
+            while next_arrival < config.duration:
+                delay = started_at + next_arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                scenario = rng.choices(config.mix, weights)[0]
+                request = scenario.build_request(rng.choice(users), config.country_code, rng)
+                tasks.append(asyncio.create_task(send(client, scenario, request)))
+                next_arrival += rng.expovariate(config.rps)
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started_at
+    finally:
+        await app.router.shutdown()
+        await simulator_transport.stop()
+    return build_report(config, routes_statistics, cache_backend, transport, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load test of the API against the simulated upstream')
+    parser.add_argument('--rps', type=float, default=20)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--units', type=int, default=100)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--units-per-user', type=int, default=10)
+    parser.add_argument('--upstream-latency', type=float, default=0.1, help='median upstream latency, seconds')
+    parser.add_argument('--upstream-error-rate', type=float, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=pathlib.Path, help='JSON report path, stdout by default')
+    arguments = parser.parse_args()
+    config = LoadTestConfig(
+        rps=arguments.rps,
+        duration=arguments.duration,
+        units_count=arguments.units,
+        users_count=arguments.users,
+        units_per_user=arguments.units_per_user,
+        seed=arguments.seed,
+        simulator=SimulatorConfig(
+            seed=arguments.seed,
+            latency=LatencyDistribution(median=arguments.upstream_latency),
+            error_rate=arguments.upstream_error_rate,
+        ),
+    )
+    report = json.dumps(asyncio.run(run_load_test(config)), ensure_ascii=False, indent=2)
+    if arguments.output is None:
+        sys.stdout.write(report + '\n')
+    else:
+        arguments.output.write_text(report)
+
+
+if __name__ == '__main__':
+    main()
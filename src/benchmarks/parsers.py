@@ -0,0 +1,256 @@
+import argparse
+import datetime
+import gc
+import hashlib
+import io
+import json
+import pathlib
+import re
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from pydantic.json import pydantic_encoder
+
+from services import lxml_parsers, parsers, streaming_parsers
+from simulator import generators
+
+__all__ = (
+    'ParserCase',
+    'PARSER_CASES',
+    'serialize_output',
+    'write_corpus',
+    'run_parser_benchmarks',
+)
+
+SEED = 0
+DAY = datetime.date(2023, 1, 2)
+UNIT_ID = 1
+ORDER_UUID = uuid.UUID(int=1)
+# size of the real Office Manager layout around the data
+LAYOUT_ELEMENTS_COUNT = 300
+# streaming parsers get pages in chunks, like httpx yields them
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class ParserCase:
+    name: str
+    # page with the given count of rows, or of layout elements for pages with fixed data
+    render: Callable[[int], str | bytes]
+    parse: Callable[[str | bytes], Any]
+    file_extension: str = 'html'
+    # lxml cases must give the same output, the corpus is written by the reference parsers
+    engine: str = 'beautifulsoup'
+
+
+PARSER_CASES = (
+    ParserCase(
+        name='sector_stop_sales',
+        render=lambda rows_count: generators.render_stop_sales_by_sectors_page(
+            SEED, [UNIT_ID], DAY, rows_count, LAYOUT_ELEMENTS_COUNT,
+        ),
+        parse=lambda page: parsers.SectorStopSalesHTMLParser(page).parse(),
+    ),
+    ParserCase(
+        name='street_stop_sales',
+        render=lambda rows_count: generators.render_stop_sales_by_streets_page(
+            SEED, [UNIT_ID], DAY, rows_count, LAYOUT_ELEMENTS_COUNT,
+        ),
+        parse=lambda page: parsers.StreetStopSalesHTMLParser(page).parse(),
+    ),
+    ParserCase(
+        name='stock_balance',
+        render=lambda rows_count: generators.render_stock_balance_page(
+            SEED, UNIT_ID, rows_count, LAYOUT_ELEMENTS_COUNT,
+        ),
+        parse=lambda page: parsers.StockBalanceHTMLParser(page, UNIT_ID).parse(),
+    ),
+    ParserCase(
+        name='used_promo_codes',
+        render=lambda rows_count: generators.render_used_promo_codes_page(
+            SEED, UNIT_ID, DAY, rows_count, LAYOUT_ELEMENTS_COUNT,
+        ),
+        parse=lambda page: parsers.UsedPromoCodesHTMLParser(page, UNIT_ID).parse(),
+    ),
+    ParserCase(
+        name='orders_partial',
+        render=lambda rows_count: generators.render_partial_orders_page(SEED, DAY, 1, rows_count, rows_count),
+        parse=lambda page: parsers.OrdersPartial(page).parse(),
+    ),
+    ParserCase(
+        name='order_by_uuid',
+        render=lambda rows_count: generators.render_order_page(SEED, ORDER_UUID, DAY, rows_count),
+        parse=lambda page: parsers.OrderByUUIDParser(page, ORDER_UUID, 1000, 'Доставка').parse(),
+    ),
+    ParserCase(
+        name='delivery_partial_statistics',
+        render=lambda rows_count: generators.render_delivery_partial_statistics_page(SEED, UNIT_ID, rows_count),
+        parse=lambda page: parsers.DeliveryStatisticsHTMLParser(page, UNIT_ID).parse(),
+    ),
+    ParserCase(
+        name='kitchen_partial_statistics',
+        render=lambda rows_count: generators.render_kitchen_partial_statistics_page(SEED, UNIT_ID, rows_count),
+        parse=lambda page: parsers.KitchenStatisticsHTMLParser(page, UNIT_ID).parse(),
+    ),
+    ParserCase(
+        name='delivery_statistics_excel',
+        render=lambda rows_count: generators.generate_delivery_statistics_excel(SEED, range(1, rows_count + 1), DAY),
+        parse=lambda page: parsers.DeliveryStatisticsExcelParser(io.BytesIO(page)).parse(),
+        file_extension='xlsx',
+    ),
+)
+
+
+def encode_page(page: str | bytes) -> bytes:
+    # the lxml parsers get raw response bodies
+    return page if isinstance(page, bytes) else page.encode()
+
+
+LXML_PARSERS = {
+    'sector_stop_sales': lambda page: lxml_parsers.SectorStopSalesLxmlParser(encode_page(page)).parse(),
+    'street_stop_sales': lambda page: lxml_parsers.StreetStopSalesLxmlParser(encode_page(page)).parse(),
+    'stock_balance': lambda page: lxml_parsers.StockBalanceLxmlParser(encode_page(page), UNIT_ID).parse(),
+    'used_promo_codes': lambda page: lxml_parsers.UsedPromoCodesLxmlParser(encode_page(page), UNIT_ID).parse(),
+    'orders_partial': lambda page: lxml_parsers.OrdersPartialLxmlParser(encode_page(page)).parse(),
+    'order_by_uuid': lambda page: lxml_parsers.OrderByUUIDLxmlParser(
+        encode_page(page), ORDER_UUID, 1000, 'Доставка',
+    ).parse(),
+    'delivery_partial_statistics': lambda page: lxml_parsers.DeliveryStatisticsLxmlParser(
+        encode_page(page), UNIT_ID,
+    ).parse(),
+    'kitchen_partial_statistics': lambda page: lxml_parsers.KitchenStatisticsLxmlParser(
+        encode_page(page), UNIT_ID,
+    ).parse(),
+}
+
+
+def parse_in_chunks(parser: streaming_parsers.StreamingTableParser, page: str | bytes) -> list:
+    page = encode_page(page)
+    rows = []
+    for offset in range(0, len(page), CHUNK_SIZE):
+        rows += parser.feed(page[offset:offset + CHUNK_SIZE])
+    rows += parser.close()
+    return rows
+
+
+STREAMING_PARSERS = {
+    'sector_stop_sales': lambda page: parse_in_chunks(streaming_parsers.SectorStopSalesStreamingParser(), page),
+    'street_stop_sales': lambda page: parse_in_chunks(streaming_parsers.StreetStopSalesStreamingParser(), page),
+    'used_promo_codes': lambda page: parse_in_chunks(streaming_parsers.UsedPromoCodesStreamingParser(UNIT_ID), page),
+}
+PARSER_CASES += tuple(
+    ParserCase(name=case.name, render=case.render, parse=LXML_PARSERS[case.name], engine='lxml')
+    for case in PARSER_CASES if case.name in LXML_PARSERS
+) + tuple(
+    ParserCase(name=case.name, render=case.render, parse=STREAMING_PARSERS[case.name], engine='lxml_streaming')
+    for case in PARSER_CASES if case.name in STREAMING_PARSERS
+)
+
+
+def serialize_output(output: Any) -> str:
+    return json.dumps(output, default=pydantic_encoder, ensure_ascii=False, sort_keys=True, indent=2)
+
+
+def write_corpus(directory: pathlib.Path, rows_count: int) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for case in PARSER_CASES:
+        if case.engine != 'beautifulsoup':
+            continue
+        page = case.render(rows_count)
+        page_path = directory / f'{case.name}.{case.file_extension}'
+        if isinstance(page, bytes):
+            page_path.write_bytes(page)
+        else:
+            page_path.write_text(page, encoding='utf-8')
+        (directory / f'{case.name}.json').write_text(serialize_output(case.parse(page)) + '\n', encoding='utf-8')
+
+
+def measure(case: ParserCase, page: str | bytes, *, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started_at = time.perf_counter()
+        case.parse(page)
+        timings.append(time.perf_counter() - started_at)
+    # memory is measured in a separate run, because tracing slows parsing down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        output = case.parse(page)
+        _, peak_size = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'page_bytes': len(page if isinstance(page, bytes) else page.encode()),
+        'best_seconds': round(min(timings), 6),
+        'mean_seconds': round(sum(timings) / len(timings), 6),
+        'peak_allocated_bytes': peak_size,
+        # compare with a report of another build to check that the output did not change
+        'output_sha256': hashlib.sha256(serialize_output(output).encode()).hexdigest(),
+    }
+
+
+def run_parser_benchmarks(
+        *,
+        rows_counts: Iterable[int],
+        repeat: int,
+        name_pattern: str = '',
+        baseline: list[dict] | None = None,
+) -> list[dict]:
+    baseline_hashes = {
+        (result['name'], result['engine'], result['rows']): result['output_sha256'] for result in baseline or ()
+    }
+    results = []
+    for case in PARSER_CASES:
+        if not re.search(name_pattern, case.name):
+            continue
+        for rows_count in rows_counts:
+            result = {
+                'name': case.name,
+                'engine': case.engine,
+                'rows': rows_count,
+                **measure(case, case.render(rows_count), repeat=repeat),
+            }
+            baseline_hash = baseline_hashes.get((case.name, case.engine, rows_count))
+            if baseline_hash is not None:
+                result['is_output_equal_to_baseline'] = baseline_hash == result['output_sha256']
+            results.append(result)
+    return results
+
+
+def parse_counts(value: str) -> list[int]:
+    return [int(count) for count in value.split(',')]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of Office Manager and Shift Manager page parsers')
+    parser.add_argument('--rows', type=parse_counts, default=[10, 100, 1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', default='', help='regular expression for parser case names')
+    parser.add_argument('--baseline', type=pathlib.Path, help='report of another build to compare outputs with')
+    parser.add_argument('--output', type=pathlib.Path, help='JSON report path, stdout by default')
+    parser.add_argument('--write-corpus', type=pathlib.Path, help='write conformance corpus to the directory and exit')
+    parser.add_argument('--corpus-rows', type=int, default=20)
+    arguments = parser.parse_args()
+    if arguments.write_corpus is not None:
+        write_corpus(arguments.write_corpus, arguments.corpus_rows)
+        return
+    results = run_parser_benchmarks(
+        rows_counts=arguments.rows,
+        repeat=arguments.repeat,
+        name_pattern=arguments.only,
+        baseline=json.loads(arguments.baseline.read_text()) if arguments.baseline is not None else None,
+    )
+    report = json.dumps(results, indent=2)
+    if arguments.output is None:
+        sys.stdout.write(report + '\n')
+    else:
+        arguments.output.write_text(report)
+
+
+if __name__ == '__main__':
+    main()
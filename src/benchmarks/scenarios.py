@@ -0,0 +1,182 @@
+import datetime
+import random
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence
+
+from simulator.generators import get_unit_name, get_unit_uuid
+
+__all__ = (
+    'User',
+    'PreparedRequest',
+    'Scenario',
+    'DEFAULT_MIX',
+)
+
+
+@dataclass(frozen=True, slots=True)
+class User:
+    # every user polls reports for units of their own account, like dashboards and bots do
+    token: str
+    cookies: dict[str, str]
+    unit_ids: tuple[int, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class PreparedRequest:
+    method: str
+    url: str
+    params: list[tuple[str, Any]] = field(default_factory=list)
+    headers: dict[str, str] = field(default_factory=dict)
+    cookies: dict[str, str] = field(default_factory=dict)
+    json: Any = None
+
+
+@dataclass(frozen=True, slots=True)
+class Scenario:
+    # route is the path template, so the report matches routes of the application
+    route: str
+    weight: float
+    build_request: Callable[[User, str, random.Random], PreparedRequest]
+
+
+def get_period_params() -> list[tuple[str, str]]:
+    today = datetime.date.today()
+    return [('start', f'{today}T00:00:00'), ('end', f'{today}T23:59:59')]
+
+
+def v1_units_report(route: str, with_period: bool = False) -> Callable[[User, str, random.Random], PreparedRequest]:
+    def build_request(user: User, country_code: str, rng: random.Random) -> PreparedRequest:
+        params = [('unit_ids', unit_id) for unit_id in user.unit_ids]
+        return PreparedRequest(
+            method='GET',
+            url=route.format(country_code=country_code),
+            params=params + get_period_params() if with_period else params,
+            cookies=user.cookies,
+        )
+
+    return build_request
+
+
+def v2_units_report(route: str, with_period: bool = False) -> Callable[[User, str, random.Random], PreparedRequest]:
+    def build_request(user: User, country_code: str, rng: random.Random) -> PreparedRequest:
+        params = [('unit_uuids', get_unit_uuid(unit_id).hex) for unit_id in user.unit_ids]
+        return PreparedRequest(
+            method='GET',
+            url=route.format(country_code=country_code),
+            params=params + get_period_params() if with_period else params,
+            headers={'Authorization': f'Bearer {user.token}'},
+        )
+
+    return build_request
+
+
+def build_stocks_request(user: User, country_code: str, rng: random.Random) -> PreparedRequest:
+    return PreparedRequest(
+        method='GET',
+        url=f'/v1/{country_code}/stocks',
+        params=[('unit_ids', unit_id) for unit_id in user.unit_ids] + [('days_left_threshold', 3)],
+        cookies=user.cookies,
+    )
+
+
+def build_canceled_orders_request(user: User, country_code: str, rng: random.Random) -> PreparedRequest:
+    return PreparedRequest(
+        method='GET',
+        url=f'/v1/{country_code}/canceled-orders',
+        params=get_period_params(),
+        cookies=user.cookies,
+    )
+
+
+def build_used_promo_codes_request(user: User, country_code: str, rng: random.Random) -> PreparedRequest:
+    unit_id = rng.choice(user.unit_ids)
+    return PreparedRequest(
+        method='GET',
+        url=f'/v1/{country_code}/used-promo-codes/{unit_id}',
+        params=[('unit_id', unit_id)] + get_period_params(),
+        cookies=user.cookies,
+    )
+
+
+def build_cheated_orders_request(user: User, country_code: str, rng: random.Random) -> PreparedRequest:
+    return PreparedRequest(
+        method='POST',
+        url=f'/v1/{country_code}/cheated-orders',
+        cookies=user.cookies,
+        json={
+            'units': [{'id': unit_id, 'name': get_unit_name(unit_id)} for unit_id in user.unit_ids],
+            'repeated_phone_number_count_threshold': 3,
+        },
+    )
+
+
+def build_bonus_system_request(user: User, country_code: str, rng: random.Random) -> PreparedRequest:
+    return PreparedRequest(
+        method='POST',
+        url=f'/v1/{country_code}/reports/bonus-system',
+        cookies=user.cookies,
+        json=[{'id': unit_id, 'name': get_unit_name(unit_id)} for unit_id in user.unit_ids],
+    )
+
+
+# interactive reports are polled most, heavy bulk exports are rare
+DEFAULT_MIX: Sequence[Scenario] = (
+    Scenario('/v1/{country_code}/reports/revenue', 10, v1_units_report('/v1/{country_code}/reports/revenue')),
+    Scenario(
+        '/v1/{country_code}/reports/awaiting-orders', 10,
+        v1_units_report('/v1/{country_code}/reports/awaiting-orders'),
+    ),
+    Scenario(
+        '/v1/{country_code}/reports/kitchen-productivity', 8,
+        v1_units_report('/v1/{country_code}/reports/kitchen-productivity'),
+    ),
+    Scenario('/v1/{country_code}/stocks', 3, build_stocks_request),
+    Scenario(
+        '/v1/{country_code}/stop-sales/sectors', 3,
+        v1_units_report('/v1/{country_code}/stop-sales/sectors', with_period=True),
+    ),
+    Scenario(
+        '/v1/{country_code}/stop-sales/streets', 3,
+        v1_units_report('/v1/{country_code}/stop-sales/streets', with_period=True),
+    ),
+    Scenario(
+        '/v1/{country_code}/reports/trips-with-one-order', 1,
+        v1_units_report('/v1/{country_code}/reports/trips-with-one-order'),
+    ),
+    Scenario('/v1/{country_code}/canceled-orders', 1, build_canceled_orders_request),
+    Scenario('/v1/{country_code}/used-promo-codes/{unit_id}', 1, build_used_promo_codes_request),
+    Scenario('/v1/{country_code}/cheated-orders', 1, build_cheated_orders_request),
+    Scenario('/v1/{country_code}/reports/bonus-system', 1, build_bonus_system_request),
+    Scenario(
+        '/v2/{country_code}/reports/productivity-balance', 6,
+        v2_units_report('/v2/{country_code}/reports/productivity-balance'),
+    ),
+    Scenario(
+        '/v2/{country_code}/reports/restaurant-cooking-time', 6,
+        v2_units_report('/v2/{country_code}/reports/restaurant-cooking-time'),
+    ),
+    Scenario(
+        '/v2/{country_code}/reports/heated-shelf-time', 6,
+        v2_units_report('/v2/{country_code}/reports/heated-shelf-time'),
+    ),
+    Scenario(
+        '/v2/{country_code}/reports/delivery-speed', 6,
+        v2_units_report('/v2/{country_code}/reports/delivery-speed'),
+    ),
+    Scenario(
+        '/v2/{country_code}/reports/delivery-productivity', 6,
+        v2_units_report('/v2/{country_code}/reports/delivery-productivity'),
+    ),
+    Scenario(
+        '/v2/{country_code}/reports/being-late-certificates', 4,
+        v2_units_report('/v2/{country_code}/reports/being-late-certificates'),
+    ),
+    Scenario(
+        '/v2/{country_code}/stop-sales/channels', 4,
+        v2_units_report('/v2/{country_code}/stop-sales/channels', with_period=True),
+    ),
+    Scenario(
+        '/v2/{country_code}/stop-sales/ingredients', 4,
+        v2_units_report('/v2/{country_code}/stop-sales/ingredients', with_period=True),
+    ),
+)
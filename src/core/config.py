@@ -20,6 +20,70 @@ class AppSettings(BaseSettings):
     host: str = Field(..., env='APP_HOST')
     is_debug: bool = Field(..., env='IS_DEBUG')
     redis_url: str = Field(..., env='REDIS_URL')
+    http_timeout: float = Field(120, env='HTTP_TIMEOUT')
+    http_connect_timeout: float = Field(10, env='HTTP_CONNECT_TIMEOUT')
+    http2: bool = Field(False, env='HTTP2')
+    http_max_connections: int = Field(100, env='HTTP_MAX_CONNECTIONS')
+    http_max_keepalive_connections: int = Field(20, env='HTTP_MAX_KEEPALIVE_CONNECTIONS')
+    http_keepalive_expiry: float = Field(60, env='HTTP_KEEPALIVE_EXPIRY')
+    bulkhead_initial_concurrency: int = Field(10, env='BULKHEAD_INITIAL_CONCURRENCY')
+    bulkhead_min_concurrency: int = Field(1, env='BULKHEAD_MIN_CONCURRENCY')
+    bulkhead_max_concurrency: int = Field(30, env='BULKHEAD_MAX_CONCURRENCY')
+    bulkhead_latency_threshold: float = Field(5, env='BULKHEAD_LATENCY_THRESHOLD')
+    bulkhead_idle_timeout: float = Field(600, env='BULKHEAD_IDLE_TIMEOUT')
+    is_single_flight_enabled: bool = Field(True, env='IS_SINGLE_FLIGHT_ENABLED')
+    retry_max_attempts: int = Field(3, env='RETRY_MAX_ATTEMPTS')
+    retry_backoff_base: float = Field(0.2, env='RETRY_BACKOFF_BASE')
+    retry_backoff_cap: float = Field(2, env='RETRY_BACKOFF_CAP')
+    circuit_breaker_failure_threshold: int = Field(5, env='CIRCUIT_BREAKER_FAILURE_THRESHOLD')
+    circuit_breaker_reset_timeout: float = Field(30, env='CIRCUIT_BREAKER_RESET_TIMEOUT')
+    is_hedging_enabled: bool = Field(False, env='IS_HEDGING_ENABLED')
+    hedging_percentile: float = Field(0.95, env='HEDGING_PERCENTILE')
+    hedging_min_delay: float = Field(0.05, env='HEDGING_MIN_DELAY')
+    hedging_budget_ratio: float = Field(0.1, env='HEDGING_BUDGET_RATIO')
+    is_unit_quarantine_enabled: bool = Field(True, env='IS_UNIT_QUARANTINE_ENABLED')
+    unit_quarantine_failure_threshold: int = Field(3, env='UNIT_QUARANTINE_FAILURE_THRESHOLD')
+    unit_quarantine_base_window: float = Field(30, env='UNIT_QUARANTINE_BASE_WINDOW')
+    unit_quarantine_max_window: float = Field(960, env='UNIT_QUARANTINE_MAX_WINDOW')
+    unit_quarantine_max_probe_attempts: int = Field(10, env='UNIT_QUARANTINE_MAX_PROBE_ATTEMPTS')
+    unit_quarantine_idle_timeout: float = Field(1800, env='UNIT_QUARANTINE_IDLE_TIMEOUT')
+    unit_quarantine_max_probes_count: int = Field(1000, env='UNIT_QUARANTINE_MAX_PROBES_COUNT')
+    unit_quarantine_max_tracked_count: int = Field(10_000, env='UNIT_QUARANTINE_MAX_TRACKED_COUNT')
+    is_rate_limiting_enabled: bool = Field(False, env='IS_RATE_LIMITING_ENABLED')
+    is_rate_limiting_shared: bool = Field(False, env='IS_RATE_LIMITING_SHARED')
+    rate_limit_per_second: float = Field(10, env='RATE_LIMIT_PER_SECOND')
+    rate_limit_burst: int = Field(30, env='RATE_LIMIT_BURST')
+    rate_limit_max_wait: float = Field(5, env='RATE_LIMIT_MAX_WAIT')
+    rate_limit_idle_timeout: float = Field(600, env='RATE_LIMIT_IDLE_TIMEOUT')
+    is_priority_scheduling_enabled: bool = Field(True, env='IS_PRIORITY_SCHEDULING_ENABLED')
+    upstream_max_concurrency: int = Field(80, env='UPSTREAM_MAX_CONCURRENCY')
+    upstream_reserved_for_interactive: int = Field(30, env='UPSTREAM_RESERVED_FOR_INTERACTIVE')
+    admission_max_in_flight: int = Field(200, env='ADMISSION_MAX_IN_FLIGHT')
+    admission_max_in_flight_per_route: int = Field(50, env='ADMISSION_MAX_IN_FLIGHT_PER_ROUTE')
+    admission_max_queued_upstream_calls: int = Field(500, env='ADMISSION_MAX_QUEUED_UPSTREAM_CALLS')
+    admission_retry_after: float = Field(5, env='ADMISSION_RETRY_AFTER')
+    last_good_responses_max_count: int = Field(1000, env='LAST_GOOD_RESPONSES_MAX_COUNT')
+    last_good_responses_max_age: float = Field(600, env='LAST_GOOD_RESPONSES_MAX_AGE')
+    last_good_responses_max_body_size: int = Field(1_048_576, env='LAST_GOOD_RESPONSES_MAX_BODY_SIZE')
+    prewarm_country_codes: list[str] = Field([], env='PREWARM_COUNTRY_CODES')
+    prewarm_connections_per_host: int = Field(2, env='PREWARM_CONNECTIONS_PER_HOST')
+    prewarm_timeout: float = Field(15, env='PREWARM_TIMEOUT')
+    upstream_record_path: pathlib.Path | None = Field(None, env='UPSTREAM_RECORD_PATH')
+    upstream_replay_path: pathlib.Path | None = Field(None, env='UPSTREAM_REPLAY_PATH')
+    upstream_replay_latency_scale: float = Field(1, env='UPSTREAM_REPLAY_LATENCY_SCALE')
+    request_traces_max_count: int = Field(100, env='REQUEST_TRACES_MAX_COUNT')
+    is_loop_lag_monitor_enabled: bool = Field(True, env='IS_LOOP_LAG_MONITOR_ENABLED')
+    loop_lag_interval: float = Field(0.05, env='LOOP_LAG_INTERVAL')
+    loop_stall_threshold: float = Field(0.25, env='LOOP_STALL_THRESHOLD')
+    loop_stalls_max_count: int = Field(50, env='LOOP_STALLS_MAX_COUNT')
+    # profiling is allowed in debug mode, or to callers that know the secret
+    profiler_secret: str | None = Field(None, env='PROFILER_SECRET')
+    profiler_max_duration: float = Field(60, env='PROFILER_MAX_DURATION')
+    is_offload_process_pool_enabled: bool = Field(True, env='IS_OFFLOAD_PROCESS_POOL_ENABLED')
+    offload_workers_count: int = Field(2, env='OFFLOAD_WORKERS_COUNT')
+    offload_max_queued_count: int = Field(100, env='OFFLOAD_MAX_QUEUED_COUNT')
+    offload_max_pool_restarts_count: int = Field(3, env='OFFLOAD_MAX_POOL_RESTARTS_COUNT')
+    parse_cache_max_count: int = Field(10_000, env='PARSE_CACHE_MAX_COUNT')
 
 
 app_settings = AppSettings()
@@ -1,9 +1,14 @@
+import math
+
 from fastapi import HTTPException, status
 
 __all__ = (
     'BadRequest',
+    'DeadlineExceeded',
+    'RateLimitExceeded',
     'Unauthorized',
     'UnitIDAPIError',
+    'UpstreamUnavailable',
 )
 
 
@@ -25,6 +30,33 @@ class Unauthorized(HTTPException):
         )
 
 
+class DeadlineExceeded(HTTPException):
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail='Request deadline exceeded',
+        )
+
+
+class UpstreamUnavailable(HTTPException):
+
+    def __init__(self, detail: str = 'Upstream is unavailable'):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+        )
+
+
+# upstream quota of the caller is spent, so the call is rejected without reaching upstream
+class RateLimitExceeded(UpstreamUnavailable):
+
+    def __init__(self, retry_after: float):
+        super().__init__(detail='Upstream rate limit exceeded')
+        self.status_code = status.HTTP_429_TOO_MANY_REQUESTS
+        self.headers = {'Retry-After': str(math.ceil(retry_after))}
+
+
 class UnitIDAPIError(Exception):
 
     def __init__(self, unit_id: int):
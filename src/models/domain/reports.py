@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+from uuid import UUID
+
+__all__ = ('PartialReport',)
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True, slots=True)
+class PartialReport(Generic[T]):
+    results: list[T]
+    missing_datasets: list[str]
+    missing_unit_uuids: list[UUID]
+
+    @property
+    def is_partial(self) -> bool:
+        return bool(self.missing_datasets)
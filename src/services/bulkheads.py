@@ -0,0 +1,176 @@
+import asyncio
+import collections
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+__all__ = (
+    'AdaptiveBulkhead',
+    'BulkheadRegistry',
+)
+
+
+# AIMD concurrency limit: grows by one slot per window of healthy responses
+# and is cut multiplicatively when upstream answers slowly, with 5xx or not at all
+class AdaptiveBulkhead:
+
+    def __init__(
+            self,
+            *,
+            initial_limit: int,
+            min_limit: int,
+            max_limit: int,
+            latency_threshold: float,
+            decrease_factor: float = 0.5,
+    ):
+        self.__limit = float(initial_limit)
+        self.__min_limit = min_limit
+        self.__max_limit = max_limit
+        self.__latency_threshold = latency_threshold
+        self.__decrease_factor = decrease_factor
+        self.__in_flight = 0
+        self.__waiters: collections.deque[asyncio.Future] = collections.deque()
+        # cancelled waiters stay in the deque until they are skipped, so callers still waiting are counted
+        self.__queued = 0
+        self.__last_decreased_at = float('-inf')
+
+    @property
+    def limit(self) -> int:
+        return int(self.__limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self.__in_flight
+
+    @property
+    def queued(self) -> int:
+        return self.__queued
+
+    @property
+    def is_idle(self) -> bool:
+        return self.__in_flight == 0 and self.queued == 0
+
+    async def call(
+            self,
+            send: Callable[[], Awaitable[httpx.Response]],
+            admit: Callable[[Callable[[], Awaitable[httpx.Response]]], Awaitable[httpx.Response]] | None = None,
+    ) -> httpx.Response:
+        await self.__acquire()
+        started_at = time.monotonic()
+
+        async def send_admitted() -> httpx.Response:
+            # waiting for a slot of the shared scheduler says nothing about the latency of this session
+            nonlocal started_at
+            started_at = time.monotonic()
+            return await send()
+
+        try:
+            response = await (send() if admit is None else admit(send_admitted))
+        except httpx.TransportError:
+            self.__release()
+            self.__on_overload()
+            raise
+        except BaseException:
+            self.__release()
+            raise
+        self.__release()
+        if response.status_code >= 500 or time.monotonic() - started_at > self.__latency_threshold:
+            self.__on_overload()
+        else:
+            self.__on_success()
+        return response
+
+    async def __acquire(self) -> None:
+        if self.__in_flight < self.limit and not self.__waiters:
+            self.__in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        self.__queued += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # the slot could have been handed over right before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.__release()
+            raise
+        finally:
+            self.__queued -= 1
+
+    def __release(self) -> None:
+        self.__in_flight -= 1
+        self.__wake_up_waiters()
+
+    def __wake_up_waiters(self) -> None:
+        while self.__waiters and self.__in_flight < self.limit:
+            waiter = self.__waiters.popleft()
+            if waiter.done():
+                continue
+            self.__in_flight += 1
+            waiter.set_result(None)
+
+    def __on_success(self) -> None:
+        self.__limit = min(self.__max_limit, self.__limit + 1 / self.__limit)
+        self.__wake_up_waiters()
+
+    def __on_overload(self) -> None:
+        # concurrent failures of the same window must shrink the limit only once
+        now = time.monotonic()
+        if now - self.__last_decreased_at < self.__latency_threshold:
+            return
+        self.__last_decreased_at = now
+        self.__limit = max(self.__min_limit, self.__limit * self.__decrease_factor)
+
+
+# Bulkheads are kept per session, sessions come and go, so bulkheads unused for `idle_timeout` are dropped.
+class BulkheadRegistry:
+
+    def __init__(
+            self,
+            *,
+            initial_limit: int,
+            min_limit: int,
+            max_limit: int,
+            latency_threshold: float,
+            idle_timeout: float = 600,
+    ):
+        self.__initial_limit = initial_limit
+        self.__min_limit = min_limit
+        self.__max_limit = max_limit
+        self.__latency_threshold = latency_threshold
+        self.__idle_timeout = idle_timeout
+        # least recently used first
+        self.__bulkheads: collections.OrderedDict[str, AdaptiveBulkhead] = collections.OrderedDict()
+        self.__used_at: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.__bulkheads)
+
+    @property
+    def queued(self) -> int:
+        return sum(bulkhead.queued for bulkhead in self.__bulkheads.values())
+
+    def get(self, key: str) -> AdaptiveBulkhead:
+        now = time.monotonic()
+        self.__evict_idle(now)
+        bulkhead = self.__bulkheads.get(key)
+        if bulkhead is None:
+            bulkhead = self.__bulkheads[key] = AdaptiveBulkhead(
+                initial_limit=self.__initial_limit,
+                min_limit=self.__min_limit,
+                max_limit=self.__max_limit,
+                latency_threshold=self.__latency_threshold,
+            )
+        self.__bulkheads.move_to_end(key)
+        self.__used_at[key] = now
+        return bulkhead
+
+    def __evict_idle(self, now: float) -> None:
+        for key in list(self.__bulkheads):
+            if now - self.__used_at[key] < self.__idle_timeout:
+                break
+            # clients of a finished request may still hold a busy bulkhead
+            if self.__bulkheads[key].is_idle:
+                del self.__bulkheads[key]
+                del self.__used_at[key]
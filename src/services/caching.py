@@ -0,0 +1,74 @@
+import contextvars
+import time
+from typing import Any
+
+from fastapi_cache.backends import Backend
+from fastapi_cache.coder import JsonCoder
+
+from services import metrics, request_timing
+
+__all__ = (
+    'UncacheableValue',
+    'ReportCoder',
+    'ReportCacheBackend',
+    'cache_namespaces_var',
+)
+
+# namespaces of report caches looked up while handling a request, collected for the middlewares around it
+cache_namespaces_var: contextvars.ContextVar[list[str] | None] = contextvars.ContextVar(
+    'cache_namespaces',
+    default=None,
+)
+
+
+# encoded value that is returned to the caller, but never stored
+class UncacheableValue(str):
+    pass
+
+
+class ReportCoder(JsonCoder):
+
+    @classmethod
+    def encode(cls, value: Any) -> str:
+        encoded_value = super().encode(value)
+        # a partial report must not be served to the next callers as if it were complete
+        if getattr(value, 'is_partial', False):
+            return UncacheableValue(encoded_value)
+        return encoded_value
+
+
+def get_namespace(key: str) -> str:
+    # keys are built as "prefix:namespace:hash"
+    parts = key.split(':')
+    return parts[-2] if len(parts) >= 3 else ''
+
+
+class ReportCacheBackend(Backend):
+
+    def __init__(self, backend: Backend):
+        self.__backend = backend
+
+    async def get_with_ttl(self, key: str) -> tuple[int, str | None]:
+        started_at = time.perf_counter()
+        ttl, value = await self.__backend.get_with_ttl(key)
+        result = 'miss' if value is None else 'hit'
+        request_timing.add_duration('cache', time.perf_counter() - started_at, {'operation': 'get', 'result': result})
+        namespace = get_namespace(key)
+        metrics.REPORT_CACHE_LOOKUPS.inc(namespace=namespace, result=result)
+        namespaces = cache_namespaces_var.get()
+        if namespaces is not None:
+            namespaces.append(namespace)
+        return ttl, value
+
+    async def get(self, key: str) -> str | None:
+        return await self.__backend.get(key)
+
+    async def set(self, key: str, value: str, expire: int | None = None) -> None:
+        if isinstance(value, UncacheableValue):
+            return
+        started_at = time.perf_counter()
+        await self.__backend.set(key, value, expire)
+        request_timing.add_duration('cache', time.perf_counter() - started_at, {'operation': 'set'})
+
+    async def clear(self, namespace: str | None = None, key: str | None = None) -> int:
+        return await self.__backend.clear(namespace, key)
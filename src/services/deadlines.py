@@ -0,0 +1,59 @@
+import asyncio
+import contextvars
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Iterable
+
+from core import exceptions
+
+__all__ = (
+    'set_deadline',
+    'get_remaining_time',
+    'Datasets',
+    'gather_datasets',
+)
+
+deadline_var: contextvars.ContextVar[float | None] = contextvars.ContextVar('deadline', default=None)
+
+
+def set_deadline(budget_in_seconds: float | None) -> None:
+    deadline = None if budget_in_seconds is None else time.monotonic() + budget_in_seconds
+    deadline_var.set(deadline)
+
+
+def get_remaining_time() -> float | None:
+    deadline = deadline_var.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+@dataclass(frozen=True, slots=True)
+class Datasets:
+    results: dict[str, Any]
+    missing: list[str]
+
+    def get(self, name: str) -> Any:
+        return self.results.get(name, ())
+
+    @property
+    def arrived_items(self) -> Iterable[Any]:
+        return itertools.chain.from_iterable(self.results.values())
+
+
+async def gather_datasets(**coroutines: Awaitable[Any]) -> Datasets:
+    # only callers that set a deadline get partial reports, the rest get errors as before
+    is_partial_allowed = deadline_var.get() is not None
+    responses = await asyncio.gather(*coroutines.values(), return_exceptions=True)
+    results: dict[str, Any] = {}
+    missing: list[str] = []
+    for name, response in zip(coroutines, responses):
+        match response:
+            case exceptions.DeadlineExceeded() | exceptions.UpstreamUnavailable() if is_partial_allowed:
+                missing.append(name)
+            case BaseException():
+                raise response
+            case _:
+                results[name] = response
+    return Datasets(results=results, missing=missing)
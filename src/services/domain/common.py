@@ -1,7 +1,9 @@
 import collections
-from typing import TypeVar, Protocol, Iterable
+from typing import TypeVar, Protocol, Iterable, Any
 from uuid import UUID
 
+from models.domain import reports as report_models
+
 
 class ItemWithUnitUUID(Protocol):
     unit_uuid: UUID
@@ -22,3 +24,19 @@ def find_missing_unit_uuids(
         items_with_unit_uuid: Iterable[ItemWithUnitUUID],
 ) -> set[UUID]:
     return set(all_unit_uuids) - {item.unit_uuid for item in items_with_unit_uuid}
+
+
+def build_partial_report(
+        *,
+        unit_uuids: Iterable[UUID],
+        results: list[Any],
+        missing_datasets: Iterable[str],
+        arrived_items: Iterable[ItemWithUnitUUID],
+) -> report_models.PartialReport:
+    # units without a single row in the datasets that did arrive are reported explicitly
+    missing_unit_uuids = find_missing_unit_uuids(unit_uuids, items_with_unit_uuid=arrived_items)
+    return report_models.PartialReport(
+        results=results,
+        missing_datasets=list(missing_datasets),
+        missing_unit_uuids=sorted(missing_unit_uuids),
+    )
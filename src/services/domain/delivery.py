@@ -4,6 +4,7 @@ from uuid import UUID
 
 from models.domain import delivery as delivery_models
 from models.external_api_responses.dodo_is_api import delivery as dodo_is_api_delivery_models
+from services import metrics
 from services.domain.common import find_missing_unit_uuids
 
 __all__ = (
@@ -82,6 +83,7 @@ def blank_unit_delivery_productivity_statistics_factory(
     )
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='delivery_speed')
 def calculate_units_delivery_speed_statistics(
         *,
         all_unit_uuids: Iterable[UUID],
@@ -100,6 +102,7 @@ def calculate_units_delivery_speed_statistics(
     return delivery_speed_statistics + blank_delivery_statistics
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='delivery_productivity')
 def calculate_units_delivery_productivity_statistics(
         *,
         unit_uuids: Iterable[UUID],
@@ -122,6 +125,7 @@ def calculate_units_delivery_productivity_statistics(
     return units_delivery_productivity
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='being_late_certificates')
 def calculate_units_late_delivery_vouchers(
         *,
         unit_uuids: Iterable[UUID],
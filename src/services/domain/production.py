@@ -7,6 +7,7 @@ from uuid import UUID
 from models.domain import production as production_models
 from models.external_api_responses.dodo_is_api import delivery as dodo_is_api_delivery_models
 from models.external_api_responses.dodo_is_api import production as dodo_is_api_production_models
+from services import metrics
 
 T = TypeVar('T')
 SSv2 = TypeVar('SSv2', bound=dodo_is_api_production_models.StopSale)
@@ -82,6 +83,7 @@ def filter_complete_delivery_stop_sales(
     )
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='productivity_balance')
 def calculate_productivity_balance(
         *,
         unit_uuids,
@@ -105,6 +107,7 @@ def calculate_productivity_balance(
     ]
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='restaurant_cooking_time')
 def calculate_restaurant_cooking_time(
         unit_uuids: Iterable[UUID],
         orders: Iterable[dodo_is_api_production_models.OrdersHandoverTime]
@@ -131,6 +134,7 @@ def unit_heated_shelf_time_statistics_factory(
     )
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='heated_shelf_time')
 def calculate_units_heated_shelf_time_statistics(
         production_productivity_statistics: Iterable[dodo_is_api_production_models.UnitProductivityStatistics],
 ) -> list[production_models.UnitHeatedShelfTimeStatistics]:
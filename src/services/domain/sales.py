@@ -4,6 +4,7 @@ import pandas as pd
 
 from models.domain import sales as sales_models
 from models.external_api_responses import public_api as publib_api_models
+from services import metrics
 
 __all__ = (
     'calculate_total_revenue',
@@ -19,6 +20,7 @@ def calculate_percent_from_week_before(now: int, week_before: int) -> int:
     return round(now / week_before * 100) - 100
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='revenue')
 def calculate_units_revenue(
         units: Iterable[publib_api_models.UnitOperationalStatisticsForTodayAndWeekBefore],
 ) -> list[sales_models.UnitRevenue]:
@@ -34,6 +36,7 @@ def calculate_units_revenue(
     ]
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='total_revenue')
 def calculate_total_revenue(
         units: Iterable[publib_api_models.UnitOperationalStatisticsForTodayAndWeekBefore],
 ) -> sales_models.TotalRevenue:
@@ -46,6 +49,7 @@ def calculate_total_revenue(
     )
 
 
+@metrics.timed(metrics.REPORT_AGGREGATION_DURATION, report='cheated_orders')
 def restaurant_orders_to_cheated_orders(
         units_restaurant_orders: Iterable[Sequence[tuple[str, pd.DataFrame]]],
         repeated_phone_number_count_threshold: int,
@@ -11,7 +11,8 @@ from services.http_client_factories import AsyncHTTPClient
 
 
 def stringify_uuids(uuids: Iterable[UUID]) -> str:
-    return ','.join((uuid_item.hex for uuid_item in uuids))
+    # sorted, so the same units always produce the same request and can be coalesced
+    return ','.join(sorted(uuid_item.hex for uuid_item in uuids))
 
 
 @dataclass(frozen=True, slots=True)
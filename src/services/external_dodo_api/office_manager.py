@@ -1,51 +1,71 @@
-from typing import Iterable
+from typing import Awaitable, Callable, Iterable, TypeVar
 
-import pandas as pd
+import httpx
 from pandas.core.groupby import DataFrameGroupBy
 
 from core import exceptions
 from models.external_api_responses import office_manager as office_manager_models
-from services import parsers
+from models.external_api_responses.export_service_api import UsedPromoCode
+from services import lxml_parsers, parse_cache, streaming_parsers
 from services.http_client_factories import AsyncHTTPClient
 from services.periods import Period
 
 __all__ = ('OfficeManagerAPI',)
 
+T = TypeVar('T')
+
 
 class OfficeManagerAPI:
 
     def __init__(self, client: AsyncHTTPClient):
         self.__client = client
 
+    async def __get_unit_page(self, url: str, unit_id: int | str) -> httpx.Response:
+        try:
+            response = await self.__client.get_unit_resource(unit_id, url, params={'unitId': unit_id}, is_hedged=True)
+        except exceptions.UpstreamUnavailable:
+            raise exceptions.UnitIDAPIError(unit_id=unit_id)
+        if response.is_error:
+            raise exceptions.UnitIDAPIError(unit_id=unit_id)
+        return response
+
+    @staticmethod
+    def __get_consumer(
+            parser: streaming_parsers.StreamingTableParser[T],
+            unit_id_on_error: int | None = None,
+    ) -> Callable[[httpx.Response], Awaitable[list[T]]]:
+        # report pages can be megabytes, they are parsed as they arrive instead of being read whole
+
+        async def consume(response: httpx.Response) -> list[T]:
+            # an error page has no report table, parsing it would pass for an empty report
+            if not response.is_success:
+                if unit_id_on_error is not None:
+                    raise exceptions.UnitIDAPIError(unit_id=unit_id_on_error)
+                raise exceptions.UpstreamUnavailable(f'Office manager responded with {response.status_code}')
+            return await streaming_parsers.parse_stream(parser, response.aiter_bytes())
+
+        return consume
+
     async def get_delivery_partial_statistics(
             self,
             unit_id: int,
     ) -> office_manager_models.UnitDeliveryPartialStatistics:
         url = '/OfficeManager/OperationalStatistics/DeliveryWorkPartial'
-        params = {'unitId': unit_id}
-        response = await self.__client.get(url, params=params)
-        if response.is_error:
-            raise exceptions.UnitIDAPIError(unit_id=unit_id)
-        return parsers.DeliveryStatisticsHTMLParser(response.text, unit_id).parse()
+        response = await self.__get_unit_page(url, unit_id)
+        return await parse_cache.parse(lxml_parsers.DeliveryStatisticsLxmlParser, response.content, unit_id)
 
     async def get_kitchen_partial_statistics(
             self,
             unit_id: int,
     ) -> office_manager_models.UnitKitchenPartialStatistics:
         url = '/OfficeManager/OperationalStatistics/KitchenPartial'
-        params = {'unitId': unit_id}
-        response = await self.__client.get(url, params=params)
-        if response.is_error:
-            raise exceptions.UnitIDAPIError(unit_id=unit_id)
-        return parsers.KitchenStatisticsHTMLParser(response.text, unit_id).parse()
+        response = await self.__get_unit_page(url, unit_id)
+        return await parse_cache.parse(lxml_parsers.KitchenStatisticsLxmlParser, response.content, unit_id)
 
     async def get_stocks_balance(self, unit_id: int | str) -> list[office_manager_models.StockBalance]:
         url = '/OfficeManager/StockBalance/Get'
-        params = {'unitId': unit_id}
-        response = await self.__client.get(url, params=params)
-        if response.is_error:
-            raise exceptions.UnitIDAPIError(unit_id=unit_id)
-        return parsers.StockBalanceHTMLParser(response.text, unit_id).parse()
+        response = await self.__get_unit_page(url, unit_id)
+        return await parse_cache.parse(lxml_parsers.StockBalanceLxmlParser, response.content, unit_id)
 
     async def get_delivery_statistics_excel(self, unit_ids: Iterable[int], period: Period) -> bytes:
         url = '/Reports/DeliveryStatistic/Export'
@@ -71,8 +91,9 @@ class OfficeManagerAPI:
             'endDate': period.end.strftime('%d.%m.%Y'),
             'orderTypes': ['Delivery', 'Pickup', 'Stationary']
         }
-        response = await self.__client.post(url, data=request_data)
-        return pd.read_html(response.text)[0].groupby('Отдел')
+        parser = streaming_parsers.RestaurantOrdersStreamingParser()
+        rows = await self.__client.stream('POST', url, self.__get_consumer(parser), data=request_data)
+        return parser.build_data_frame(rows).groupby('Отдел')
 
     async def get_stop_sales_by_sectors(
             self, period: Period, unit_ids: set[int]
@@ -85,8 +106,8 @@ class OfficeManagerAPI:
             'endDate': period.end.strftime('%d.%m.%Y'),
         }
         url = '/Reports/StopSaleStatistic/GetDeliverySectorsStopSaleReport'
-        response = await self.__client.post(url, data=request_data)
-        return parsers.SectorStopSalesHTMLParser(response.text).parse()
+        parser = streaming_parsers.SectorStopSalesStreamingParser()
+        return await self.__client.stream('POST', url, self.__get_consumer(parser), data=request_data)
 
     async def get_stop_sales_by_streets(
             self, period: Period, unit_ids: set[int],
@@ -99,10 +120,10 @@ class OfficeManagerAPI:
             'endDate': period.end.strftime('%d.%m.%Y'),
         }
         url = '/Reports/StopSaleStatistic/GetDeliveryUnitStopSaleReport'
-        response = await self.__client.post(url, data=request_data)
-        return parsers.StreetStopSalesHTMLParser(response.text).parse()
+        parser = streaming_parsers.StreetStopSalesStreamingParser()
+        return await self.__client.stream('POST', url, self.__get_consumer(parser), data=request_data)
 
-    async def get_used_promocodes(self, period: Period, unit_id: int) -> str:
+    async def get_used_promocodes(self, period: Period, unit_id: int) -> list[UsedPromoCode]:
         url = '/Reports/PromoCodeUsed/Get'
         request_data = {
             'filterType': '',
@@ -124,7 +145,7 @@ class OfficeManagerAPI:
             'IsAllPromoCode': True,
             'OnlyComposition': False,
         }
-        response = await self.__client.post(url, data=request_data)
-        if not response.is_success:
-            raise
-        return response.text
+        parser = streaming_parsers.UsedPromoCodesStreamingParser(unit_id)
+        return await self.__client.stream(
+            'POST', url, self.__get_consumer(parser, unit_id_on_error=unit_id), data=request_data,
+        )
@@ -19,7 +19,10 @@ class DodoPublicAPI:
             unit_id: int,
     ) -> publib_api_models.UnitOperationalStatisticsForTodayAndWeekBefore:
         url = f'/OperationalStatisticsForTodayAndWeekBefore/{unit_id}'
-        response = await self.__client.get(url=url)
+        try:
+            response = await self.__client.get_unit_resource(unit_id, url)
+        except exceptions.UpstreamUnavailable:
+            raise exceptions.UnitIDAPIError(unit_id=unit_id)
         if not response.is_success:
             raise exceptions.UnitIDAPIError(unit_id=unit_id)
         return publib_api_models.UnitOperationalStatisticsForTodayAndWeekBefore.parse_obj(response.json())
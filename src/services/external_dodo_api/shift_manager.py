@@ -3,7 +3,7 @@ from uuid import UUID
 
 from services.http_client_factories import AsyncHTTPClient
 from models.external_api_responses import shift_manager as shift_manager_models
-from services import parsers
+from services import lxml_parsers, offloading
 from services.periods import Period
 
 __all__ = ('ShiftManagerAPI',)
@@ -24,7 +24,7 @@ class ShiftManagerAPI:
         }
         while True:
             response = await self.__client.get(url, params=request_params, timeout=30)
-            orders = parsers.OrdersPartial(response.text).parse()
+            orders = await offloading.parse(lxml_parsers.OrdersPartialLxmlParser, response.content)
             yield orders
             if not orders:
                 break
@@ -39,4 +39,6 @@ class ShiftManagerAPI:
         url = '/Managment/ShiftManagment/Order'
         request_params = {'orderUUId': order_uuid.hex}
         response = await self.__client.get(url, params=request_params, timeout=30)
-        return parsers.OrderByUUIDParser(response.text, order_uuid, order_price, order_type).parse()
+        return await offloading.parse(
+            lxml_parsers.OrderByUUIDLxmlParser, response.content, order_uuid, order_price, order_type,
+        )
@@ -0,0 +1,69 @@
+import asyncio
+import collections
+import statistics
+import time
+from typing import Awaitable, Callable, TypeVar
+
+__all__ = ('RequestHedger',)
+
+T = TypeVar('T')
+
+
+# Sends a duplicate request once the configured latency percentile of the endpoint has elapsed.
+# Every request earns `budget_ratio` of a hedge, so hedges never exceed that share of upstream traffic.
+class RequestHedger:
+
+    def __init__(
+            self,
+            *,
+            percentile: float,
+            min_delay: float,
+            budget_ratio: float,
+            max_budget: float = 10,
+            min_samples_count: int = 20,
+            max_samples_count: int = 1000,
+    ):
+        self.__percentile = percentile
+        self.__min_delay = min_delay
+        self.__budget_ratio = budget_ratio
+        self.__max_budget = max_budget
+        self.__min_samples_count = min_samples_count
+        self.__max_samples_count = max_samples_count
+        self.__budget = 0.0
+        self.__latencies: dict[str, collections.deque[float]] = {}
+
+    def get_delay(self, key: str) -> float | None:
+        latencies = self.__latencies.get(key)
+        if latencies is None or len(latencies) < self.__min_samples_count:
+            return None
+        percentiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        percentile_index = min(len(percentiles) - 1, max(0, round(self.__percentile * 100) - 1))
+        return max(self.__min_delay, percentiles[percentile_index])
+
+    async def call(self, key: str, send: Callable[[], Awaitable[T]]) -> T:
+        self.__budget = min(self.__max_budget, self.__budget + self.__budget_ratio)
+        delay = self.get_delay(key)
+        tasks = {asyncio.ensure_future(self.__timed(key, send))}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done and self.__budget >= 1:
+                    self.__budget -= 1
+                    tasks.add(asyncio.ensure_future(self.__timed(key, send)))
+            while True:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                successful = [task for task in done if task.exception() is None]
+                if successful:
+                    return successful[0].result()
+                if not tasks:
+                    return done.pop().result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def __timed(self, key: str, send: Callable[[], Awaitable[T]]) -> T:
+        started_at = time.monotonic()
+        result = await send()
+        latencies = self.__latencies.setdefault(key, collections.deque(maxlen=self.__max_samples_count))
+        latencies.append(time.monotonic() - started_at)
+        return result
@@ -1,63 +1,442 @@
+import asyncio
 import contextlib
-from typing import TypeAlias
+import enum
+import functools
+import hashlib
+import time
+from dataclasses import dataclass, field
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Awaitable, Callable, Iterable, Mapping, TypeAlias, TypeVar
 
 import httpx
 
+from core import exceptions
+from services import deadlines, metrics, request_timing
+from services.bulkheads import AdaptiveBulkhead, BulkheadRegistry
+from services.hedging import RequestHedger
+from services.priorities import PriorityScheduler
+from services.quarantine import UnitQuarantine
+from services.rate_limiting import RateLimiterRegistry, RedisTokenBucket, TokenBucket
+from services.resilience import GATEWAY_ERROR_STATUS_CODES, CircuitBreaker, CircuitBreakerRegistry, RetryPolicy
+from services.single_flight import SingleFlight
+
 __all__ = (
-    'closing_dodo_is_api_client_factory',
-    'closing_office_manager_api_client_factory',
-    'closing_public_api_client_factory',
-    'closing_shift_manager_api_client_factory',
+    'Upstream',
+    'HTTPClientRegistry',
+    'dodo_is_api_client_factory',
+    'office_manager_api_client_factory',
+    'public_api_client_factory',
+    'shift_manager_api_client_factory',
     'closing_export_service_api_client_factory',
     'AsyncHTTPClient',
     'HTTPClient',
 )
 
+T = TypeVar('T')
+
 HTTPClient: TypeAlias = httpx.Client
-AsyncHTTPClient: TypeAlias = httpx.AsyncClient
 
 
-@contextlib.asynccontextmanager
-async def closing_dodo_is_api_client_factory(*, token: str, country_code: str, app_user_agent: str) -> AsyncHTTPClient:
-    base_url = f'https://api.dodois.io/dodopizza/{country_code}/'
-    headers = {'User-Agent': app_user_agent, 'Authorization': f'Bearer {token}'}
-    async with httpx.AsyncClient(headers=headers, base_url=base_url, timeout=120) as client:
-        yield client
+class Upstream(enum.Enum):
+    DODO_IS_API = 'https://api.dodois.io/dodopizza/{country_code}/'
+    PUBLIC_API = 'https://publicapi.dodois.io/{country_code}/api/v1/'
+    OFFICE_MANAGER = 'https://officemanager.dodopizza.{country_code}/'
+    SHIFT_MANAGER = 'https://shiftmanager.dodopizza.{country_code}/'
 
+    def get_base_url(self, country_code: str) -> str:
+        return self.value.format(country_code=country_code)
+
+
+# pooled clients are shared by all callers, so cookies set by upstream must never be persisted
+class RejectingCookiePolicy(DefaultCookiePolicy):
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
 
-@contextlib.asynccontextmanager
-async def closing_public_api_client_factory(*, country_code: str, app_user_agent: str) -> AsyncHTTPClient:
-    base_url = f'https://publicapi.dodois.io/{country_code}/api/v1/'
-    headers = {'User-Agent': app_user_agent}
-    async with httpx.AsyncClient(headers=headers, base_url=base_url, timeout=120) as client:
-        yield client
 
+class HTTPClientRegistry:
 
-@contextlib.asynccontextmanager
-async def closing_office_manager_api_client_factory(
+    def __init__(
+            self,
+            *,
+            app_user_agent: str,
+            timeout: httpx.Timeout,
+            limits: httpx.Limits,
+            http2: bool,
+            bulkheads: BulkheadRegistry,
+            single_flight: SingleFlight | None,
+            retry_policy: RetryPolicy,
+            circuit_breakers: CircuitBreakerRegistry,
+            hedger: RequestHedger | None,
+            quarantine: UnitQuarantine | None,
+            rate_limiters: RateLimiterRegistry | None,
+            scheduler: PriorityScheduler | None,
+            transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.__app_user_agent = app_user_agent
+        self.__timeout = timeout
+        self.__limits = limits
+        self.__http2 = http2
+        self.bulkheads = bulkheads
+        self.single_flight = single_flight
+        self.retry_policy = retry_policy
+        self.circuit_breakers = circuit_breakers
+        self.hedger = hedger
+        self.quarantine = quarantine
+        self.rate_limiters = rate_limiters
+        self.scheduler = scheduler
+        self.__transport = transport
+        self.__clients: dict[tuple[Upstream, str], httpx.AsyncClient] = {}
+
+    def get(self, upstream: Upstream, country_code: str) -> httpx.AsyncClient:
+        key = (upstream, country_code)
+        if key not in self.__clients:
+            self.__clients[key] = httpx.AsyncClient(
+                base_url=upstream.get_base_url(country_code),
+                headers={'User-Agent': self.__app_user_agent},
+                cookies=CookieJar(policy=RejectingCookiePolicy()),
+                timeout=self.__timeout,
+                limits=self.__limits,
+                http2=self.__http2,
+                transport=self.__transport,
+            )
+        return self.__clients[key]
+
+    async def prewarm(
+            self,
+            *,
+            upstreams: Iterable[Upstream],
+            country_codes: Iterable[str],
+            connections_per_host: int,
+    ) -> None:
+        # concurrent requests make the pool resolve hosts and keep several TCP/TLS connections alive
+        async def open_connection(client: httpx.AsyncClient) -> None:
+            try:
+                await client.head('/')
+            except httpx.HTTPError:
+                pass
+
+        clients = [self.get(upstream, country_code) for upstream in upstreams for country_code in country_codes]
+        await asyncio.gather(*(
+            open_connection(client)
+            for client in clients
+            for _ in range(connections_per_host)
+        ))
+
+    async def close(self) -> None:
+        clients = list(self.__clients.values())
+        self.__clients.clear()
+        if self.quarantine is not None:
+            await self.quarantine.close()
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+
+def record_upstream_request(
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
         *,
-        cookies: dict[str, str],
+        upstream: str,
         country_code: str,
-        app_user_agent: str,
+        status: str,
+        started_at: float,
+        bytes_downloaded: int = 0,
+) -> None:
+    # waiting in the bulkhead and the scheduler is included, it is what callers wait for
+    duration = time.perf_counter() - started_at
+    metrics.UPSTREAM_REQUEST_DURATION.observe(
+        duration,
+        upstream=upstream,
+        path=metrics.get_path_template(url),
+        country_code=country_code,
+        status=status,
+    )
+    request_timing.add_upstream_call(
+        method=method,
+        url=str(client.base_url.join(url).copy_with(query=None)),
+        status=status,
+        started_at=started_at,
+        duration=duration,
+        bytes_downloaded=bytes_downloaded,
+    )
+
+
+def get_bytes_downloaded(response: httpx.Response) -> int:
+    if response.num_bytes_downloaded:
+        return response.num_bytes_downloaded
+    # responses built in memory, like replayed ones, are not downloaded
+    try:
+        return len(response.content)
+    except httpx.ResponseNotRead:
+        return 0
+
+
+async def wait_for_deadline(awaitable: Awaitable[T]) -> T:
+    remaining_time = deadlines.get_remaining_time()
+    if remaining_time is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=remaining_time)
+    except asyncio.TimeoutError:
+        raise exceptions.DeadlineExceeded
+
+
+@dataclass(frozen=True, slots=True)
+class AsyncHTTPClient:
+    # scope identifies upstream and credentials without exposing them, so it is safe for cache keys and logs
+    client: httpx.AsyncClient = field(repr=False)
+    headers: dict[str, str] = field(repr=False)
+    scope: str
+    bulkhead: AdaptiveBulkhead | None = field(default=None, repr=False)
+    single_flight: SingleFlight | None = field(default=None, repr=False)
+    retry_policy: RetryPolicy | None = field(default=None, repr=False)
+    circuit_breaker: CircuitBreaker | None = field(default=None, repr=False)
+    hedger: RequestHedger | None = field(default=None, repr=False)
+    quarantine: UnitQuarantine | None = field(default=None, repr=False)
+    rate_limiter: TokenBucket | RedisTokenBucket | None = field(default=None, repr=False)
+    scheduler: PriorityScheduler | None = field(default=None, repr=False)
+    upstream: Upstream | None = None
+    country_code: str | None = None
+
+    async def request(
+            self,
+            method: str,
+            url: str,
+            *,
+            headers: dict[str, str] | None = None,
+            is_hedged: bool = False,
+            **kwargs,
+    ) -> httpx.Response:
+        send = functools.partial(self.send, method, url, headers=self.headers | (headers or {}), **kwargs)
+        if is_hedged and self.hedger is not None:
+            send = functools.partial(self.hedger.call, f'{self.client.base_url.host}{url}', send)
+        # every upstream call of this service is a read, so identical in-flight calls can share one response
+        if self.single_flight is not None:
+            send = functools.partial(self.single_flight.do, self.build_request_key(method, url, **kwargs), send)
+        return await wait_for_deadline(send())
+
+    async def send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        attempt = 0
+        while True:
+            can_retry = self.retry_policy is not None and self.retry_policy.can_retry(method, attempt)
+            try:
+                response = await self.send_attempt(method, url, **kwargs)
+            except httpx.TransportError as error:
+                if not can_retry:
+                    raise exceptions.UpstreamUnavailable(f'{self.client.base_url.host} is unavailable') from error
+            else:
+                if not can_retry or response.status_code not in self.retry_policy.retryable_status_codes:
+                    return response
+            await asyncio.sleep(self.retry_policy.get_delay(attempt))
+            attempt += 1
+
+    async def send_attempt(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.call_upstream(method, url, functools.partial(self.client.request, method, url, **kwargs))
+
+    async def call_upstream(
+            self,
+            method: str,
+            url: str,
+            send: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        # calls rejected by an open circuit breaker never reach upstream, so they spend no quota
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+            raise exceptions.UpstreamUnavailable(f'{self.client.base_url.host} is unavailable')
+        # every attempt spends upstream quota of the caller, retries and hedges included
+        if self.rate_limiter is not None:
+            try:
+                await self.rate_limiter.acquire()
+            except BaseException:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.on_abandoned()
+                raise
+        # a shared scheduler slot is taken only once the session's own bulkhead lets the call in,
+        # so calls queued behind a throttled session do not hold slots of everyone else
+        if self.bulkhead is not None:
+            admit = None if self.scheduler is None else self.scheduler.call
+            send = functools.partial(self.bulkhead.call, send, admit)
+        elif self.scheduler is not None:
+            send = functools.partial(self.scheduler.call, send)
+        upstream = self.upstream.name.lower() if self.upstream is not None else self.client.base_url.host
+        country_code = self.country_code or ''
+        started_at = time.perf_counter()
+        try:
+            with metrics.UPSTREAM_REQUESTS_IN_FLIGHT.track_in_progress(upstream=upstream, country_code=country_code):
+                response = await send()
+        except httpx.TransportError as error:
+            record_upstream_request(
+                self.client, method, url,
+                upstream=upstream, country_code=country_code, status=type(error).__name__, started_at=started_at,
+            )
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.on_failure()
+            raise
+        except BaseException:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.on_abandoned()
+            raise
+        record_upstream_request(
+            self.client, method, url,
+            upstream=upstream,
+            country_code=country_code,
+            status=str(response.status_code),
+            started_at=started_at,
+            bytes_downloaded=get_bytes_downloaded(response),
+        )
+        # other server errors may be failures of a single unit, they must not cut off the whole host
+        if self.circuit_breaker is not None:
+            if response.status_code in GATEWAY_ERROR_STATUS_CODES:
+                self.circuit_breaker.on_failure()
+            else:
+                self.circuit_breaker.on_success()
+        return response
+
+    async def stream(
+            self,
+            method: str,
+            url: str,
+            consume: Callable[[httpx.Response], Awaitable[T]],
+            *,
+            headers: dict[str, str] | None = None,
+            **kwargs,
+    ) -> T:
+        # The body is consumed chunk by chunk while the request holds its bulkhead and scheduler slots,
+        # so it is never buffered whole. Such requests are not retried, hedged or shared by single flight,
+        # because the body can be read only once.
+        result = None
+
+        async def send() -> httpx.Response:
+            nonlocal result
+            request = self.client.build_request(method, url, headers=self.headers | (headers or {}), **kwargs)
+            response = await self.client.send(request, stream=True)
+            try:
+                result = await consume(response)
+            finally:
+                await response.aclose()
+            return response
+
+        await wait_for_deadline(self.call_upstream(method, url, send))
+        return result
+
+    def build_request_key(self, method: str, url: str, **kwargs) -> tuple[str, str, str, str, bytes]:
+        request = self.client.build_request(
+            method,
+            url,
+            params=kwargs.get('params'),
+            data=kwargs.get('data'),
+            json=kwargs.get('json'),
+        )
+        query = sorted(request.url.params.multi_items())
+        return self.scope, request.method, str(request.url.copy_with(query=None)), repr(query), request.content
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+    async def get_unit_resource(self, unit_id: int | str, url: str, **kwargs) -> httpx.Response:
+        send = functools.partial(self.get, url, **kwargs)
+        if self.quarantine is None:
+            return await send()
+        return await self.quarantine.call(scope=self.scope, resource=url, unit_id=unit_id, send=send)
+
+
+def build_cookie_header(cookies: Mapping[str, str]) -> str:
+    return '; '.join(f'{name}={value}' for name, value in cookies.items())
+
+
+def authorized_client_factory(
+        *,
+        registry: HTTPClientRegistry,
+        upstream: Upstream,
+        country_code: str,
+        headers: dict[str, str],
+        with_bulkhead: bool,
+        with_rate_limiter: bool,
 ) -> AsyncHTTPClient:
-    base_url = f'https://officemanager.dodopizza.{country_code}/'
-    headers = {'User-Agent': app_user_agent}
-    cookies |= {'SelectedLanguage7': 'ru-RU'}
-    async with httpx.AsyncClient(headers=headers, cookies=cookies, base_url=base_url, timeout=120) as client:
-        yield client
+    client = registry.get(upstream, country_code)
+    credentials = ''.join(f'{name}:{value}\n' for name, value in sorted(headers.items()))
+    scope = hashlib.sha256(f'{client.base_url}\n{credentials}'.encode()).hexdigest()[:16]
+    bulkhead = registry.bulkheads.get(scope) if with_bulkhead else None
+    rate_limiter = None
+    if with_rate_limiter and registry.rate_limiters is not None:
+        rate_limiter = registry.rate_limiters.get(scope)
+    return AsyncHTTPClient(
+        client=client,
+        headers=headers,
+        scope=scope,
+        bulkhead=bulkhead,
+        single_flight=registry.single_flight,
+        retry_policy=registry.retry_policy,
+        circuit_breaker=registry.circuit_breakers.get(str(client.base_url)),
+        hedger=registry.hedger,
+        quarantine=registry.quarantine,
+        rate_limiter=rate_limiter,
+        scheduler=registry.scheduler,
+        upstream=upstream,
+        country_code=country_code,
+    )
 
 
-@contextlib.asynccontextmanager
-async def closing_shift_manager_api_client_factory(
+def dodo_is_api_client_factory(
         *,
-        cookies: dict[str, str],
+        registry: HTTPClientRegistry,
+        token: str,
         country_code: str,
-        app_user_agent: str,
 ) -> AsyncHTTPClient:
-    base_url = f'https://shiftmanager.dodopizza.{country_code}/'
-    headers = {'User-Agent': app_user_agent}
-    async with httpx.AsyncClient(headers=headers, cookies=cookies, base_url=base_url, timeout=120) as client:
-        yield client
+    return authorized_client_factory(
+        registry=registry,
+        upstream=Upstream.DODO_IS_API,
+        country_code=country_code,
+        headers={'Authorization': f'Bearer {token}'},
+        with_bulkhead=False,
+        with_rate_limiter=True,
+    )
+
+
+def public_api_client_factory(*, registry: HTTPClientRegistry, country_code: str) -> AsyncHTTPClient:
+    return authorized_client_factory(
+        registry=registry,
+        upstream=Upstream.PUBLIC_API,
+        country_code=country_code,
+        headers={},
+        with_bulkhead=True,
+        with_rate_limiter=False,
+    )
+
+
+def office_manager_api_client_factory(
+        *,
+        registry: HTTPClientRegistry,
+        cookies: Mapping[str, str],
+        country_code: str,
+) -> AsyncHTTPClient:
+    cookies = dict(cookies) | {'SelectedLanguage7': 'ru-RU'}
+    return authorized_client_factory(
+        registry=registry,
+        upstream=Upstream.OFFICE_MANAGER,
+        country_code=country_code,
+        headers={'Cookie': build_cookie_header(cookies)},
+        with_bulkhead=True,
+        with_rate_limiter=True,
+    )
+
+
+def shift_manager_api_client_factory(
+        *,
+        registry: HTTPClientRegistry,
+        cookies: Mapping[str, str],
+        country_code: str,
+) -> AsyncHTTPClient:
+    return authorized_client_factory(
+        registry=registry,
+        upstream=Upstream.SHIFT_MANAGER,
+        country_code=country_code,
+        headers={'Cookie': build_cookie_header(cookies)} if cookies else {},
+        with_bulkhead=True,
+        with_rate_limiter=False,
+    )
 
 
 @contextlib.contextmanager
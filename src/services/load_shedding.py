@@ -0,0 +1,93 @@
+import collections
+import time
+from dataclasses import dataclass
+
+__all__ = (
+    'AdmissionController',
+    'StoredResponse',
+    'LastGoodResponses',
+)
+
+
+class AdmissionController:
+
+    def __init__(self, *, max_in_flight: int, max_in_flight_per_route: int, max_queued_upstream_calls: int):
+        self.__max_in_flight = max_in_flight
+        self.__max_in_flight_per_route = max_in_flight_per_route
+        self.__max_queued_upstream_calls = max_queued_upstream_calls
+        self.__in_flight = 0
+        self.__in_flight_by_route: collections.Counter[str] = collections.Counter()
+        self.__rejected_by_route: collections.Counter[str] = collections.Counter()
+
+    @property
+    def in_flight(self) -> int:
+        return self.__in_flight
+
+    @property
+    def in_flight_by_route(self) -> dict[str, int]:
+        return dict(self.__in_flight_by_route)
+
+    @property
+    def rejected_by_route(self) -> dict[str, int]:
+        return dict(self.__rejected_by_route)
+
+    def try_admit(self, route: str, queued_upstream_calls: int) -> bool:
+        if (self.__in_flight >= self.__max_in_flight
+                or self.__in_flight_by_route[route] >= self.__max_in_flight_per_route
+                or queued_upstream_calls >= self.__max_queued_upstream_calls):
+            self.__rejected_by_route[route] += 1
+            return False
+        self.__in_flight += 1
+        self.__in_flight_by_route[route] += 1
+        return True
+
+    def release(self, route: str) -> None:
+        self.__in_flight -= 1
+        self.__in_flight_by_route[route] -= 1
+        if not self.__in_flight_by_route[route]:
+            del self.__in_flight_by_route[route]
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+    stored_at: float
+    # report cache the response came through, empty for reports that aren't cached
+    cache_namespace: str = ''
+
+
+# last successful response per request, served instead of a rejection while the service is overloaded
+class LastGoodResponses:
+
+    def __init__(self, *, max_count: int, max_age: float, max_body_size: int):
+        self.__max_count = max_count
+        self.__max_age = max_age
+        self.__max_body_size = max_body_size
+        self.__responses: collections.OrderedDict[str, StoredResponse] = collections.OrderedDict()
+
+    @property
+    def max_body_size(self) -> int:
+        return self.__max_body_size
+
+    def set(self, key: str, headers: list[tuple[bytes, bytes]], body: bytes, cache_namespace: str = '') -> None:
+        if len(body) > self.__max_body_size:
+            return
+        self.__responses[key] = StoredResponse(
+            headers=headers,
+            body=body,
+            stored_at=time.monotonic(),
+            cache_namespace=cache_namespace,
+        )
+        self.__responses.move_to_end(key)
+        while len(self.__responses) > self.__max_count:
+            self.__responses.popitem(last=False)
+
+    def get(self, key: str) -> StoredResponse | None:
+        response = self.__responses.get(key)
+        if response is None:
+            return None
+        if time.monotonic() - response.stored_at > self.__max_age:
+            del self.__responses[key]
+            return None
+        return response
@@ -0,0 +1,112 @@
+import asyncio
+import collections
+import logging
+import pathlib
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+from services import metrics
+
+__all__ = (
+    'LoopStall',
+    'LoopLagMonitor',
+)
+
+logger = logging.getLogger(__name__)
+
+# frames of this service, as opposed to libraries, tell which code blocked the loop
+SOURCE_ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+@dataclass(frozen=True, slots=True)
+class LoopStall:
+    # time.time() when the loop stopped responding
+    started_at: float
+    duration: float
+    # innermost frame of this service, or "unknown" when the stall was too short to be caught in the act
+    location: str
+    stack: list[str]
+
+
+def get_location(stack: traceback.StackSummary) -> str:
+    for frame in reversed(stack):
+        path = pathlib.Path(frame.filename).resolve()
+        if path.is_relative_to(SOURCE_ROOT):
+            return f'{path.relative_to(SOURCE_ROOT).as_posix()}:{frame.name}'
+    # blocked outside of this service, a library callback for example
+    return f'{pathlib.Path(stack[-1].filename).name}:{stack[-1].name}' if stack else 'unknown'
+
+
+# A heartbeat task measures how late the event loop wakes it up. A watchdog thread catches the loop
+# while it is still blocked and takes the stack of the loop thread, so stalls are attributed to code.
+class LoopLagMonitor:
+
+    def __init__(self, *, interval: float, stall_threshold: float, max_stalls_count: int):
+        self.__interval = interval
+        self.__stall_threshold = stall_threshold
+        self.__stalls: collections.deque[LoopStall] = collections.deque(maxlen=max_stalls_count)
+        self.__lock = threading.Lock()
+        self.__last_beat_at = time.monotonic()
+        self.__captured_stack: traceback.StackSummary | None = None
+        self.__loop_thread_id: int | None = None
+        self.__heartbeat_task: asyncio.Task | None = None
+        self.__watchdog_thread: threading.Thread | None = None
+        self.__is_stopped = threading.Event()
+
+    @property
+    def stalls(self) -> list[LoopStall]:
+        return list(self.__stalls)
+
+    def start(self) -> None:
+        self.__loop_thread_id = threading.get_ident()
+        self.__last_beat_at = time.monotonic()
+        self.__heartbeat_task = asyncio.create_task(self.__beat())
+        self.__watchdog_thread = threading.Thread(target=self.__watch, name='loop-lag-watchdog', daemon=True)
+        self.__watchdog_thread.start()
+
+    async def stop(self) -> None:
+        self.__is_stopped.set()
+        if self.__heartbeat_task is not None:
+            self.__heartbeat_task.cancel()
+        if self.__watchdog_thread is not None:
+            await asyncio.to_thread(self.__watchdog_thread.join)
+
+    async def __beat(self) -> None:
+        while True:
+            await asyncio.sleep(self.__interval)
+            now = time.monotonic()
+            with self.__lock:
+                lag = max(0.0, now - self.__last_beat_at - self.__interval)
+                self.__last_beat_at = now
+                stack, self.__captured_stack = self.__captured_stack, None
+            metrics.EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.__stall_threshold:
+                self.__report_stall(lag, stack)
+
+    def __watch(self) -> None:
+        while not self.__is_stopped.wait(self.__interval):
+            with self.__lock:
+                blocked_for = time.monotonic() - self.__last_beat_at - self.__interval
+                if blocked_for < self.__stall_threshold or self.__captured_stack is not None:
+                    continue
+                frame = sys._current_frames().get(self.__loop_thread_id)
+                if frame is not None:
+                    self.__captured_stack = traceback.extract_stack(frame)
+
+    def __report_stall(self, lag: float, stack: traceback.StackSummary | None) -> None:
+        location = 'unknown' if stack is None else get_location(stack)
+        stall = LoopStall(
+            started_at=time.time() - lag,
+            duration=round(lag, 6),
+            location=location,
+            stack=[] if stack is None else stack.format(),
+        )
+        self.__stalls.append(stall)
+        metrics.EVENT_LOOP_STALLS.inc(location=location)
+        logger.warning(
+            'Event loop was blocked for %.3f seconds in %s\n%s',
+            lag, location, ''.join(stall.stack) or 'stack was not captured\n',
+        )
@@ -0,0 +1,236 @@
+from lxml import etree
+
+from models.external_api_responses.office_manager.accounting import StockBalance
+from models.external_api_responses.office_manager import StopSaleBySector, StopSaleByStreet
+from models.external_api_responses.shift_manager import OrderPartial, OrderByUUID
+from models.external_api_responses.export_service_api import UsedPromoCode
+from services import metrics, parsers
+
+__all__ = (
+    'LxmlHTMLParser',
+    'SectorStopSalesLxmlParser',
+    'StreetStopSalesLxmlParser',
+    'DeliveryStatisticsLxmlParser',
+    'KitchenStatisticsLxmlParser',
+    'StockBalanceLxmlParser',
+    'OrdersPartialLxmlParser',
+    'OrderByUUIDLxmlParser',
+    'UsedPromoCodesLxmlParser',
+)
+
+# upstream pages are always UTF-8, bytes are parsed without decoding them to str first
+BYTES_PARSER = etree.HTMLParser(encoding='utf-8')
+TEXT_PARSER = etree.HTMLParser()
+
+
+def compile_xpath(path: str) -> etree.XPath:
+    # plain strings instead of "smart" ones, which keep references to the whole tree
+    return etree.XPath(path, smart_strings=False)
+
+
+# same as .text of BeautifulSoup elements
+get_text = compile_xpath('string()')
+
+find_stop_sales_table = compile_xpath('(//table[@id="bootgrid-table"])[1]')
+find_first_tbody = compile_xpath('(.//tbody)[1]')
+find_last_tbody = compile_xpath('(//tbody)[last()]')
+find_first_table = compile_xpath('(//table)[1]')
+find_trs = compile_xpath('.//tr')
+find_tds = compile_xpath('.//td')
+find_first_link_href = compile_xpath('string((.//a)[1]/@href)')
+find_panel_titles = compile_xpath(
+    '//h1[contains(concat(" ", normalize-space(@class), " "), " operationalStatistics_panelTitle ")]'
+)
+find_order_number = compile_xpath('(//span[@id="orderNumber"])[1]')
+find_department = compile_xpath(
+    '(//div[contains(concat(" ", normalize-space(@class), " "), " headerDepartment ")])[1]'
+)
+find_history = compile_xpath('(//div[@id="history"])[1]')
+
+
+def get_first(elements: list[etree._Element], description: str) -> etree._Element:
+    if not elements:
+        raise ValueError(f'{description} is not found')
+    return elements[0]
+
+
+def get_row_texts(tr: etree._Element) -> list[str]:
+    return [get_text(td).strip() for td in find_tds(tr)]
+
+
+# Builds an lxml tree instead of a soup and reads only the needed nodes with precompiled XPath.
+# Parsers below come before LxmlHTMLParser in the MRO, so they keep constructors of the soup parsers
+# and `super().__init__(html)` builds the lxml tree.
+class LxmlHTMLParser(parsers.HTMLParser):
+
+    def __init__(self, html: str | bytes):
+        self._html = html
+        with metrics.PARSE_DURATION.time(parser=type(self).__name__, stage='build_tree'):
+            self._tree = etree.fromstring(html, BYTES_PARSER if isinstance(html, bytes) else TEXT_PARSER)
+
+
+class SectorStopSalesLxmlParser(parsers.SectorStopSalesHTMLParser, LxmlHTMLParser):
+
+    def parse(self) -> list[StopSaleBySector]:
+        table = get_first(find_stop_sales_table(self._tree), 'Stop sales table')
+        tbody = get_first(find_first_tbody(table), 'Stop sales table body')
+        return [
+            StopSaleBySector(
+                unit_name=tds[0],
+                sector=tds[1],
+                started_at=tds[2],
+                staff_name_who_stopped=tds[3],
+                staff_name_who_resumed=tds[5],
+            ) for tds in map(get_row_texts, find_trs(tbody))
+        ]
+
+
+class StreetStopSalesLxmlParser(parsers.StreetStopSalesHTMLParser, LxmlHTMLParser):
+
+    def parse(self) -> list[StopSaleByStreet]:
+        table = get_first(find_stop_sales_table(self._tree), 'Stop sales table')
+        return [
+            StopSaleByStreet(
+                unit_name=tds[0],
+                started_at=tds[3],
+                staff_name_who_stopped=tds[4],
+                staff_name_who_resumed=tds[6],
+                sector=tds[1],
+                street=tds[2],
+            ) for tds in map(get_row_texts, find_trs(table)[1:])
+        ]
+
+
+class DeliveryStatisticsLxmlParser(parsers.DeliveryStatisticsHTMLParser, LxmlHTMLParser):
+
+    def parse_panel_titles(self) -> list[str]:
+        return [self.clear_extra_symbols(get_text(h1)) for h1 in find_panel_titles(self._tree)]
+
+
+class KitchenStatisticsLxmlParser(parsers.KitchenStatisticsHTMLParser, LxmlHTMLParser):
+
+    def parse_panel_titles(self) -> list[str]:
+        return [self.clear_extra_symbols(get_text(h1)) for h1 in find_panel_titles(self._tree)]
+
+
+class StockBalanceLxmlParser(parsers.StockBalanceHTMLParser, LxmlHTMLParser):
+
+    def parse(self) -> list[StockBalance]:
+        tbody = get_first(find_first_tbody(self._tree), 'Stock balance table body')
+        result: list[StockBalance] = []
+        for tr in find_trs(tbody):
+            tds = get_row_texts(tr)
+            if len(tds) != 6:
+                continue
+            ingredient_name, stocks_count, _, _, _, days_left = tds
+            if not days_left.isdigit():
+                continue
+            *ingredient_name_parts, stocks_unit = ingredient_name.split(',')
+            ingredient_name = ','.join(ingredient_name_parts)
+            result.append(StockBalance(
+                unit_id=self.unit_id,
+                ingredient_name=ingredient_name,
+                days_left=days_left,
+                stocks_unit=stocks_unit.strip(),
+                stocks_count=stocks_count.strip().replace(',', '.').replace(' ', ''),
+            ))
+        return result
+
+
+class OrdersPartialLxmlParser(parsers.OrdersPartial, LxmlHTMLParser):
+
+    def parse(self) -> list[OrderPartial]:
+        nested_trs = [find_tds(tr) for tr in find_trs(self._tree)[1:]]
+        return [
+            OrderPartial(
+                uuid=find_first_link_href(tds[0]).split('=')[-1],
+                number=get_text(tds[1]).strip(),
+                price=get_text(tds[4]).strip('₽').strip(),
+                type=get_text(tds[7]),
+            ) for tds in nested_trs
+        ]
+
+
+class OrderByUUIDLxmlParser(parsers.OrderByUUIDParser, LxmlHTMLParser):
+
+    def parse(self) -> OrderByUUID:
+        order_no = get_text(get_first(find_order_number(self._tree), 'Order number'))
+        department = get_text(get_first(find_department(self._tree), 'Department'))
+
+        courier_name: str | None = None
+        for tr in find_trs(get_first(find_first_table(self._tree), 'Order table')):
+            tds = get_row_texts(tr)
+            if len(tds) != 2:
+                continue
+            field_name, field_value = tds
+            if field_name == 'Курьер:' and field_value:
+                courier_name = field_value
+                break
+
+        history = get_first(find_history(self._tree), 'Order history')
+        rows = [[get_text(td) for td in find_tds(tr)] for tr in find_trs(history)[1:]]
+        order_created_at = receipt_printed_at = order_canceled_at = None
+        is_receipt_printed = False
+        for _, msg, _ in rows:
+            if 'закрыт чек на возврат' in msg.lower().strip():
+                is_receipt_printed = True
+                break
+
+        rejected_by_user_name: str | None = None
+        for dt, msg, user_name in rows:
+            msg = msg.lower().strip()
+            if 'has been accepted' in msg:
+                order_created_at = dt
+            elif 'закрыт чек на возврат' in msg and is_receipt_printed:
+                receipt_printed_at = dt
+            elif 'has been rejected' in msg:
+                order_canceled_at = dt
+                if user_name.strip():
+                    rejected_by_user_name = user_name.strip()
+
+        return OrderByUUID(
+            number=order_no,
+            unit_name=department,
+            created_at=order_created_at,
+            canceled_at=order_canceled_at,
+            receipt_printed_at=receipt_printed_at,
+            uuid=self._order_uuid,
+            price=self._order_price,
+            type=self._order_type,
+            courier_name=courier_name,
+            rejected_by_user_name=rejected_by_user_name,
+        )
+
+
+class UsedPromoCodesLxmlParser(parsers.UsedPromoCodesHTMLParser, LxmlHTMLParser):
+
+    def parse(self) -> list[UsedPromoCode]:
+        table_body = get_first(find_last_tbody(self._tree), 'Used promo codes table body')
+        used_promo_codes: list[UsedPromoCode] = []
+        for table_row_data in map(get_row_texts, find_trs(table_body)):
+            (
+                promo_code,
+                event,
+                typical_description,
+                order_type,
+                order_status,
+                order_no,
+                ordered_at,
+                order_price,
+                *_,
+            ) = table_row_data
+
+            used_promo_codes.append(
+                UsedPromoCode(
+                    unit_id=self._unit_id,
+                    promo_code=promo_code,
+                    event=event,
+                    typical_description=typical_description,
+                    order_type=order_type,
+                    order_status=order_status,
+                    order_no=order_no,
+                    ordered_at=ordered_at,
+                    order_price=order_price,
+                )
+            )
+        return used_promo_codes
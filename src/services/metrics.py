@@ -0,0 +1,316 @@
+import bisect
+import contextlib
+import functools
+import math
+import re
+import threading
+import time
+from typing import Callable, Iterable, Iterator, ParamSpec, TypeVar
+
+import httpx
+
+from services import request_timing
+
+__all__ = (
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'registry',
+    'timed',
+    'get_path_template',
+    'HTTP_REQUEST_DURATION',
+    'HTTP_REQUESTS_IN_FLIGHT',
+    'UPSTREAM_REQUEST_DURATION',
+    'UPSTREAM_REQUESTS_IN_FLIGHT',
+    'PARSE_DURATION',
+    'REPORT_AGGREGATION_DURATION',
+    'OFFLOADED_JOB_DURATION',
+    'OFFLOADED_JOBS_IN_FLIGHT',
+    'PARSE_CACHE_LOOKUPS',
+    'REPORT_CACHE_LOOKUPS',
+    'STALE_RESPONSES',
+    'EVENT_LOOP_LAG',
+    'EVENT_LOOP_STALLS',
+)
+
+P = ParamSpec('P')
+T = TypeVar('T')
+
+# starlette appends the charset to text types
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+# upstream pages take from tens of milliseconds to minutes for bulk exports
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# parsing and aggregation are in-process, so they are expected to be much faster
+PROCESSING_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+# a healthy loop wakes up within a millisecond or two
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ID_SEGMENT_PATTERN = re.compile(r'^(\d+|[0-9a-fA-F]{32}|[0-9a-fA-F-]{36})$')
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def format_labels(label_names: Iterable[str], label_values: Iterable[str]) -> str:
+    labels = ','.join(f'{name}="{escape_label_value(value)}"' for name, value in zip(label_names, label_values))
+    return f'{{{labels}}}' if labels else ''
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    metric_type: str
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        # parsers may run in worker threads
+        self._lock = threading.Lock()
+
+    def _get_label_values(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if labels.keys() != set(self.label_names):
+            raise ValueError(f'{self.name} expects labels {self.label_names}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def collect(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.metric_type}'
+        yield from self._collect_samples()
+
+    def _collect_samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self.__values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._get_label_values(labels)
+        with self._lock:
+            self.__values[key] = self.__values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.__values.get(self._get_label_values(labels), 0)
+
+    def _collect_samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self.__values.items())
+        for label_values, value in values:
+            yield f'{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}'
+
+
+class Gauge(Metric):
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, label_names: Iterable[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self.__values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._get_label_values(labels)
+        with self._lock:
+            self.__values[key] = self.__values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._get_label_values(labels)
+        with self._lock:
+            self.__values[key] = value
+
+    def get(self, **labels: str) -> float:
+        return self.__values.get(self._get_label_values(labels), 0)
+
+    @contextlib.contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _collect_samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self.__values.items())
+        for label_values, value in values:
+            yield f'{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}'
+
+
+class Histogram(Metric):
+    metric_type = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            label_names: Iterable[str] = (),
+            buckets: Iterable[float] = LATENCY_BUCKETS,
+            request_stage: str | None = None,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # observations are also added to Server-Timing of the request being handled
+        self.__request_stage = request_stage
+        # per label values: count in every bucket, the last one is +Inf, and the sum
+        self.__counts: dict[tuple[str, ...], list[int]] = {}
+        self.__sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._get_label_values(labels)
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.__counts.get(key)
+            if counts is None:
+                counts = self.__counts[key] = [0] * (len(self.buckets) + 1)
+            counts[bucket_index] += 1
+            self.__sums[key] = self.__sums.get(key, 0) + value
+        if self.__request_stage is not None:
+            request_timing.add_duration(self.__request_stage, value, labels)
+
+    def get_count(self, **labels: str) -> int:
+        return sum(self.__counts.get(self._get_label_values(labels), ()))
+
+    @contextlib.contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def _collect_samples(self) -> Iterator[str]:
+        with self._lock:
+            series = [(key, list(counts), self.__sums[key]) for key, counts in self.__counts.items()]
+        label_names = (*self.label_names, 'le')
+        for label_values, counts, total in series:
+            cumulative_count = 0
+            for upper_bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative_count += count
+                labels = format_labels(label_names, (*label_values, format_value(upper_bound)))
+                yield f'{self.name}_bucket{labels} {cumulative_count}'
+            labels = format_labels(self.label_names, label_values)
+            yield f'{self.name}_sum{labels} {format_value(total)}'
+            yield f'{self.name}_count{labels} {cumulative_count}'
+
+
+M = TypeVar('M', bound=Metric)
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.__metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        if metric.name in self.__metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.__metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return ''.join(f'{line}\n' for metric in self.__metrics.values() for line in metric.collect())
+
+
+def timed(histogram: Histogram, **labels: str) -> Callable[[Callable[P, T]], Callable[P, T]]:
+
+    def decorator(function: Callable[P, T]) -> Callable[P, T]:
+
+        @functools.wraps(function)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            with histogram.time(**labels):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def get_path_template(url: str) -> str:
+    # unit IDs and UUIDs in paths would make a series per unit
+    path = httpx.URL(url).path
+    return '/'.join('{id}' if ID_SEGMENT_PATTERN.match(segment) else segment for segment in path.split('/'))
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    'http_request_duration_seconds',
+    'Time to respond to API requests.',
+    ('route', 'method', 'status'),
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    'http_requests_in_flight',
+    'API requests being handled.',
+    ('route',),
+))
+UPSTREAM_REQUEST_DURATION = registry.register(Histogram(
+    'upstream_request_duration_seconds',
+    'Time of every upstream request attempt, status is the error type when no response arrived.',
+    ('upstream', 'path', 'country_code', 'status'),
+))
+UPSTREAM_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    'upstream_requests_in_flight',
+    'Upstream requests waiting for a response.',
+    ('upstream', 'country_code'),
+))
+PARSE_DURATION = registry.register(Histogram(
+    'parse_duration_seconds',
+    'Time to parse upstream pages, building the document tree and extracting data separately, or streaming both.',
+    ('parser', 'stage'),
+    buckets=PROCESSING_BUCKETS,
+    request_stage='parse',
+))
+REPORT_AGGREGATION_DURATION = registry.register(Histogram(
+    'report_aggregation_duration_seconds',
+    'Time to calculate reports from parsed upstream data.',
+    ('report',),
+    buckets=PROCESSING_BUCKETS,
+    request_stage='aggregation',
+))
+OFFLOADED_JOB_DURATION = registry.register(Histogram(
+    'offloaded_job_duration_seconds',
+    'Time of parsing and aggregation jobs run in the worker pool, waiting for a free worker included.',
+    ('job', 'executor'),
+    buckets=PROCESSING_BUCKETS,
+))
+OFFLOADED_JOBS_IN_FLIGHT = registry.register(Gauge(
+    'offloaded_jobs_in_flight',
+    'Jobs running in the worker pool or queued for it.',
+    ('executor',),
+))
+PARSE_CACHE_LOOKUPS = registry.register(Counter(
+    'parse_cache_lookups_total',
+    'Lookups of parsed unit pages by parser and result, hit when the page has not changed.',
+    ('parser', 'result'),
+))
+REPORT_CACHE_LOOKUPS = registry.register(Counter(
+    'report_cache_lookups_total',
+    'Report cache lookups by result, hit or miss.',
+    ('namespace', 'result'),
+))
+STALE_RESPONSES = registry.register(Counter(
+    'stale_responses_total',
+    'Last good responses served instead of rejecting requests under overload, by report cache namespace.',
+    ('route', 'namespace'),
+))
+EVENT_LOOP_LAG = registry.register(Histogram(
+    'event_loop_lag_seconds',
+    'How late the event loop runs a scheduled callback.',
+    buckets=LOOP_LAG_BUCKETS,
+))
+EVENT_LOOP_STALLS = registry.register(Counter(
+    'event_loop_stalls_total',
+    'Event loop blocked longer than the stall threshold, by the code of this service that blocked it.',
+    ('location',),
+))
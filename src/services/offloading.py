@@ -0,0 +1,156 @@
+import asyncio
+import concurrent.futures
+import functools
+import importlib
+import logging
+import multiprocessing
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, TypeVar
+
+from services import metrics, request_timing
+
+__all__ = (
+    'OffloadExecutor',
+    'set_executor',
+    'run',
+    'parse',
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# imported by every worker before it takes jobs, so the first job of a worker is not slower than the rest
+WARM_UP_MODULES = (
+    'lxml.etree',
+    'bs4',
+    'openpyxl',
+    'pandas',
+    'services.parsers',
+    'services.lxml_parsers',
+    'services.domain.sales',
+)
+
+executor: 'OffloadExecutor | None' = None
+
+
+def warm_up() -> None:
+    for module_name in WARM_UP_MODULES:
+        importlib.import_module(module_name)
+
+
+def call_parser(parser_class: type, *args):
+    return parser_class(*args).parse()
+
+
+# Runs CPU-bound parsing and aggregation away from the event loop, in worker processes when possible.
+# Jobs and their arguments are pickled, so only jobs with compact inputs, like page bytes, are worth it.
+class OffloadExecutor:
+
+    def __init__(
+            self,
+            *,
+            workers_count: int,
+            max_queued_count: int,
+            is_process_pool_enabled: bool,
+            max_pool_restarts_count: int = 3,
+    ):
+        self.__workers_count = workers_count
+        # jobs over the limit wait in the loop, not pickled in the pool queue
+        self.__slots = asyncio.Semaphore(workers_count + max_queued_count)
+        self.__executor: concurrent.futures.Executor | None = None
+        self.__warm_up_futures: list[concurrent.futures.Future] = []
+        self.__kind = 'thread'
+        self.__is_process_pool_enabled = is_process_pool_enabled
+        self.__pool_restarts_left = max_pool_restarts_count
+
+    @property
+    def kind(self) -> str:
+        return self.__kind
+
+    def start(self) -> None:
+        if self.__is_process_pool_enabled:
+            try:
+                self.__start_process_pool()
+                return
+            except (OSError, NotImplementedError, BrokenProcessPool):
+                logger.warning('Process pool is not available, jobs are offloaded to threads', exc_info=True)
+        self.__start_thread_pool()
+
+    def __start_process_pool(self) -> None:
+        # spawned workers do not inherit threads and locks of the event loop process
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.__workers_count,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=warm_up,
+        )
+        # every submit without an idle worker starts one, so all workers start warming up right away
+        self.__warm_up_futures = [executor.submit(int) for _ in range(self.__workers_count)]
+        self.__executor = executor
+        self.__kind = 'process'
+
+    def __start_thread_pool(self) -> None:
+        self.__executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.__workers_count,
+            thread_name_prefix='offload',
+        )
+        self.__kind = 'thread'
+
+    async def wait_until_warm(self) -> None:
+        await asyncio.gather(*map(asyncio.wrap_future, self.__warm_up_futures), return_exceptions=True)
+
+    def shutdown(self) -> None:
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        async with self.__slots:
+            with metrics.OFFLOADED_JOBS_IN_FLIGHT.track_in_progress(executor=self.__kind):
+                executor = self.__executor
+                try:
+                    return await loop.run_in_executor(executor, functools.partial(function, *args))
+                except BrokenProcessPool:
+                    # a worker died, killed by OOM killer for example, maybe by this very job, so the job fails
+                    # instead of being run again in this process, and jobs of other requests get a new pool
+                    if executor is self.__executor:
+                        self.__restart_process_pool()
+                    raise
+
+    def __restart_process_pool(self) -> None:
+        self.shutdown()
+        if self.__pool_restarts_left > 0:
+            self.__pool_restarts_left -= 1
+            logger.error('Process pool is broken, it is started again')
+            try:
+                self.__start_process_pool()
+                return
+            except (OSError, NotImplementedError, BrokenProcessPool):
+                pass
+        logger.error('Process pool keeps breaking, jobs are offloaded to threads from now on')
+        self.__start_thread_pool()
+
+
+def set_executor(new_executor: OffloadExecutor | None) -> None:
+    global executor
+    executor = new_executor
+
+
+async def run(function: Callable[..., T], *args, stage: str = 'aggregation', job: str | None = None) -> T:
+    # without an executor, in tests and benchmarks, jobs run inline
+    if executor is None:
+        return function(*args)
+    job = job or function.__name__
+    started_at = time.perf_counter()
+    try:
+        return await executor.run(function, *args)
+    finally:
+        duration = time.perf_counter() - started_at
+        metrics.OFFLOADED_JOB_DURATION.observe(duration, job=job, executor=executor.kind)
+        # metrics of the job itself stay in the worker, the request sees the whole job as one stage
+        request_timing.add_duration(stage, duration, {'job': job})
+
+
+async def parse(parser_class: type, *args):
+    return await run(call_parser, parser_class, *args, stage='parse', job=parser_class.__name__)
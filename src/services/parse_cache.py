@@ -0,0 +1,62 @@
+import collections
+import hashlib
+from typing import Any, Hashable
+
+from services import metrics, offloading
+
+__all__ = (
+    'ParseCache',
+    'set_cache',
+    'parse',
+)
+
+cache: 'ParseCache | None' = None
+
+
+def get_digest(body: bytes) -> bytes:
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+# Unit pages polled every minute often come back byte for byte the same, so results of parsing them are kept
+# by the digest of the body. Parsed models are shared between requests, they must not be modified.
+class ParseCache:
+
+    def __init__(self, max_count: int):
+        self.__max_count = max_count
+        self.__results: collections.OrderedDict[Hashable, Any] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__results)
+
+    def get(self, key: Hashable) -> Any | None:
+        result = self.__results.get(key)
+        if result is not None:
+            self.__results.move_to_end(key)
+        return result
+
+    def set(self, key: Hashable, result: Any) -> None:
+        self.__results[key] = result
+        self.__results.move_to_end(key)
+        while len(self.__results) > self.__max_count:
+            self.__results.popitem(last=False)
+
+
+def set_cache(new_cache: ParseCache | None) -> None:
+    global cache
+    cache = new_cache
+
+
+async def parse(parser_class: type, body: bytes, unit_id: int | str):
+    if cache is None:
+        return await offloading.parse(parser_class, body, unit_id)
+    parser_name = parser_class.__name__
+    # unit ID is a part of parsed models, so the same page of two units gives different results
+    key = (parser_name, str(unit_id), get_digest(body))
+    result = cache.get(key)
+    if result is not None:
+        metrics.PARSE_CACHE_LOOKUPS.inc(parser=parser_name, result='hit')
+        return result
+    metrics.PARSE_CACHE_LOOKUPS.inc(parser=parser_name, result='miss')
+    result = await offloading.parse(parser_class, body, unit_id)
+    cache.set(key, result)
+    return result
@@ -1,8 +1,9 @@
+import functools
 import pathlib
 import unicodedata
 import uuid
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, BinaryIO
 
 import openpyxl
 from bs4 import BeautifulSoup
@@ -19,6 +20,7 @@ from models.external_api_responses.office_manager import (
 )
 from models.external_api_responses.shift_manager import OrderPartial, OrderByUUID
 from models.external_api_responses.export_service_api import UsedPromoCode
+from services import metrics
 
 __all__ = (
     'PartialStatisticsParser',
@@ -36,12 +38,39 @@ __all__ = (
     'UsedPromoCodesHTMLParser',
 )
 
+# removes spaces, currency and percent signs, and makes numbers parseable
+EXTRA_SYMBOLS_TRANSLATION = str.maketrans({
+    ' ': None,
+    '₽': None,
+    '%': None,
+    '\r': None,
+    '\t': None,
+    ',': '.',
+    '−': '-',
+})
+
+
+def time_extraction(parse):
+
+    @functools.wraps(parse)
+    def wrapper(self):
+        with metrics.PARSE_DURATION.time(parser=type(self).__name__, stage='extract'):
+            return parse(self)
+
+    return wrapper
+
 
 class HTMLParser(ABC):
 
     def __init__(self, html: str):
         self._html = html
-        self._soup = BeautifulSoup(html, 'lxml')
+        with metrics.PARSE_DURATION.time(parser=type(self).__name__, stage='build_tree'):
+            self._soup = BeautifulSoup(html, 'lxml')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'parse' in vars(cls):
+            cls.parse = time_extraction(cls.parse)
 
     @abstractmethod
     def parse(self) -> Any:
@@ -49,10 +78,7 @@ class HTMLParser(ABC):
 
     @staticmethod
     def clear_extra_symbols(text: str) -> str:
-        text = unicodedata.normalize('NFKD', text)
-        for i in (' ', '₽', '%', '\r', '\t'):
-            text = text.replace(i, '')
-        return text.strip().replace(',', '.').replace('−', '-')
+        return unicodedata.normalize('NFKD', text).translate(EXTRA_SYMBOLS_TRANSLATION).strip()
 
 
 class PartialStatisticsParser(HTMLParser):
@@ -238,10 +264,16 @@ class OrderByUUIDParser(HTMLParser):
 
 class ExcelParser(ABC):
 
-    def __init__(self, file_path: str | pathlib.Path):
-        self._wb: Workbook = openpyxl.load_workbook(file_path, read_only=True)
+    def __init__(self, file: str | pathlib.Path | BinaryIO):
+        with metrics.PARSE_DURATION.time(parser=type(self).__name__, stage='build_tree'):
+            self._wb: Workbook = openpyxl.load_workbook(file, read_only=True)
         self._ws: Worksheet = self._wb.active
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'parse' in vars(cls):
+            cls.parse = time_extraction(cls.parse)
+
     def __enter__(self):
         return self
 
@@ -274,7 +306,7 @@ class UsedPromoCodesHTMLParser(HTMLParser):
 
     def __init__(self, html: str, unit_id: int):
         super().__init__(html)
-        self.__unit_id = unit_id
+        self._unit_id = unit_id
 
     def parse(self) -> Any:
         table_body = self._soup.find_all('tbody')[-1]
@@ -298,7 +330,7 @@ class UsedPromoCodesHTMLParser(HTMLParser):
 
             used_promo_codes.append(
                 UsedPromoCode(
-                    unit_id=self.__unit_id,
+                    unit_id=self._unit_id,
                     promo_code=promo_code,
                     event=event,
                     typical_description=typical_description,
@@ -0,0 +1,110 @@
+import asyncio
+import collections
+import contextvars
+import enum
+from typing import Awaitable, Callable, TypeVar
+
+__all__ = (
+    'Priority',
+    'set_priority',
+    'get_priority',
+    'PriorityScheduler',
+)
+
+T = TypeVar('T')
+
+
+class Priority(enum.Enum):
+    INTERACTIVE = 'interactive'
+    BULK = 'bulk'
+
+
+priority_var: contextvars.ContextVar[Priority] = contextvars.ContextVar('priority', default=Priority.INTERACTIVE)
+
+
+def set_priority(priority: Priority) -> None:
+    priority_var.set(priority)
+
+
+def get_priority() -> Priority:
+    return priority_var.get()
+
+
+# Upstream calls of all clients share `max_concurrency` slots.
+# Bulk calls never take the slots reserved for interactive ones and yield to every queued interactive call.
+class PriorityScheduler:
+
+    def __init__(self, *, max_concurrency: int, reserved_for_interactive: int):
+        self.__max_concurrency = max_concurrency
+        self.__bulk_max_concurrency = max(1, max_concurrency - reserved_for_interactive)
+        self.__in_flight = 0
+        self.__bulk_in_flight = 0
+        self.__waiters: dict[Priority, collections.deque[asyncio.Future]] = {
+            priority: collections.deque() for priority in Priority
+        }
+
+    @property
+    def in_flight(self) -> int:
+        return self.__in_flight
+
+    @property
+    def bulk_in_flight(self) -> int:
+        return self.__bulk_in_flight
+
+    def get_queued(self, priority: Priority) -> int:
+        return sum(not waiter.done() for waiter in self.__waiters[priority])
+
+    async def call(self, send: Callable[[], Awaitable[T]]) -> T:
+        priority = get_priority()
+        await self.__acquire(priority)
+        try:
+            return await send()
+        finally:
+            self.__release(priority)
+
+    def __can_start(self, priority: Priority) -> bool:
+        if self.__in_flight >= self.__max_concurrency:
+            return False
+        if priority is Priority.INTERACTIVE:
+            return True
+        return self.__bulk_in_flight < self.__bulk_max_concurrency and not self.get_queued(Priority.INTERACTIVE)
+
+    def __start(self, priority: Priority) -> None:
+        self.__in_flight += 1
+        if priority is Priority.BULK:
+            self.__bulk_in_flight += 1
+
+    async def __acquire(self, priority: Priority) -> None:
+        if self.__can_start(priority) and not self.get_queued(priority):
+            self.__start(priority)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters[priority].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # the slot could have been handed over right before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.__release(priority)
+            raise
+
+    def __release(self, priority: Priority) -> None:
+        self.__in_flight -= 1
+        if priority is Priority.BULK:
+            self.__bulk_in_flight -= 1
+        self.__wake_up_waiters()
+
+    def __wake_up_waiters(self) -> None:
+        for priority in Priority:
+            waiters = self.__waiters[priority]
+            while waiters and self.__can_start_waiter(priority):
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue
+                self.__start(priority)
+                waiter.set_result(None)
+
+    def __can_start_waiter(self, priority: Priority) -> bool:
+        if self.__in_flight >= self.__max_concurrency:
+            return False
+        return priority is Priority.INTERACTIVE or self.__bulk_in_flight < self.__bulk_max_concurrency
@@ -0,0 +1,160 @@
+import asyncio
+import collections
+import contextlib
+import pathlib
+import sys
+import threading
+import time
+import types
+import weakref
+from typing import Iterator
+
+__all__ = (
+    'SamplingProfiler',
+    'track_route',
+    'render_folded_stacks',
+)
+
+SOURCE_ROOT = pathlib.Path(__file__).resolve().parent.parent
+# tasks of API requests, and tasks they spawn while a profile is taken, by route
+task_routes: weakref.WeakKeyDictionary[asyncio.Task, str] = weakref.WeakKeyDictionary()
+
+
+@contextlib.contextmanager
+def track_route(route: str) -> Iterator[None]:
+    task = asyncio.current_task()
+    if task is not None:
+        task_routes[task] = route
+    try:
+        yield
+    finally:
+        if task is not None:
+            task_routes.pop(task, None)
+
+
+def get_task_route(task: asyncio.Task | None) -> str | None:
+    return None if task is None else task_routes.get(task)
+
+
+def format_code(code: types.CodeType) -> str:
+    path = pathlib.Path(code.co_filename)
+    if path.is_relative_to(SOURCE_ROOT):
+        path_name = path.relative_to(SOURCE_ROOT).as_posix()
+    elif 'site-packages' in path.parts:
+        path_name = '/'.join(path.parts[path.parts.index('site-packages') + 1:])
+    else:
+        path_name = path.name
+    # qualified names of code objects appeared in Python 3.11
+    name = getattr(code, 'co_qualname', code.co_name)
+    # semicolons separate frames in folded stacks
+    return f'{name} ({path_name}:{code.co_firstlineno})'.replace(';', ',')
+
+
+def get_thread_stack(frame: types.FrameType | None) -> list[str]:
+    stack = []
+    while frame is not None:
+        stack.append(format_code(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def get_task_stack(task: asyncio.Task) -> list[str]:
+    # follows the chain of awaited coroutines down to the future the task is waiting for
+    stack = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        code = getattr(awaitable, 'cr_code', None) or getattr(awaitable, 'gi_code', None)
+        if code is None:
+            stack.append(type(awaitable).__name__)
+            break
+        stack.append(format_code(code))
+        awaitable = getattr(awaitable, 'cr_await', None) or getattr(awaitable, 'gi_yieldfrom', None)
+    return stack
+
+
+def render_folded_stacks(samples: collections.Counter[tuple[str, ...]]) -> str:
+    # the format of flamegraph.pl and speedscope: frames from the root separated by semicolons, then the count
+    return ''.join(f'{";".join(stack)} {count}\n' for stack, count in sorted(samples.items()))
+
+
+# Samples stacks of every thread from a separate thread, that is what runs on CPU or blocks,
+# and stacks of asyncio tasks waiting for something from the event loop, that is where requests spend time.
+# Every stack starts with the route of the request it belongs to.
+class SamplingProfiler:
+
+    def __init__(self, *, interval: float, is_awaiting_included: bool):
+        self.__interval = interval
+        self.__is_awaiting_included = is_awaiting_included
+        self.__samples: collections.Counter[tuple[str, ...]] = collections.Counter()
+        self.__lock = threading.Lock()
+
+    async def run(self, duration: float) -> collections.Counter[tuple[str, ...]]:
+        loop = asyncio.get_running_loop()
+        loop_thread_id = threading.get_ident()
+        previous_task_factory = loop.get_task_factory()
+        loop.set_task_factory(self.__get_task_factory(previous_task_factory))
+        is_stopped = threading.Event()
+        sampler_thread = threading.Thread(
+            target=self.__sample_threads,
+            args=(loop, loop_thread_id, is_stopped),
+            name='sampling-profiler',
+            daemon=True,
+        )
+        sampler_thread.start()
+        try:
+            finishes_at = time.monotonic() + duration
+            while time.monotonic() < finishes_at:
+                await asyncio.sleep(self.__interval)
+                if self.__is_awaiting_included:
+                    self.__sample_tasks()
+        finally:
+            is_stopped.set()
+            loop.set_task_factory(previous_task_factory)
+            await asyncio.to_thread(sampler_thread.join)
+        return self.__samples
+
+    @staticmethod
+    def __get_task_factory(previous_task_factory):
+
+        def create_task(loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+            if previous_task_factory is None:
+                task = asyncio.Task(coro, loop=loop, **kwargs)
+            else:
+                task = previous_task_factory(loop, coro, **kwargs)
+            # tasks spawned by a request, like calls to upstream units in parallel, inherit its route
+            route = get_task_route(asyncio.current_task(loop))
+            if route is not None:
+                task_routes[task] = route
+            return task
+
+        return create_task
+
+    def __add_sample(self, stack: tuple[str, ...]) -> None:
+        with self.__lock:
+            self.__samples[stack] += 1
+
+    def __sample_threads(
+            self,
+            loop: asyncio.AbstractEventLoop,
+            loop_thread_id: int,
+            is_stopped: threading.Event,
+    ) -> None:
+        sampler_thread_id = threading.get_ident()
+        while not is_stopped.wait(self.__interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_thread_id:
+                    continue
+                route = None
+                if thread_id == loop_thread_id:
+                    route = get_task_route(asyncio.current_task(loop))
+                thread_name = thread_names.get(thread_id, str(thread_id))
+                self.__add_sample((route or 'no route', f'thread {thread_name}', *get_thread_stack(frame)))
+
+    def __sample_tasks(self) -> None:
+        current_task = asyncio.current_task()
+        for task in asyncio.all_tasks():
+            if task is current_task:
+                continue
+            self.__add_sample((get_task_route(task) or 'no route', 'awaiting', *get_task_stack(task)))
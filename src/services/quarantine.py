@@ -0,0 +1,129 @@
+import asyncio
+import collections
+import contextvars
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Hashable
+
+import httpx
+
+from core import exceptions
+from services import priorities
+from services.resilience import GATEWAY_ERROR_STATUS_CODES
+
+__all__ = ('UnitQuarantine',)
+
+# answers of an overloaded or restarting upstream say nothing about the unit itself
+def is_unit_failure(response: httpx.Response) -> bool:
+    return response.is_error and response.status_code not in GATEWAY_ERROR_STATUS_CODES
+
+
+@dataclass(slots=True)
+class Probe:
+    task: asyncio.Task
+    # the latest caller's send, so probes go with credentials still in use, not those of the first caller
+    send: Callable[[], Awaitable[httpx.Response]]
+    last_called_at: float
+
+
+# Negative cache of units that keep failing on a resource: after `failure_threshold` consecutive failures
+# the unit is skipped by live requests for that resource, and a background probe retries it
+# with exponentially growing windows, up to `max_window`, until the unit recovers.
+# A probe gives up after `max_probe_attempts` or once nobody has asked for the unit for `idle_timeout`,
+# then live requests check the unit again. At most `max_probes_count` units are quarantined at once.
+class UnitQuarantine:
+
+    def __init__(
+            self,
+            *,
+            failure_threshold: int,
+            base_window: float,
+            max_window: float,
+            max_probe_attempts: int,
+            idle_timeout: float,
+            max_probes_count: int,
+            max_tracked_count: int,
+    ):
+        self.__failure_threshold = failure_threshold
+        self.__base_window = base_window
+        self.__max_window = max_window
+        self.__max_probe_attempts = max_probe_attempts
+        self.__idle_timeout = idle_timeout
+        self.__max_probes_count = max_probes_count
+        self.__max_tracked_count = max_tracked_count
+        # units with failures below the threshold, least recently failed first
+        self.__failures_counts: collections.OrderedDict[Hashable, int] = collections.OrderedDict()
+        self.__probes: dict[Hashable, Probe] = {}
+
+    @property
+    def quarantined_count(self) -> int:
+        return len(self.__probes)
+
+    @property
+    def tracked_count(self) -> int:
+        return len(self.__failures_counts)
+
+    def is_quarantined(self, scope: str, resource: str, unit_id: int | str) -> bool:
+        return (scope, resource, str(unit_id)) in self.__probes
+
+    async def call(
+            self,
+            *,
+            scope: str,
+            resource: str,
+            unit_id: int | str,
+            send: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        # a unit failing on one page may be fine on the others, the probe only re-checks the failed one
+        key = (scope, resource, str(unit_id))
+        probe = self.__probes.get(key)
+        if probe is not None:
+            probe.send = send
+            probe.last_called_at = time.monotonic()
+            raise exceptions.UnitIDAPIError(unit_id=unit_id)
+        response = await send()
+        if not is_unit_failure(response):
+            self.__failures_counts.pop(key, None)
+            return response
+        failures_count = self.__failures_counts.pop(key, 0) + 1
+        if failures_count < self.__failure_threshold or len(self.__probes) >= self.__max_probes_count:
+            self.__failures_counts[key] = failures_count
+            while len(self.__failures_counts) > self.__max_tracked_count:
+                self.__failures_counts.popitem(last=False)
+        else:
+            self.__quarantine(key, send)
+        return response
+
+    def __quarantine(self, key: Hashable, send: Callable[[], Awaitable[httpx.Response]]) -> None:
+        # the probe must not inherit the deadline and other request-scoped state of the caller
+        task = contextvars.Context().run(asyncio.ensure_future, self.__probe(key))
+        self.__probes[key] = Probe(task=task, send=send, last_called_at=time.monotonic())
+        task.add_done_callback(lambda done_task: self.__forget(key, done_task))
+
+    async def __probe(self, key: Hashable) -> None:
+        priorities.set_priority(priorities.Priority.BULK)
+        window = self.__base_window
+        for _ in range(self.__max_probe_attempts):
+            await asyncio.sleep(window)
+            probe = self.__probes[key]
+            if time.monotonic() - probe.last_called_at > self.__idle_timeout:
+                return
+            try:
+                response = await probe.send()
+            except Exception:
+                pass
+            else:
+                if not is_unit_failure(response):
+                    return
+            window = min(self.__max_window, window * 2)
+
+    def __forget(self, key: Hashable, task: asyncio.Task) -> None:
+        probe = self.__probes.get(key)
+        if probe is not None and probe.task is task:
+            del self.__probes[key]
+
+    async def close(self) -> None:
+        tasks = [probe.task for probe in self.__probes.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
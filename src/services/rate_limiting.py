@@ -0,0 +1,231 @@
+import asyncio
+import collections
+import time
+from dataclasses import dataclass
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from core import exceptions
+
+__all__ = (
+    'TokenBucketState',
+    'TokenBucket',
+    'RedisTokenBucket',
+    'RateLimiterRegistry',
+)
+
+# tokens go below zero for reservations of queued callers, so waiting is FIFO across all processes
+RESERVE_TOKEN_SCRIPT = '''
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * rate) - 1
+local wait = 0
+if tokens < 0 then
+    wait = -tokens / rate
+    if wait > max_wait then
+        return {0, tostring(wait)}
+    end
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity / rate + max_wait) * 1000))
+return {1, tostring(wait)}
+'''
+
+
+@dataclass(frozen=True, slots=True)
+class TokenBucketState:
+    key: str
+    tokens: float
+    capacity: int
+    rate: float
+    waiting: int
+
+
+class TokenBucket:
+
+    def __init__(self, *, key: str, rate: float, capacity: int, max_wait: float):
+        self.__key = key
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__max_wait = max_wait
+        self.__tokens = float(capacity)
+        self.__updated_at = time.monotonic()
+        self.__waiting = 0
+
+    def __refill(self) -> None:
+        now = time.monotonic()
+        self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated_at) * self.__rate)
+        self.__updated_at = now
+
+    @property
+    def is_idle(self) -> bool:
+        # a bucket that is not full yet would give its session a fresh burst when created again
+        self.__refill()
+        return self.__waiting == 0 and self.__tokens >= self.__capacity
+
+    async def acquire(self) -> None:
+        self.__refill()
+        self.__tokens -= 1
+        if self.__tokens >= 0:
+            return
+        wait = -self.__tokens / self.__rate
+        if wait > self.__max_wait:
+            self.__tokens += 1
+            raise exceptions.RateLimitExceeded(retry_after=wait)
+        self.__waiting += 1
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            self.__tokens += 1
+            raise
+        finally:
+            self.__waiting -= 1
+
+    async def get_state(self) -> TokenBucketState:
+        self.__refill()
+        return TokenBucketState(
+            key=self.__key,
+            tokens=self.__tokens,
+            capacity=self.__capacity,
+            rate=self.__rate,
+            waiting=self.__waiting,
+        )
+
+
+# shares the quota of a token or session between all processes of the service
+class RedisTokenBucket:
+
+    def __init__(
+            self,
+            *,
+            key: str,
+            rate: float,
+            capacity: int,
+            max_wait: float,
+            redis: aioredis.Redis,
+            key_prefix: str,
+    ):
+        self.__key = key
+        self.__redis_key = f'{key_prefix}:{key}'
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__max_wait = max_wait
+        self.__redis = redis
+        self.__reserve_token = redis.register_script(RESERVE_TOKEN_SCRIPT)
+        self.__waiting = 0
+
+    @property
+    def is_idle(self) -> bool:
+        # tokens are kept in Redis, the bucket is only a handle to them
+        return self.__waiting == 0
+
+    async def acquire(self) -> None:
+        try:
+            is_reserved, wait = await self.__reserve_token(
+                keys=[self.__redis_key],
+                args=[self.__rate, self.__capacity, self.__max_wait],
+            )
+        except RedisError:
+            # rate limiting must not take the service down together with Redis
+            return
+        wait = float(wait)
+        if not int(is_reserved):
+            raise exceptions.RateLimitExceeded(retry_after=wait)
+        if wait == 0:
+            return
+        self.__waiting += 1
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            self.__waiting -= 1
+
+    async def get_state(self) -> TokenBucketState:
+        try:
+            tokens, updated_at = await self.__redis.hmget(self.__redis_key, 'tokens', 'updated_at')
+            redis_time_seconds, redis_time_microseconds = await self.__redis.time()
+        except RedisError:
+            tokens = updated_at = None
+        if tokens is None or updated_at is None:
+            tokens = self.__capacity
+        else:
+            now = redis_time_seconds + redis_time_microseconds / 1_000_000
+            tokens = min(self.__capacity, float(tokens) + (now - float(updated_at)) * self.__rate)
+        return TokenBucketState(
+            key=self.__key,
+            tokens=tokens,
+            capacity=self.__capacity,
+            rate=self.__rate,
+            waiting=self.__waiting,
+        )
+
+
+# Buckets are kept per session, sessions come and go, so buckets unused for `idle_timeout` are dropped.
+class RateLimiterRegistry:
+
+    def __init__(
+            self,
+            *,
+            rate: float,
+            capacity: int,
+            max_wait: float,
+            redis: aioredis.Redis | None = None,
+            key_prefix: str = 'rate-limit',
+            idle_timeout: float = 600,
+    ):
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__max_wait = max_wait
+        self.__redis = redis
+        self.__key_prefix = key_prefix
+        self.__idle_timeout = idle_timeout
+        # least recently used first
+        self.__buckets: collections.OrderedDict[str, TokenBucket | RedisTokenBucket] = collections.OrderedDict()
+        self.__used_at: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.__buckets)
+
+    def get(self, key: str) -> TokenBucket | RedisTokenBucket:
+        now = time.monotonic()
+        self.__evict_idle(now)
+        bucket = self.__buckets.get(key)
+        if bucket is None:
+            if self.__redis is None:
+                bucket = TokenBucket(
+                    key=key,
+                    rate=self.__rate,
+                    capacity=self.__capacity,
+                    max_wait=self.__max_wait,
+                )
+            else:
+                bucket = RedisTokenBucket(
+                    key=key,
+                    rate=self.__rate,
+                    capacity=self.__capacity,
+                    max_wait=self.__max_wait,
+                    redis=self.__redis,
+                    key_prefix=self.__key_prefix,
+                )
+            self.__buckets[key] = bucket
+        self.__buckets.move_to_end(key)
+        self.__used_at[key] = now
+        return bucket
+
+    def __evict_idle(self, now: float) -> None:
+        for key in list(self.__buckets):
+            if now - self.__used_at[key] < self.__idle_timeout:
+                break
+            if self.__buckets[key].is_idle:
+                del self.__buckets[key]
+                del self.__used_at[key]
+
+    async def get_states(self) -> list[TokenBucketState]:
+        self.__evict_idle(time.monotonic())
+        return list(await asyncio.gather(*(bucket.get_state() for bucket in self.__buckets.values())))
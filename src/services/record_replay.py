@@ -0,0 +1,183 @@
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import pathlib
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import IO, Awaitable, Callable, Iterable, TypeVar
+
+import httpx
+
+__all__ = (
+    'RecordedExchange',
+    'read_cassette',
+    'RecordingTransport',
+    'ReplayTransport',
+    'replay_arrivals',
+    'reissue',
+)
+
+T = TypeVar('T')
+
+# credentials are never written to a cassette
+SCRUBBED_RESPONSE_HEADERS = frozenset({'set-cookie', 'authorization', 'cookie'})
+# reports are requested for "today", so dates are ignored when a recorded exchange is looked up
+DATE_PATTERN = re.compile(rb'\d{4}-\d{2}-\d{2}(T\d{2}(:|%3A)\d{2}(:|%3A)\d{2})?|\d{2}\.\d{2}\.\d{4}')
+
+
+@dataclass(frozen=True, slots=True)
+class RecordedExchange:
+    key: str
+    method: str
+    url: str
+    # seconds since recording started and upstream response time
+    started_at: float
+    elapsed: float
+    status_code: int
+    headers: list[tuple[str, str]]
+    # raw, still compressed by upstream if it was
+    content: bytes
+    # form data of report filters, credentials are sent in headers
+    request_content: bytes = b''
+
+
+def build_exchange_key(request: httpx.Request) -> str:
+    # host, path, query and body without dates, headers are ignored so credentials don't matter
+    url = httpx.URL(scheme=request.url.scheme, host=request.url.host, path=request.url.path)
+    parts = (
+        request.method.encode(),
+        str(url).encode(),
+        DATE_PATTERN.sub(b'<date>', request.url.query),
+        DATE_PATTERN.sub(b'<date>', request.content),
+    )
+    return hashlib.sha256(b'\n'.join(parts)).hexdigest()
+
+
+def scrub_url(url: httpx.URL) -> str:
+    return str(url.copy_with(username=None, password=None))
+
+
+def write_exchange(file: IO[bytes], exchange: RecordedExchange) -> None:
+    line = asdict(exchange) | {
+        'content': base64.b64encode(exchange.content).decode(),
+        'request_content': base64.b64encode(exchange.request_content).decode(),
+    }
+    file.write(json.dumps(line, ensure_ascii=False).encode() + b'\n')
+
+
+def read_cassette(path: pathlib.Path) -> list[RecordedExchange]:
+    with gzip.open(path, 'rb') as file:
+        return [
+            RecordedExchange(**(
+                    line
+                    | {'headers': [tuple(header) for header in line['headers']]}
+                    | {'content': base64.b64decode(line['content'])}
+                    | {'request_content': base64.b64decode(line.get('request_content', ''))}
+            ))
+            for line in map(json.loads, file)
+        ]
+
+
+# cassette is gzipped JSON lines, one exchange per line, written as responses arrive
+class RecordingTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, path: pathlib.Path):
+        self.__transport = transport
+        self.__file = gzip.open(path, 'wb')
+        # compression and writes stay off the event loop, one thread keeps exchanges whole and in order
+        self.__writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='cassette')
+        self.__started_at = time.monotonic()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        started_at = time.monotonic()
+        response = await self.__transport.handle_async_request(request)
+        try:
+            content = b''.join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        elapsed = time.monotonic() - started_at
+        headers = [
+            (key, value) for key, value in response.headers.multi_items()
+            if key.lower() not in SCRUBBED_RESPONSE_HEADERS
+        ]
+        if not self.__file.closed:
+            exchange = RecordedExchange(
+                key=build_exchange_key(request),
+                method=request.method,
+                url=scrub_url(request.url),
+                started_at=round(started_at - self.__started_at, 3),
+                elapsed=round(elapsed, 3),
+                status_code=response.status_code,
+                headers=headers,
+                content=content,
+                request_content=request.content,
+            )
+            await asyncio.get_running_loop().run_in_executor(self.__writer, write_exchange, self.__file, exchange)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=content,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        # every pooled client closes the shared transport
+        if not self.__file.closed:
+            await asyncio.get_running_loop().run_in_executor(self.__writer, self.__file.close)
+            self.__writer.shutdown(wait=False)
+            await self.__transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, exchanges: Iterable[RecordedExchange], *, latency_scale: float = 1):
+        self.__latency_scale = latency_scale
+        self.__exchanges: dict[str, collections.deque[RecordedExchange]] = collections.defaultdict(collections.deque)
+        for exchange in exchanges:
+            self.__exchanges[exchange.key].append(exchange)
+
+    @classmethod
+    def from_cassette(cls, path: pathlib.Path, *, latency_scale: float = 1) -> 'ReplayTransport':
+        return cls(read_cassette(path), latency_scale=latency_scale)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        exchanges = self.__exchanges.get(build_exchange_key(request))
+        if not exchanges:
+            raise httpx.ConnectError(f'No recorded exchange for {request.method} {scrub_url(request.url)}', request=request)
+        # repeated requests get recorded responses in order, then from the beginning again
+        exchange = exchanges[0]
+        exchanges.rotate(-1)
+        await asyncio.sleep(exchange.elapsed * self.__latency_scale)
+        return httpx.Response(
+            status_code=exchange.status_code,
+            headers=exchange.headers,
+            content=exchange.content,
+        )
+
+
+# ReplayTransport reproduces upstream response times only, a recorded peak is reproduced by reissuing
+# its requests at their recorded arrival times, `time_scale` of 0.5 replays it twice as fast
+async def replay_arrivals(
+        exchanges: Iterable[RecordedExchange],
+        send: Callable[[RecordedExchange], Awaitable[T]],
+        *,
+        time_scale: float = 1,
+) -> list[T | BaseException]:
+    loop = asyncio.get_running_loop()
+    replay_started_at = loop.time()
+    tasks = []
+    for exchange in sorted(exchanges, key=lambda exchange: exchange.started_at):
+        await asyncio.sleep(max(0.0, replay_started_at + exchange.started_at * time_scale - loop.time()))
+        tasks.append(asyncio.ensure_future(send(exchange)))
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def reissue(client: httpx.AsyncClient, exchange: RecordedExchange) -> httpx.Response:
+    return await client.request(exchange.method, exchange.url, content=exchange.request_content or None)
@@ -0,0 +1,183 @@
+import collections
+import contextvars
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+__all__ = (
+    'UpstreamCall',
+    'TraceEvent',
+    'RequestTiming',
+    'RequestTraces',
+    'request_timing_var',
+    'add_duration',
+    'add_upstream_call',
+)
+
+# stages in the order they are reported
+STAGES = ('upstream', 'cache', 'parse', 'aggregation', 'serialization')
+
+
+@dataclass(frozen=True, slots=True)
+class UpstreamCall:
+    method: str
+    url: str
+    status: str
+    # seconds since the request started
+    started_at: float
+    duration: float
+    bytes_downloaded: int
+
+
+@dataclass(frozen=True, slots=True)
+class TraceEvent:
+    stage: str
+    details: dict[str, str]
+    started_at: float
+    duration: float
+
+
+def get_union_duration(intervals: list[tuple[float, float]]) -> float:
+    # concurrent upstream calls overlap, only the time the request actually waited counts
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+@dataclass(slots=True)
+class RequestTiming:
+    method: str
+    path: str
+    is_tracing: bool = False
+    request_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: float = field(default_factory=time.perf_counter)
+    endpoint_finished_at: float | None = None
+    durations: collections.Counter[str] = field(default_factory=collections.Counter)
+    upstream_calls: list[UpstreamCall] = field(default_factory=list)
+    events: list[TraceEvent] = field(default_factory=list)
+    # parsing may run in worker threads of the same request
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_duration(self, stage: str, duration: float, details: dict[str, str]) -> None:
+        with self.lock:
+            self.durations[stage] += duration
+            if self.is_tracing:
+                started_at = time.perf_counter() - duration - self.started_at
+                self.events.append(TraceEvent(stage, details, round(started_at, 6), round(duration, 6)))
+
+    def add_upstream_call(self, call: UpstreamCall) -> None:
+        with self.lock:
+            self.upstream_calls.append(call)
+
+    def get_durations(self, now: float) -> dict[str, float]:
+        durations = dict(self.durations)
+        if self.upstream_calls:
+            durations['upstream'] = get_union_duration([
+                (call.started_at, call.started_at + call.duration) for call in self.upstream_calls
+            ])
+        if self.endpoint_finished_at is not None:
+            durations['serialization'] = now - self.endpoint_finished_at
+        return durations
+
+    def build_server_timing(self, now: float) -> str:
+        durations = self.get_durations(now)
+        entries = []
+        for stage in STAGES:
+            if stage not in durations:
+                continue
+            metric = f'{stage};dur={durations[stage] * 1000:.1f}'
+            if stage == 'upstream':
+                bytes_downloaded = sum(call.bytes_downloaded for call in self.upstream_calls)
+                metric += f';desc="{len(self.upstream_calls)} calls, {bytes_downloaded} bytes"'
+            entries.append(metric)
+        entries.append(f'total;dur={(now - self.started_at) * 1000:.1f}')
+        return ', '.join(entries)
+
+    def build_trace(self, now: float, status_code: int) -> dict:
+        return {
+            'request_id': self.request_id,
+            'method': self.method,
+            'path': self.path,
+            'status_code': status_code,
+            'duration': round(now - self.started_at, 6),
+            'stages': {stage: round(duration, 6) for stage, duration in self.get_durations(now).items()},
+            'upstream_calls': [
+                {
+                    'method': call.method,
+                    'url': call.url,
+                    'status': call.status,
+                    'started_at': round(call.started_at, 6),
+                    'duration': round(call.duration, 6),
+                    'bytes_downloaded': call.bytes_downloaded,
+                } for call in sorted(self.upstream_calls, key=lambda call: call.started_at)
+            ],
+            'events': [
+                {
+                    'stage': event.stage,
+                    'details': event.details,
+                    'started_at': event.started_at,
+                    'duration': event.duration,
+                } for event in sorted(self.events, key=lambda event: event.started_at)
+            ],
+        }
+
+
+# recent request traces, kept in debug mode only
+class RequestTraces:
+
+    def __init__(self, max_count: int):
+        self.__traces: collections.OrderedDict[str, dict] = collections.OrderedDict()
+        self.__max_count = max_count
+
+    def add(self, trace: dict) -> None:
+        self.__traces[trace['request_id']] = trace
+        while len(self.__traces) > self.__max_count:
+            self.__traces.popitem(last=False)
+
+    def get(self, request_id: str) -> dict | None:
+        return self.__traces.get(request_id)
+
+    def get_all(self) -> list[dict]:
+        return list(reversed(self.__traces.values()))
+
+
+request_timing_var: contextvars.ContextVar[RequestTiming | None] = contextvars.ContextVar(
+    'request_timing', default=None,
+)
+
+
+def add_duration(stage: str, duration: float, details: dict[str, str] | None = None) -> None:
+    timing = request_timing_var.get()
+    if timing is not None:
+        timing.add_duration(stage, duration, details or {})
+
+
+def add_upstream_call(
+        *,
+        method: str,
+        url: str,
+        status: str,
+        started_at: float,
+        duration: float,
+        bytes_downloaded: int,
+) -> None:
+    timing = request_timing_var.get()
+    if timing is not None:
+        timing.add_upstream_call(UpstreamCall(
+            method=method,
+            url=url,
+            status=status,
+            started_at=started_at - timing.started_at,
+            duration=duration,
+            bytes_downloaded=bytes_downloaded,
+        ))
@@ -0,0 +1,96 @@
+import enum
+import random
+import time
+from dataclasses import dataclass
+
+__all__ = (
+    'RetryPolicy',
+    'CircuitBreakerState',
+    'CircuitBreaker',
+    'CircuitBreakerRegistry',
+)
+
+# answers of an overloaded or restarting upstream, other errors come from the upstream application itself
+GATEWAY_ERROR_STATUS_CODES = frozenset({502, 503, 504})
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    max_attempts: int
+    backoff_base: float
+    backoff_cap: float
+    idempotent_methods: frozenset[str] = frozenset({'GET', 'HEAD', 'OPTIONS'})
+    retryable_status_codes: frozenset[int] = GATEWAY_ERROR_STATUS_CODES
+
+    def can_retry(self, method: str, attempt: int) -> bool:
+        return method.upper() in self.idempotent_methods and attempt + 1 < self.max_attempts
+
+    def get_delay(self, attempt: int) -> float:
+        # "full jitter" spreads retries of concurrent callers instead of synchronizing them
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+
+class CircuitBreakerState(enum.Enum):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+
+    def __init__(self, *, failure_threshold: int, reset_timeout: float):
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout = reset_timeout
+        self.__state = CircuitBreakerState.CLOSED
+        self.__consecutive_failures_count = 0
+        self.__opened_at = 0.0
+        self.__is_trial_call_in_flight = False
+
+    @property
+    def state(self) -> CircuitBreakerState:
+        return self.__state
+
+    def allow_request(self) -> bool:
+        if self.__state is CircuitBreakerState.OPEN:
+            if time.monotonic() - self.__opened_at < self.__reset_timeout:
+                return False
+            self.__state = CircuitBreakerState.HALF_OPEN
+        if self.__state is CircuitBreakerState.HALF_OPEN:
+            # only one trial call probes a recovering upstream
+            if self.__is_trial_call_in_flight:
+                return False
+            self.__is_trial_call_in_flight = True
+        return True
+
+    def on_success(self) -> None:
+        self.__state = CircuitBreakerState.CLOSED
+        self.__consecutive_failures_count = 0
+        self.__is_trial_call_in_flight = False
+
+    def on_abandoned(self) -> None:
+        # a cancelled call says nothing about upstream health, but must not hold the trial slot
+        self.__is_trial_call_in_flight = False
+
+    def on_failure(self) -> None:
+        self.__consecutive_failures_count += 1
+        self.__is_trial_call_in_flight = False
+        if (self.__state is CircuitBreakerState.HALF_OPEN
+                or self.__consecutive_failures_count >= self.__failure_threshold):
+            self.__state = CircuitBreakerState.OPEN
+            self.__opened_at = time.monotonic()
+
+
+class CircuitBreakerRegistry:
+
+    def __init__(self, *, failure_threshold: int, reset_timeout: float):
+        self.__failure_threshold = failure_threshold
+        self.__reset_timeout = reset_timeout
+        self.__circuit_breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        if key not in self.__circuit_breakers:
+            self.__circuit_breakers[key] = CircuitBreaker(
+                failure_threshold=self.__failure_threshold,
+                reset_timeout=self.__reset_timeout,
+            )
+        return self.__circuit_breakers[key]
@@ -0,0 +1,32 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+__all__ = ('SingleFlight',)
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+
+    def __init__(self):
+        self.__calls: dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.__calls)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        future = self.__calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self.__calls[key] = future
+            future.add_done_callback(lambda done_future: self.__forget(key, done_future))
+        # shielded, so a cancelled caller does not cancel the call shared with others
+        return await asyncio.shield(future)
+
+    def __forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self.__calls.get(key) is future:
+            del self.__calls[key]
+        # mark the exception as retrieved when every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,237 @@
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterable, Generic, Iterator, TypeVar
+
+import pandas as pd
+from lxml import etree
+from pandas.io.parsers import TextParser
+
+from models.external_api_responses.office_manager import StopSaleBySector, StopSaleByStreet
+from models.external_api_responses.export_service_api import UsedPromoCode
+from services import metrics
+from services.lxml_parsers import get_row_texts, get_text
+
+__all__ = (
+    'StreamingTableParser',
+    'SectorStopSalesStreamingParser',
+    'StreetStopSalesStreamingParser',
+    'UsedPromoCodesStreamingParser',
+    'RestaurantOrdersStreamingParser',
+    'parse_stream',
+)
+
+T = TypeVar('T')
+
+# line breaks and runs of spaces in cell texts, `pd.read_html` turns each into a single space
+WHITESPACE_PATTERN = re.compile(r'[\r\n]+|\s{2,}')
+
+
+def free_element(element: etree._Element) -> None:
+    # drops the element's content and everything before it, ancestors stay as empty shells
+    if any(ancestor.tag == 'tr' for ancestor in element.iterancestors()):
+        # a row of a nested table is a part of the outer row text
+        return
+    element.clear(keep_tail=True)
+    for ancestor in element.iterancestors():
+        while ancestor.getprevious() is not None:
+            del ancestor.getparent()[0]
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
+
+# Same output as the tree parsers, but the page is fed chunk by chunk to an incremental lxml parser.
+# Rows are turned into models as soon as they end and freed right away, so memory is spent on models only,
+# not on the page text or its tree.
+class StreamingTableParser(ABC, Generic[T]):
+
+    def __init__(self):
+        # upstream pages are always UTF-8
+        self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding='utf-8')
+
+    def feed(self, chunk: bytes) -> Iterator[T]:
+        self._parser.feed(chunk)
+        yield from self.__read_events()
+
+    def close(self) -> Iterator[T]:
+        self._parser.close()
+        yield from self.__read_events()
+        yield from self._finish()
+
+    def __read_events(self) -> Iterator[T]:
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._on_start(element)
+            elif element.tag == 'tr':
+                if self._is_data_row(element):
+                    row = self._build_row(self._get_row_texts(element))
+                    if row is not None:
+                        yield row
+                free_element(element)
+
+    def _on_start(self, element: etree._Element) -> None:
+        pass
+
+    @abstractmethod
+    def _is_data_row(self, tr: etree._Element) -> bool:
+        pass
+
+    def _get_row_texts(self, tr: etree._Element) -> list[str]:
+        return get_row_texts(tr)
+
+    @abstractmethod
+    def _build_row(self, tds: list[str]) -> T | None:
+        pass
+
+    def _finish(self) -> Iterator[T]:
+        yield from ()
+
+
+class StopSalesStreamingParser(StreamingTableParser[T], ABC):
+
+    def __init__(self):
+        super().__init__()
+        self._table: etree._Element | None = None
+        self._tbody: etree._Element | None = None
+        self._table_rows_count = 0
+
+    def _on_start(self, element: etree._Element) -> None:
+        if self._table is None and element.tag == 'table' and element.get('id') == 'bootgrid-table':
+            self._table = element
+        elif self._tbody is None and element.tag == 'tbody' and self._is_in_table(element):
+            self._tbody = element
+
+    def _is_in_table(self, element: etree._Element) -> bool:
+        return self._table is not None and any(ancestor is self._table for ancestor in element.iterancestors())
+
+
+class SectorStopSalesStreamingParser(StopSalesStreamingParser[StopSaleBySector]):
+
+    def _is_data_row(self, tr: etree._Element) -> bool:
+        return self._tbody is not None and any(ancestor is self._tbody for ancestor in tr.iterancestors())
+
+    def _build_row(self, tds: list[str]) -> StopSaleBySector:
+        return StopSaleBySector(
+            unit_name=tds[0],
+            sector=tds[1],
+            started_at=tds[2],
+            staff_name_who_stopped=tds[3],
+            staff_name_who_resumed=tds[5],
+        )
+
+
+class StreetStopSalesStreamingParser(StopSalesStreamingParser[StopSaleByStreet]):
+
+    def _is_data_row(self, tr: etree._Element) -> bool:
+        if not self._is_in_table(tr):
+            return False
+        self._table_rows_count += 1
+        # the first one is the header
+        return self._table_rows_count > 1
+
+    def _build_row(self, tds: list[str]) -> StopSaleByStreet:
+        return StopSaleByStreet(
+            unit_name=tds[0],
+            started_at=tds[3],
+            staff_name_who_stopped=tds[4],
+            staff_name_who_resumed=tds[6],
+            sector=tds[1],
+            street=tds[2],
+        )
+
+
+class UsedPromoCodesStreamingParser(StreamingTableParser[UsedPromoCode]):
+    # promo codes are in the last table body, the rows of a body are kept until the next one starts or the page ends
+
+    def __init__(self, unit_id: int):
+        super().__init__()
+        self._unit_id = unit_id
+        self._tbody: etree._Element | None = None
+        self._used_promo_codes: list[UsedPromoCode] = []
+
+    def _on_start(self, element: etree._Element) -> None:
+        if element.tag == 'tbody':
+            self._tbody = element
+            self._used_promo_codes = []
+
+    def _is_data_row(self, tr: etree._Element) -> bool:
+        return self._tbody is not None and any(ancestor is self._tbody for ancestor in tr.iterancestors())
+
+    def _build_row(self, tds: list[str]) -> None:
+        (
+            promo_code,
+            event,
+            typical_description,
+            order_type,
+            order_status,
+            order_no,
+            ordered_at,
+            order_price,
+            *_,
+        ) = tds
+        self._used_promo_codes.append(
+            UsedPromoCode(
+                unit_id=self._unit_id,
+                promo_code=promo_code,
+                event=event,
+                typical_description=typical_description,
+                order_type=order_type,
+                order_status=order_status,
+                order_no=order_no,
+                ordered_at=ordered_at,
+                order_price=order_price,
+            )
+        )
+        return None
+
+    def _finish(self) -> Iterator[UsedPromoCode]:
+        yield from self._used_promo_codes
+
+
+class RestaurantOrdersStreamingParser(StreamingTableParser[list[str]]):
+    # rows of the first table as cell texts, turned into the same data frame as `pd.read_html` gives
+
+    def __init__(self):
+        super().__init__()
+        self._table: etree._Element | None = None
+        self._header: list[str] = []
+
+    def _on_start(self, element: etree._Element) -> None:
+        if self._table is None and element.tag == 'table':
+            self._table = element
+
+    def _is_data_row(self, tr: etree._Element) -> bool:
+        if self._table is None or not any(ancestor is self._table for ancestor in tr.iterancestors()):
+            return False
+        if any(ancestor.tag == 'thead' for ancestor in tr.iterancestors()):
+            self._header = self._get_row_texts(tr)
+            return False
+        return True
+
+    def _get_row_texts(self, tr: etree._Element) -> list[str]:
+        # like `pd.read_html`: spanned cells are repeated, whitespace is collapsed
+        texts = []
+        for cell in tr.iterchildren('td', 'th'):
+            texts += [WHITESPACE_PATTERN.sub(' ', get_text(cell).strip())] * int(cell.get('colspan', 1))
+        return texts
+
+    def _build_row(self, tds: list[str]) -> list[str]:
+        return tds
+
+    def build_data_frame(self, rows: list[list[str]]) -> pd.DataFrame:
+        return TextParser([self._header, *rows], header=0, thousands=',').read()
+
+
+async def parse_stream(parser: StreamingTableParser[T], chunks: AsyncIterable[bytes]) -> list[T]:
+    rows: list[T] = []
+    # waiting for chunks is upstream time, only parsing is counted
+    parse_duration = 0.0
+    async for chunk in chunks:
+        started_at = time.perf_counter()
+        rows += parser.feed(chunk)
+        parse_duration += time.perf_counter() - started_at
+    started_at = time.perf_counter()
+    rows += parser.close()
+    parse_duration += time.perf_counter() - started_at
+    metrics.PARSE_DURATION.observe(parse_duration, parser=type(parser).__name__, stage='stream')
+    return rows
@@ -0,0 +1,5 @@
+from simulator.config import *
+from simulator.transport import *
+from simulator.upstream import *
+
+app = SimulatorASGIApp(UpstreamSimulator())
@@ -0,0 +1,42 @@
+import math
+import random
+from dataclasses import dataclass, field
+
+__all__ = (
+    'LatencyDistribution',
+    'SimulatorConfig',
+)
+
+
+@dataclass(frozen=True, slots=True)
+class LatencyDistribution:
+    # log-normal, so most responses are close to the median and a few are much slower, like real upstreams
+    median: float
+    sigma: float = 0.5
+    max_latency: float = 30
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0
+        return min(self.max_latency, rng.lognormvariate(math.log(self.median), self.sigma))
+
+
+@dataclass(frozen=True, slots=True)
+class SimulatorConfig:
+    seed: int = 0
+    latency: LatencyDistribution = LatencyDistribution(median=0)
+    # per-route overrides, keyed by route names of `UpstreamSimulator`
+    route_latencies: dict[str, LatencyDistribution] = field(default_factory=dict)
+    # share of calls answered with 503, which clients are expected to retry
+    error_rate: float = 0
+    # share of units that always answer with 500, like closed or misconfigured units
+    failing_unit_ratio: float = 0
+    orders_per_unit: int = 50
+    stop_sales_per_unit: int = 3
+    vouchers_per_unit: int = 5
+    stock_items_per_unit: int = 40
+    used_promo_codes_per_unit: int = 20
+    canceled_orders_count: int = 30
+    canceled_orders_page_size: int = 50
+    # menus, scripts and other markup around the data, real pages are tens of kilobytes
+    layout_elements_count: int = 300
@@ -0,0 +1,533 @@
+import datetime
+import io
+import random
+import uuid
+from typing import Any, Iterable
+
+import openpyxl
+
+from services.periods import get_moscow_now
+
+__all__ = (
+    'get_rng',
+    'get_unit_name',
+    'get_unit_uuid',
+    'generate_productivity_statistics',
+    'generate_delivery_statistics',
+    'generate_stop_sales_by_sales_channels',
+    'generate_stop_sales_by_ingredients',
+    'generate_orders_handover_time',
+    'generate_late_delivery_vouchers',
+    'generate_operational_statistics',
+    'render_page',
+    'render_delivery_partial_statistics_page',
+    'render_kitchen_partial_statistics_page',
+    'render_stock_balance_page',
+    'render_stop_sales_by_sectors_page',
+    'render_stop_sales_by_streets_page',
+    'render_used_promo_codes_page',
+    'RESTAURANT_ORDERS_HEADERS',
+    'generate_restaurant_orders',
+    'render_restaurant_orders_page',
+    'render_partial_orders_page',
+    'render_order_page',
+    'generate_delivery_statistics_excel',
+)
+
+CITIES = ('Москва', 'Калуга', 'Вязьма', 'Смоленск', 'Тула', 'Обнинск', 'Брянск', 'Орёл')
+INGREDIENTS = (
+    ('Тесто 30 см', 'шт'),
+    ('Моцарелла', 'кг'),
+    ('Пепперони', 'кг'),
+    ('Томатный соус', 'л'),
+    ('Шампиньоны', 'кг'),
+    ('Коробка для пиццы 30 см', 'шт'),
+    ('Ветчина, нарезка', 'кг'),
+)
+SECTORS = ('Центр', 'Север', 'Юг', 'Запад', 'Восток')
+STREETS = ('Ленина', 'Гагарина', 'Мира', 'Советская', 'Садовая')
+PEOPLE = ('Иванов Иван', 'Петрова Анна', 'Сидоров Пётр', 'Кузнецова Мария', 'Смирнов Олег')
+STOP_SALE_REASONS = ('Нет курьеров', 'Высокая загрузка', 'Технические неполадки')
+ORDER_TYPES = ('Доставка', 'Самовывоз', 'Ресторан')
+
+
+def get_rng(seed: int, *keys: Any) -> random.Random:
+    # the same seed and keys always produce the same data, regardless of the order of calls
+    return random.Random(':'.join(map(str, (seed, *keys))))
+
+
+def get_unit_name(unit_key: int | str | uuid.UUID) -> str:
+    rng = get_rng(0, 'unit-name', unit_key)
+    return f'{rng.choice(CITIES)}-{rng.randint(1, 9)}'
+
+
+def get_unit_uuid(unit_id: int) -> uuid.UUID:
+    return uuid.UUID(int=get_rng(0, 'unit-uuid', unit_id).getrandbits(128))
+
+
+def format_datetime(value: datetime.datetime) -> str:
+    return value.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def random_moment(rng: random.Random, day: datetime.date) -> datetime.datetime:
+    # working hours of the day, but never later than now, the service compares moments of today with its own clock
+    started_at = datetime.datetime.combine(day, datetime.time(9))
+    ended_at = min(started_at + datetime.timedelta(hours=13), get_moscow_now().replace(microsecond=0))
+    if ended_at < started_at:
+        started_at = min(datetime.datetime.combine(day, datetime.time()), ended_at)
+    return started_at + datetime.timedelta(seconds=rng.randint(0, int((ended_at - started_at).total_seconds())))
+
+
+def generate_productivity_statistics(seed: int, unit_uuids: Iterable[uuid.UUID]) -> list[dict]:
+    statistics = []
+    for unit_uuid in unit_uuids:
+        rng = get_rng(seed, 'productivity', unit_uuid)
+        labor_hours = rng.randint(20, 200)
+        sales = rng.randint(20_000, 400_000)
+        statistics.append({
+            'unitId': unit_uuid.hex,
+            'unitName': get_unit_name(unit_uuid),
+            'laborHours': labor_hours,
+            'sales': sales,
+            'salesPerLaborHour': round(sales / labor_hours, 2),
+            'productsPerLaborHour': round(rng.uniform(1, 8), 2),
+            'avgHeatedShelfTime': rng.randint(30, 600),
+            'ordersPerCourierLabourHour': round(rng.uniform(0.5, 4), 2),
+            'kitchenSpeedPercentage': round(rng.uniform(50, 100), 2),
+        })
+    return statistics
+
+
+def generate_delivery_statistics(seed: int, unit_uuids: Iterable[uuid.UUID], day: datetime.date) -> list[dict]:
+    statistics = []
+    for unit_uuid in unit_uuids:
+        rng = get_rng(seed, 'delivery-statistics', unit_uuid, day)
+        delivery_orders_count = rng.randint(0, 400)
+        trips_count = rng.randint(delivery_orders_count // 3, max(delivery_orders_count, 1))
+        statistics.append({
+            'unitId': unit_uuid.hex,
+            'unitName': get_unit_name(unit_uuid),
+            'avgCookingTime': rng.randint(300, 1200),
+            'avgDeliveryOrderFulfillmentTime': rng.randint(1200, 3600),
+            'avgHeatedShelfTime': rng.randint(30, 600),
+            'avgOrderTripTime': rng.randint(300, 1800),
+            'couriersShiftsDuration': rng.randint(0, 100) * 3600,
+            'deliveryOrdersCount': delivery_orders_count,
+            'deliverySales': delivery_orders_count * rng.randint(600, 1500),
+            'lateOrdersCount': rng.randint(0, delivery_orders_count // 10 + 1),
+            'ordersWithCourierAppCount': delivery_orders_count,
+            'tripsCount': trips_count,
+            'tripsDuration': trips_count * rng.randint(900, 2400),
+        })
+    return statistics
+
+
+def generate_stop_sales(
+        seed: int,
+        kind: str,
+        unit_uuids: Iterable[uuid.UUID],
+        day: datetime.date,
+        stop_sales_per_unit: int,
+) -> Iterable[tuple[random.Random, dict]]:
+    for unit_uuid in unit_uuids:
+        rng = get_rng(seed, kind, unit_uuid, day)
+        for _ in range(stop_sales_per_unit):
+            started_at = random_moment(rng, day)
+            is_resumed = rng.random() < 0.8
+            ended_at = started_at + datetime.timedelta(seconds=rng.randint(60, 7200)) if is_resumed else None
+            # stop sales that would be resumed later are still going on
+            if ended_at is not None and ended_at > get_moscow_now():
+                is_resumed = False
+                ended_at = None
+            yield rng, {
+                'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                'unitId': unit_uuid.hex,
+                'unitName': get_unit_name(unit_uuid),
+                'reason': rng.choice(STOP_SALE_REASONS),
+                'startedAt': format_datetime(started_at),
+                'endedAt': format_datetime(ended_at) if ended_at is not None else None,
+                'stoppedByUserId': str(uuid.UUID(int=rng.getrandbits(128))),
+                'resumedByUserId': str(uuid.UUID(int=rng.getrandbits(128))) if is_resumed else None,
+            }
+
+
+def generate_stop_sales_by_sales_channels(
+        seed: int,
+        unit_uuids: Iterable[uuid.UUID],
+        day: datetime.date,
+        stop_sales_per_unit: int,
+) -> list[dict]:
+    return [
+        stop_sale | {
+            'salesChannelName': rng.choice(('Dine-in', 'Takeaway', 'Delivery')),
+            'channelStopType': rng.choice(('Complete', 'Redirection')),
+        } for rng, stop_sale in generate_stop_sales(seed, 'channels', unit_uuids, day, stop_sales_per_unit)
+    ]
+
+
+def generate_stop_sales_by_ingredients(
+        seed: int,
+        unit_uuids: Iterable[uuid.UUID],
+        day: datetime.date,
+        stop_sales_per_unit: int,
+) -> list[dict]:
+    return [
+        stop_sale | {'ingredientName': rng.choice(INGREDIENTS)[0]}
+        for rng, stop_sale in generate_stop_sales(seed, 'ingredients', unit_uuids, day, stop_sales_per_unit)
+    ]
+
+
+def generate_orders_handover_time(
+        seed: int,
+        unit_uuids: Iterable[uuid.UUID],
+        day: datetime.date,
+        orders_per_unit: int,
+) -> list[dict]:
+    orders = []
+    for unit_uuid in unit_uuids:
+        rng = get_rng(seed, 'orders-handover-time', unit_uuid, day)
+        for order_index in range(orders_per_unit):
+            orders.append({
+                'unitId': unit_uuid.hex,
+                'unitName': get_unit_name(unit_uuid),
+                'orderId': str(uuid.UUID(int=rng.getrandbits(128))),
+                'orderNumber': f'{order_index + 1}-{rng.randint(1, 9)}',
+                'salesChannel': rng.choice(('Dine-in', 'Takeaway', 'Delivery')),
+                'orderTrackingStartAt': format_datetime(random_moment(rng, day)),
+                'trackingPendingTime': rng.randint(0, 300),
+                'cookingTime': rng.randint(120, 1200),
+                'heatedShelfTime': rng.randint(0, 600),
+            })
+    return orders
+
+
+def generate_late_delivery_vouchers(
+        seed: int,
+        unit_uuids: Iterable[uuid.UUID],
+        day: datetime.date,
+        vouchers_per_unit: int,
+) -> list[dict]:
+    vouchers = []
+    for unit_uuid in unit_uuids:
+        rng = get_rng(seed, 'vouchers', unit_uuid, day)
+        for _ in range(rng.randint(0, vouchers_per_unit * 2)):
+            accepted_at = random_moment(rng, day)
+            is_fulfilled = rng.random() < 0.9
+            vouchers.append({
+                'orderId': str(uuid.UUID(int=rng.getrandbits(128))),
+                'orderNumber': f'{rng.randint(1, 999)}-{rng.randint(1, 9)}',
+                'orderAcceptedAtLocal': format_datetime(accepted_at),
+                'unitId': unit_uuid.hex,
+                'predictedDeliveryTimeLocal': format_datetime(accepted_at + datetime.timedelta(minutes=40)),
+                'orderFulfilmentFlagAtLocal': (
+                    format_datetime(min(
+                        accepted_at + datetime.timedelta(minutes=rng.randint(61, 120)),
+                        get_moscow_now().replace(microsecond=0),
+                    )) if is_fulfilled else None
+                ),
+                'deliveryDeadlineLocal': format_datetime(accepted_at + datetime.timedelta(minutes=60)),
+                'issuerName': rng.choice(('System', 'ContactCenter', None)),
+                'courierStaffId': str(uuid.UUID(int=rng.getrandbits(128))) if is_fulfilled else None,
+            })
+    return vouchers
+
+
+def generate_operational_statistics(seed: int, unit_id: int, now: datetime.datetime) -> dict:
+    rng = get_rng(seed, 'operational-statistics', unit_id, now.date())
+
+    def statistics() -> dict:
+        stationary_order_count = rng.randint(0, 300)
+        delivery_order_count = rng.randint(0, 300)
+        stationary_revenue = stationary_order_count * rng.randint(400, 900)
+        delivery_revenue = delivery_order_count * rng.randint(600, 1500)
+        order_count = stationary_order_count + delivery_order_count
+        revenue = stationary_revenue + delivery_revenue
+        return {
+            'stationaryRevenue': stationary_revenue,
+            'stationaryOrderCount': stationary_order_count,
+            'deliveryRevenue': delivery_revenue,
+            'deliveryOrderCount': delivery_order_count,
+            'revenue': revenue,
+            'orderCount': order_count,
+            'avgCheck': round(revenue / order_count, 2) if order_count else 0,
+        }
+
+    return {
+        'unitId': unit_id,
+        'date': format_datetime(now),
+        'today': statistics(),
+        'weekBefore': statistics(),
+        'yesterdayToThisTime': statistics(),
+        'yesterday': statistics(),
+        'weekBeforeToThisTime': statistics(),
+    }
+
+
+def render_page(title: str, content: str, layout_elements_count: int) -> str:
+    menu = ''.join(
+        f'<li class="menu-item"><a href="/Menu/Item/{index}" data-index="{index}">Пункт меню {index}</a></li>'
+        for index in range(layout_elements_count)
+    )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{title}</title>'
+        '<link href="/Content/bootstrap.css" rel="stylesheet">'
+        '<script src="/Scripts/jquery.js" type="text/javascript"></script>'
+        '</head><body>'
+        f'<nav class="navbar"><ul class="menu">{menu}</ul></nav>'
+        f'<div class="container">{content}</div>'
+        '</body></html>'
+    )
+
+
+def render_panels(titles: Iterable[str]) -> str:
+    return ''.join(
+        f'<div class="operationalStatistics_panel"><h1 class="operationalStatistics_panelTitle">{title}</h1></div>'
+        for title in titles
+    )
+
+
+def render_table(headers: Iterable[str], rows: Iterable[Iterable[Any]], table_id: str | None = None) -> str:
+    id_attribute = f' id="{table_id}"' if table_id is not None else ''
+    thead = ''.join(f'<th>{header}</th>' for header in headers)
+    tbody = ''.join('<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>' for row in rows)
+    return f'<table class="table"{id_attribute}><thead><tr>{thead}</tr></thead><tbody>{tbody}</tbody></table>'
+
+
+def render_delivery_partial_statistics_page(seed: int, unit_id: int, layout_elements_count: int) -> str:
+    rng = get_rng(seed, 'delivery-partial', unit_id)
+    couriers_on_shift_count = rng.randint(0, 30)
+    titles = (
+        f'{rng.randint(0, 200)}',
+        f'{rng.randint(0, 60)} мин',
+        f'{rng.randint(0, 40)}',
+        f'{couriers_on_shift_count} / {rng.randint(0, couriers_on_shift_count)}',
+    )
+    return render_page('Доставка', render_panels(titles), layout_elements_count)
+
+
+def render_kitchen_partial_statistics_page(seed: int, unit_id: int, layout_elements_count: int) -> str:
+    rng = get_rng(seed, 'kitchen-partial', unit_id)
+    titles = (
+        f'{rng.randint(1000, 9999):,} ₽\n{rng.randint(-50, 50)} %'.replace(',', ' ').replace('-', '−'),
+        f'{rng.randint(0, 100)}',
+        f'{rng.randint(0, 100)}',
+        f'{rng.randint(5, 30):02}:{rng.randint(0, 59):02}',
+    )
+    return render_page('Кухня', render_panels(titles), layout_elements_count)
+
+
+def render_stock_balance_page(seed: int, unit_id: int, stock_items_count: int, layout_elements_count: int) -> str:
+    rng = get_rng(seed, 'stock-balance', unit_id)
+    rows = []
+    for index in range(stock_items_count):
+        name, measurement_unit = INGREDIENTS[index % len(INGREDIENTS)]
+        stocks_count = f'{rng.uniform(0, 2000):,.2f}'.replace(',', ' ').replace('.', ',')
+        rows.append((
+            f'{name} {index}, {measurement_unit}',
+            stocks_count,
+            f'{rng.uniform(0, 100):.2f}',
+            f'{rng.uniform(0, 100):.2f}',
+            f'{rng.uniform(0, 100):.2f}',
+            rng.randint(0, 30),
+        ))
+    headers = ('Ингредиент', 'Остаток', 'Расход в день', 'Расход в неделю', 'Средний расход', 'Дней хватит')
+    return render_page('Остатки', render_table(headers, rows), layout_elements_count)
+
+
+def render_stop_sales_by_sectors_page(
+        seed: int,
+        unit_ids: Iterable[int],
+        day: datetime.date,
+        stop_sales_per_unit: int,
+        layout_elements_count: int,
+) -> str:
+    rows = []
+    for unit_id in unit_ids:
+        rng = get_rng(seed, 'sector-stop-sales', unit_id, day)
+        for _ in range(stop_sales_per_unit):
+            started_at = random_moment(rng, day)
+            is_resumed = rng.random() < 0.8
+            rows.append((
+                get_unit_name(unit_id),
+                rng.choice(SECTORS),
+                started_at.strftime('%d.%m.%Y %H:%M'),
+                rng.choice(PEOPLE),
+                f'{rng.randint(1, 120)} мин',
+                rng.choice(PEOPLE) if is_resumed else '',
+            ))
+    headers = ('Пиццерия', 'Сектор', 'Начало', 'Остановил', 'Длительность', 'Возобновил')
+    return render_page('Стопы по секторам', render_table(headers, rows, 'bootgrid-table'), layout_elements_count)
+
+
+def render_stop_sales_by_streets_page(
+        seed: int,
+        unit_ids: Iterable[int],
+        day: datetime.date,
+        stop_sales_per_unit: int,
+        layout_elements_count: int,
+) -> str:
+    rows = []
+    for unit_id in unit_ids:
+        rng = get_rng(seed, 'street-stop-sales', unit_id, day)
+        for _ in range(stop_sales_per_unit):
+            started_at = random_moment(rng, day)
+            is_resumed = rng.random() < 0.8
+            rows.append((
+                get_unit_name(unit_id),
+                rng.choice(SECTORS),
+                rng.choice(STREETS),
+                started_at.strftime('%d.%m.%Y %H:%M:%S'),
+                rng.choice(PEOPLE),
+                f'{rng.randint(1, 120)} мин',
+                rng.choice(PEOPLE) if is_resumed else '',
+            ))
+    headers = ('Пиццерия', 'Сектор', 'Улица', 'Начало', 'Остановил', 'Длительность', 'Возобновил')
+    return render_page('Стопы по улицам', render_table(headers, rows, 'bootgrid-table'), layout_elements_count)
+
+
+def render_used_promo_codes_page(
+        seed: int,
+        unit_id: int,
+        day: datetime.date,
+        used_promo_codes_count: int,
+        layout_elements_count: int,
+) -> str:
+    rng = get_rng(seed, 'used-promo-codes', unit_id, day)
+    rows = [
+        (
+            f'PROMO{rng.randint(100, 999)}',
+            'Акция',
+            'Скидка 20% на пиццу',
+            rng.choice(ORDER_TYPES),
+            'Выполнен',
+            f'{rng.randint(1, 999)}-{rng.randint(1, 9)}',
+            random_moment(rng, day).strftime('%d.%m.%Y %H:%M:%S'),
+            f'{rng.randint(300, 3000)},00',
+            get_unit_name(unit_id),
+        ) for _ in range(used_promo_codes_count)
+    ]
+    headers = (
+        'Промокод', 'Акция', 'Описание', 'Тип заказа', 'Статус', 'Номер', 'Дата', 'Сумма', 'Пиццерия',
+    )
+    return render_page('Промокоды', render_table(headers, rows), layout_elements_count)
+
+
+RESTAURANT_ORDERS_HEADERS = ('Отдел', 'Дата и время', '№ заказа', '№ телефона', 'Сумма')
+
+
+def generate_restaurant_orders(
+        seed: int,
+        unit_ids: Iterable[int],
+        day: datetime.date,
+        orders_per_unit: int,
+) -> list[tuple]:
+    rows = []
+    for unit_id in unit_ids:
+        rng = get_rng(seed, 'restaurant-orders', unit_id, day)
+        # a few phone numbers repeat a lot, like in cheated orders
+        phone_numbers = [f'79{rng.randint(100_000_000, 999_999_999)}' for _ in range(max(1, orders_per_unit // 3))]
+        for order_index in range(orders_per_unit):
+            rows.append((
+                get_unit_name(unit_id),
+                random_moment(rng, day).strftime('%d.%m.%Y %H:%M'),
+                f'{order_index + 1}-{rng.randint(1, 9)}',
+                rng.choice(phone_numbers) if rng.random() < 0.7 else '',
+                rng.randint(300, 3000),
+            ))
+    return rows
+
+
+def render_restaurant_orders_page(
+        seed: int,
+        unit_ids: Iterable[int],
+        day: datetime.date,
+        orders_per_unit: int,
+        layout_elements_count: int,
+) -> str:
+    rows = generate_restaurant_orders(seed, unit_ids, day, orders_per_unit)
+    return render_page('Заказы', render_table(RESTAURANT_ORDERS_HEADERS, rows), layout_elements_count)
+
+
+def get_canceled_order_uuid(seed: int, day: datetime.date, order_index: int) -> uuid.UUID:
+    return uuid.UUID(int=get_rng(seed, 'canceled-order', day, order_index).getrandbits(128))
+
+
+def render_partial_orders_page(
+        seed: int,
+        day: datetime.date,
+        page: int,
+        canceled_orders_count: int,
+        page_size: int,
+) -> str:
+    first_index = (page - 1) * page_size
+    rows = []
+    for order_index in range(first_index, min(canceled_orders_count, first_index + page_size)):
+        rng = get_rng(seed, 'canceled-order', day, order_index)
+        order_uuid = get_canceled_order_uuid(seed, day, order_index)
+        rows.append((
+            f'<a href="/Managment/ShiftManagment/Order?orderUUId={order_uuid.hex}">Подробнее</a>',
+            f'{order_index + 1} - {rng.randint(1, 9)}',
+            day.strftime('%d.%m.%Y'),
+            'Отказ',
+            f'{rng.randint(300, 3000)} ₽',
+            '',
+            '',
+            rng.choice(ORDER_TYPES),
+        ))
+    headers = ('', 'Номер', 'Дата', 'Статус', 'Сумма', 'Клиент', 'Адрес', 'Тип')
+    # the page is loaded by AJAX, so it is a bare table without layout
+    return render_table(headers, rows)
+
+
+def render_order_page(seed: int, order_uuid: uuid.UUID, day: datetime.date, layout_elements_count: int) -> str:
+    rng = get_rng(seed, 'order', order_uuid)
+    created_at = random_moment(rng, day)
+    canceled_at = min(
+        created_at + datetime.timedelta(minutes=rng.randint(5, 90)),
+        get_moscow_now().replace(microsecond=0),
+    )
+    courier_name = rng.choice(PEOPLE) if rng.random() < 0.5 else ''
+    rejected_by_user_name = rng.choice(PEOPLE) if rng.random() < 0.8 else ''
+    history = [
+        (created_at, f'The order ID {rng.randint(10 ** 8, 10 ** 9)} has been accepted', ''),
+        (canceled_at, f'Order ID {rng.randint(10 ** 8, 10 ** 9)} has been rejected', rejected_by_user_name),
+    ]
+    if rng.random() < 0.5:
+        receipt_printed_at = canceled_at + datetime.timedelta(minutes=rng.randint(1, 60))
+        history.append((receipt_printed_at, f'Закрыт чек на возврат №{rng.randint(1000, 99999)}', ''))
+    details = render_table(
+        ('<h4>Номер заказа</h4>', f'<h4><span id="orderNumber">{rng.randint(1, 999)} - {rng.randint(1, 9)}</span></h4>'),
+        (
+            ('Заказ принят:', created_at.strftime('%H:%M')),
+            ('Курьер:', courier_name),
+            ('Способ оплаты', 'Наличными'),
+        ),
+    )
+    history_table = render_table(
+        ('Дата, время', 'Действие', 'Пользователь'),
+        ((moment.strftime('%d.%m.%Y %H:%M:%S'), message, user) for moment, message, user in history),
+    )
+    content = (
+        f'<div class="headerDepartment">{get_unit_name(rng.randint(1, 1000))}</div>'
+        f'<div class="tab-pane active" id="details">{details}</div>'
+        f'<div class="row tab-pane" id="history">{history_table}</div>'
+    )
+    return render_page('Заказ', content, layout_elements_count)
+
+
+def generate_delivery_statistics_excel(seed: int, unit_ids: Iterable[int], day: datetime.date) -> bytes:
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet['A1'] = 'Статистика по доставке'
+    worksheet['A3'] = f'Период: {day:%d.%m.%Y} - {day:%d.%m.%Y}'
+    worksheet['A6'] = 'Пиццерия'
+    # data starts on the 7th row and trips with one order share is the last of 14 columns
+    for row_number, unit_id in enumerate(unit_ids, start=7):
+        rng = get_rng(seed, 'delivery-statistics-excel', unit_id, day)
+        row = (get_unit_name(unit_id), *(rng.randint(0, 500) for _ in range(12)), round(rng.random(), 4))
+        for column_number, value in enumerate(row, start=1):
+            worksheet.cell(row=row_number, column=column_number, value=value)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
@@ -0,0 +1,50 @@
+import httpx
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from simulator.upstream import UpstreamSimulator
+
+__all__ = (
+    'SimulatorTransport',
+    'SimulatorASGIApp',
+)
+
+
+# plugs the simulator straight into httpx clients, no sockets involved
+class SimulatorTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, simulator: UpstreamSimulator):
+        self.simulator = simulator
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        return await self.simulator.handle(request)
+
+
+# serves the simulator over HTTP, e.g. `uvicorn simulator:app` for load tests against a real server
+class SimulatorASGIApp:
+
+    def __init__(self, simulator: UpstreamSimulator):
+        self.simulator = simulator
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return
+        request = Request(scope, receive)
+        upstream_request = httpx.Request(
+            method=request.method,
+            url=str(request.url),
+            headers=request.headers.raw,
+            content=await request.body(),
+        )
+        upstream_response = await self.simulator.handle(upstream_request)
+        response = Response(
+            content=upstream_response.content,
+            status_code=upstream_response.status_code,
+            headers={
+                key: value for key, value in upstream_response.headers.items()
+                if key.lower() not in ('content-length', 'content-encoding')
+            },
+        )
+        await response(scope, receive, send)
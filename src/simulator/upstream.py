@@ -0,0 +1,274 @@
+import asyncio
+import collections
+import datetime
+import re
+import urllib.parse
+import uuid
+from dataclasses import dataclass
+from typing import Callable
+
+import httpx
+
+from services.periods import get_moscow_now
+from simulator import generators
+from simulator.config import SimulatorConfig
+
+__all__ = ('UpstreamSimulator',)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    name: str
+    method: str
+    pattern: re.Pattern
+    handler: Callable[[httpx.Request, re.Match], httpx.Response]
+
+
+def parse_date(value: str | None) -> datetime.date:
+    if not value:
+        return get_moscow_now().date()
+    return datetime.datetime.fromisoformat(value).date()
+
+
+def parse_russian_date(value: str | None) -> datetime.date:
+    if not value:
+        return get_moscow_now().date()
+    return datetime.datetime.strptime(value, '%d.%m.%Y').date()
+
+
+def parse_unit_uuids(request: httpx.Request) -> list[uuid.UUID]:
+    units = request.url.params.get('units', '')
+    return [uuid.UUID(unit) for unit in units.split(',') if unit]
+
+
+def parse_form(request: httpx.Request) -> dict[str, list[str]]:
+    return urllib.parse.parse_qs(request.content.decode())
+
+
+def html_response(html: str) -> httpx.Response:
+    return httpx.Response(200, text=html, headers={'Content-Type': 'text/html; charset=utf-8'})
+
+
+# Fake Dodo IS API, Public API, Office Manager and Shift Manager.
+# Routes are matched by path only, so one instance serves every upstream host, or a single ASGI app.
+class UpstreamSimulator:
+
+    def __init__(self, config: SimulatorConfig = SimulatorConfig()):
+        self.config = config
+        self.calls_count: collections.Counter[str] = collections.Counter()
+        self.__rng = generators.get_rng(config.seed, 'simulator')
+        self.__routes = (
+            Route('dodo_is.productivity', 'GET', re.compile(r'/production/productivity/?$'), self.productivity),
+            Route('dodo_is.delivery_statistics', 'GET', re.compile(r'/delivery/statistics/?$'),
+                  self.delivery_statistics),
+            Route('dodo_is.stop_sales_channels', 'GET', re.compile(r'/production/stop-sales-channels/?$'),
+                  self.stop_sales_by_sales_channels),
+            Route('dodo_is.stop_sales_ingredients', 'GET', re.compile(r'/production/stop-sales-ingredients/?$'),
+                  self.stop_sales_by_ingredients),
+            Route('dodo_is.orders_handover_time', 'GET', re.compile(r'/production/orders-handover-time/?$'),
+                  self.orders_handover_time),
+            Route('dodo_is.vouchers', 'GET', re.compile(r'/delivery/vouchers/?$'), self.late_delivery_vouchers),
+            Route('public_api.operational_statistics', 'GET',
+                  re.compile(r'/OperationalStatisticsForTodayAndWeekBefore/(?P<unit_id>\d+)$'),
+                  self.operational_statistics),
+            Route('office_manager.delivery_partial', 'GET',
+                  re.compile(r'/OfficeManager/OperationalStatistics/DeliveryWorkPartial$'),
+                  self.delivery_partial_statistics),
+            Route('office_manager.kitchen_partial', 'GET',
+                  re.compile(r'/OfficeManager/OperationalStatistics/KitchenPartial$'),
+                  self.kitchen_partial_statistics),
+            Route('office_manager.stock_balance', 'GET', re.compile(r'/OfficeManager/StockBalance/Get$'),
+                  self.stock_balance),
+            Route('office_manager.delivery_statistics_export', 'POST',
+                  re.compile(r'/Reports/DeliveryStatistic/Export$'), self.delivery_statistics_excel),
+            Route('office_manager.restaurant_orders', 'POST', re.compile(r'/Reports/Orders/Get$'),
+                  self.restaurant_orders),
+            Route('office_manager.sector_stop_sales', 'POST',
+                  re.compile(r'/Reports/StopSaleStatistic/GetDeliverySectorsStopSaleReport$'),
+                  self.stop_sales_by_sectors),
+            Route('office_manager.street_stop_sales', 'POST',
+                  re.compile(r'/Reports/StopSaleStatistic/GetDeliveryUnitStopSaleReport$'),
+                  self.stop_sales_by_streets),
+            Route('office_manager.used_promo_codes', 'POST', re.compile(r'/Reports/PromoCodeUsed/Get$'),
+                  self.used_promo_codes),
+            Route('shift_manager.partial_orders', 'GET',
+                  re.compile(r'/Managment/ShiftManagment/PartialShiftOrders$'), self.partial_orders),
+            Route('shift_manager.order', 'GET', re.compile(r'/Managment/ShiftManagment/Order$'), self.order),
+        )
+
+    @property
+    def route_names(self) -> tuple[str, ...]:
+        return tuple(route.name for route in self.__routes)
+
+    def is_failing_unit(self, unit_key: int | str | uuid.UUID) -> bool:
+        if not self.config.failing_unit_ratio:
+            return False
+        return generators.get_rng(self.config.seed, 'failing-unit', unit_key).random() < self.config.failing_unit_ratio
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        for route in self.__routes:
+            match = route.pattern.search(request.url.path)
+            if match is not None and request.method == route.method:
+                break
+        else:
+            return httpx.Response(404)
+        self.calls_count[route.name] += 1
+        latency = self.config.route_latencies.get(route.name, self.config.latency)
+        await asyncio.sleep(latency.sample(self.__rng))
+        if self.__rng.random() < self.config.error_rate:
+            return httpx.Response(503)
+        unit_id = match.groupdict().get('unit_id') or request.url.params.get('unitId')
+        if unit_id is not None and self.is_failing_unit(int(unit_id)):
+            return httpx.Response(500)
+        return route.handler(request, match)
+
+    def productivity(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        statistics = generators.generate_productivity_statistics(self.config.seed, parse_unit_uuids(request))
+        return httpx.Response(200, json={'productivityStatistics': statistics})
+
+    def delivery_statistics(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        statistics = generators.generate_delivery_statistics(
+            self.config.seed,
+            parse_unit_uuids(request),
+            parse_date(request.url.params.get('from')),
+        )
+        return httpx.Response(200, json={'unitsStatistics': statistics})
+
+    def stop_sales_by_sales_channels(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        stop_sales = generators.generate_stop_sales_by_sales_channels(
+            self.config.seed,
+            parse_unit_uuids(request),
+            parse_date(request.url.params.get('from')),
+            self.config.stop_sales_per_unit,
+        )
+        return httpx.Response(200, json={'stopSalesBySalesChannels': stop_sales})
+
+    def stop_sales_by_ingredients(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        stop_sales = generators.generate_stop_sales_by_ingredients(
+            self.config.seed,
+            parse_unit_uuids(request),
+            parse_date(request.url.params.get('from')),
+            self.config.stop_sales_per_unit,
+        )
+        return httpx.Response(200, json={'stopSalesByIngredients': stop_sales})
+
+    def orders_handover_time(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        orders = generators.generate_orders_handover_time(
+            self.config.seed,
+            parse_unit_uuids(request),
+            parse_date(request.url.params.get('from')),
+            self.config.orders_per_unit,
+        )
+        return httpx.Response(200, json={'ordersHandoverTime': orders})
+
+    def late_delivery_vouchers(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        vouchers = generators.generate_late_delivery_vouchers(
+            self.config.seed,
+            parse_unit_uuids(request),
+            parse_date(request.url.params.get('from')),
+            self.config.vouchers_per_unit,
+        )
+        take = int(request.url.params.get('take', 1000))
+        skip = int(request.url.params.get('skip', 0))
+        return httpx.Response(200, json={
+            'vouchers': vouchers[skip:skip + take],
+            'isEndOfListReached': skip + take >= len(vouchers),
+        })
+
+    def operational_statistics(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        statistics = generators.generate_operational_statistics(
+            self.config.seed,
+            int(match['unit_id']),
+            get_moscow_now().replace(microsecond=0),
+        )
+        return httpx.Response(200, json=statistics)
+
+    def delivery_partial_statistics(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        return html_response(generators.render_delivery_partial_statistics_page(
+            self.config.seed,
+            int(request.url.params['unitId']),
+            self.config.layout_elements_count,
+        ))
+
+    def kitchen_partial_statistics(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        return html_response(generators.render_kitchen_partial_statistics_page(
+            self.config.seed,
+            int(request.url.params['unitId']),
+            self.config.layout_elements_count,
+        ))
+
+    def stock_balance(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        return html_response(generators.render_stock_balance_page(
+            self.config.seed,
+            int(request.url.params['unitId']),
+            self.config.stock_items_per_unit,
+            self.config.layout_elements_count,
+        ))
+
+    def delivery_statistics_excel(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        form = parse_form(request)
+        content = generators.generate_delivery_statistics_excel(
+            self.config.seed,
+            [int(unit_id) for unit_id in form.get('unitsIds', [])],
+            parse_russian_date(form.get('beginDate', [None])[0]),
+        )
+        return httpx.Response(200, content=content, headers={'Content-Type': XLSX_CONTENT_TYPE})
+
+    def restaurant_orders(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        form = parse_form(request)
+        return html_response(generators.render_restaurant_orders_page(
+            self.config.seed,
+            [int(unit_id) for unit_id in form.get('unitsIds', [])],
+            parse_russian_date(form.get('beginDate', [None])[0]),
+            self.config.orders_per_unit,
+            self.config.layout_elements_count,
+        ))
+
+    def stop_sales_by_sectors(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        form = parse_form(request)
+        return html_response(generators.render_stop_sales_by_sectors_page(
+            self.config.seed,
+            [int(unit_id) for unit_id in form.get('UnitsIds', [])],
+            parse_russian_date(form.get('beginDate', [None])[0]),
+            self.config.stop_sales_per_unit,
+            self.config.layout_elements_count,
+        ))
+
+    def stop_sales_by_streets(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        form = parse_form(request)
+        return html_response(generators.render_stop_sales_by_streets_page(
+            self.config.seed,
+            [int(unit_id) for unit_id in form.get('UnitsIds', [])],
+            parse_russian_date(form.get('beginDate', [None])[0]),
+            self.config.stop_sales_per_unit,
+            self.config.layout_elements_count,
+        ))
+
+    def used_promo_codes(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        form = parse_form(request)
+        return html_response(generators.render_used_promo_codes_page(
+            self.config.seed,
+            int(form['unitsIds'][0]),
+            parse_russian_date(form.get('beginDate', [None])[0]),
+            self.config.used_promo_codes_per_unit,
+            self.config.layout_elements_count,
+        ))
+
+    def partial_orders(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        return html_response(generators.render_partial_orders_page(
+            self.config.seed,
+            parse_date(request.url.params.get('date')),
+            int(request.url.params.get('page', 1)),
+            self.config.canceled_orders_count,
+            self.config.canceled_orders_page_size,
+        ))
+
+    def order(self, request: httpx.Request, match: re.Match) -> httpx.Response:
+        return html_response(generators.render_order_page(
+            self.config.seed,
+            uuid.UUID(request.url.params['orderUUId']),
+            get_moscow_now().date(),
+            self.config.layout_elements_count,
+        ))
@@ -0,0 +1,38 @@
+import os
+from typing import Callable
+
+import httpx
+import pytest
+
+# required settings, so tests of the API layer can import it without a .env file
+os.environ.setdefault('APP_HOST', '127.0.0.1')
+os.environ.setdefault('APP_PORT', '8000')
+os.environ.setdefault('IS_DEBUG', 'false')
+os.environ.setdefault('REDIS_URL', 'redis://localhost:6379')
+
+from services.bulkheads import BulkheadRegistry  # noqa: E402
+from services.http_client_factories import HTTPClientRegistry  # noqa: E402
+from services.resilience import CircuitBreakerRegistry, RetryPolicy  # noqa: E402
+from services.single_flight import SingleFlight  # noqa: E402
+
+
+def build_registry(**kwargs) -> HTTPClientRegistry:
+    return HTTPClientRegistry(**{
+        'app_user_agent': 'test',
+        'timeout': 5,
+        'limits': httpx.Limits(),
+        'http2': False,
+        'bulkheads': BulkheadRegistry(initial_limit=10, min_limit=1, max_limit=30, latency_threshold=5),
+        'single_flight': SingleFlight(),
+        'retry_policy': RetryPolicy(max_attempts=3, backoff_base=0, backoff_cap=0),
+        'circuit_breakers': CircuitBreakerRegistry(failure_threshold=3, reset_timeout=60),
+        'hedger': None,
+        'quarantine': None,
+        'rate_limiters': None,
+        'scheduler': None,
+    } | kwargs)
+
+
+@pytest.fixture
+def registry_factory() -> Callable[..., HTTPClientRegistry]:
+    return build_registry
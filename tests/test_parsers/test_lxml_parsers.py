@@ -0,0 +1,29 @@
+import pathlib
+import uuid
+
+import pytest
+
+from services.lxml_parsers import OrderByUUIDLxmlParser
+from services.parsers import HTMLParser, OrderByUUIDParser
+
+CANCELED_ORDERS_PATH = pathlib.Path(__file__).parent.parent / 'api_responses' / 'canceled_orders'
+
+
+@pytest.mark.parametrize('page_path', sorted(CANCELED_ORDERS_PATH.glob('*.html')), ids=lambda path: path.stem)
+def test_order_by_uuid_parsers_give_same_output_for_real_pages(page_path: pathlib.Path):
+    order_uuid = uuid.uuid4()
+    expected = OrderByUUIDParser(page_path.read_text(encoding='utf-8'), order_uuid, 889, 'Доставка').parse()
+    actual = OrderByUUIDLxmlParser(page_path.read_bytes(), order_uuid, 889, 'Доставка').parse()
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ('\n 1\xa0234,5 ₽\r\n', '1234.5'),
+        ('\t−12 %', '-12'),
+        ('3 / 4', '3/4'),
+    ],
+)
+def test_clear_extra_symbols(text: str, expected: str):
+    assert HTMLParser.clear_extra_symbols(text) == expected
@@ -0,0 +1,17 @@
+import json
+import pathlib
+
+import pytest
+
+from benchmarks.parsers import PARSER_CASES, ParserCase, serialize_output
+
+# regenerate with `python -m benchmarks.parsers --write-corpus ../tests/api_responses/parser_corpus` from src
+CORPUS_PATH = pathlib.Path(__file__).parent.parent / 'api_responses' / 'parser_corpus'
+
+
+@pytest.mark.parametrize('case', PARSER_CASES, ids=lambda case: f'{case.name}-{case.engine}')
+def test_parser_output_matches_corpus(case: ParserCase):
+    page_path = CORPUS_PATH / f'{case.name}.{case.file_extension}'
+    page = page_path.read_bytes() if case.file_extension == 'xlsx' else page_path.read_text(encoding='utf-8')
+    expected = json.loads((CORPUS_PATH / f'{case.name}.json').read_text(encoding='utf-8'))
+    assert json.loads(serialize_output(case.parse(page))) == expected
@@ -0,0 +1,25 @@
+import datetime
+import io
+import pathlib
+
+import pandas as pd
+
+from benchmarks.parsers import parse_in_chunks
+from services.streaming_parsers import RestaurantOrdersStreamingParser
+from simulator import generators
+
+RESPONSES_PATH = pathlib.Path(__file__).parent.parent / 'api_responses'
+
+
+def test_restaurant_orders_data_frame_is_same_as_read_html():
+    page = generators.render_restaurant_orders_page(0, [1, 2, 3], datetime.date(2023, 1, 2), 500, 300)
+    parser = RestaurantOrdersStreamingParser()
+    data_frame = parser.build_data_frame(parse_in_chunks(parser, page))
+    pd.testing.assert_frame_equal(data_frame, pd.read_html(io.StringIO(page))[0])
+
+
+def test_restaurant_orders_data_frame_of_recorded_page_is_same_as_read_html():
+    page = (RESPONSES_PATH / 'restaurant_orders' / 'orders.html').read_bytes()
+    parser = RestaurantOrdersStreamingParser()
+    data_frame = parser.build_data_frame(parse_in_chunks(parser, page))
+    pd.testing.assert_frame_equal(data_frame, pd.read_html(io.StringIO(page.decode('utf-8')))[0])
@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+
+from services.bulkheads import AdaptiveBulkhead, BulkheadRegistry
+
+
+def bulkhead_factory(initial_limit: int = 2) -> AdaptiveBulkhead:
+    return AdaptiveBulkhead(initial_limit=initial_limit, min_limit=1, max_limit=4, latency_threshold=1)
+
+
+def test_bulkhead_limits_concurrent_calls():
+    bulkhead = bulkhead_factory()
+    in_flight = max_in_flight = 0
+
+    async def send() -> httpx.Response:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    async def main():
+        await asyncio.gather(*(bulkhead.call(send) for _ in range(10)))
+
+    asyncio.run(main())
+    assert max_in_flight <= 4
+    assert bulkhead.in_flight == 0
+
+
+def test_bulkhead_widens_limit_while_upstream_is_healthy():
+    bulkhead = bulkhead_factory()
+
+    async def send() -> httpx.Response:
+        return httpx.Response(200)
+
+    async def main():
+        for _ in range(20):
+            await bulkhead.call(send)
+
+    asyncio.run(main())
+    assert bulkhead.limit == 4
+
+
+def test_bulkhead_shrinks_limit_on_server_errors_once_per_window():
+    bulkhead = bulkhead_factory(initial_limit=4)
+
+    async def send() -> httpx.Response:
+        return httpx.Response(503)
+
+    async def main():
+        await asyncio.gather(*(bulkhead.call(send) for _ in range(4)))
+
+    asyncio.run(main())
+    assert bulkhead.limit == 2
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    bulkhead = bulkhead_factory(initial_limit=1)
+
+    async def send() -> httpx.Response:
+        await asyncio.sleep(0.01)
+        return httpx.Response(200)
+
+    async def main():
+        first = asyncio.create_task(bulkhead.call(send))
+        second = asyncio.create_task(bulkhead.call(send))
+        await asyncio.sleep(0)
+        second.cancel()
+        await first
+        await asyncio.gather(second, return_exceptions=True)
+
+    asyncio.run(main())
+    assert bulkhead.in_flight == 0
+
+
+def test_idle_bulkheads_of_gone_sessions_are_evicted():
+    registry = BulkheadRegistry(initial_limit=1, min_limit=1, max_limit=1, latency_threshold=1, idle_timeout=0.05)
+    released = asyncio.Event()
+
+    async def send() -> httpx.Response:
+        await released.wait()
+        return httpx.Response(200)
+
+    async def main():
+        busy = registry.get('busy')
+        call = asyncio.create_task(busy.call(send))
+        registry.get('gone')
+        await asyncio.sleep(0.1)
+        registry.get('new')
+        # a bulkhead with calls in flight is kept even when its session has not asked for it lately
+        assert len(registry) == 2
+        assert registry.get('busy') is busy
+        released.set()
+        await call
+
+    asyncio.run(main())
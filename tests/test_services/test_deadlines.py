@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from core import exceptions
+from services import deadlines
+
+
+async def dataset(items: list[int], delay: float = 0) -> list[int]:
+    await asyncio.sleep(delay)
+    return items
+
+
+async def unavailable_dataset():
+    raise exceptions.UpstreamUnavailable
+
+
+async def unauthorized_dataset():
+    raise exceptions.Unauthorized
+
+
+def test_unavailable_datasets_are_reported_as_missing():
+    async def main():
+        deadlines.set_deadline(10)
+        return await deadlines.gather_datasets(
+            orders=dataset([1, 2]),
+            stop_sales=unavailable_dataset(),
+        )
+
+    datasets = asyncio.run(main())
+    assert datasets.get('orders') == [1, 2]
+    assert datasets.get('stop_sales') == ()
+    assert datasets.missing == ['stop_sales']
+
+
+def test_unavailable_datasets_are_errors_without_deadline():
+    with pytest.raises(exceptions.UpstreamUnavailable):
+        asyncio.run(deadlines.gather_datasets(
+            orders=dataset([1, 2]),
+            stop_sales=unavailable_dataset(),
+        ))
+
+
+def test_client_errors_are_not_swallowed():
+    with pytest.raises(exceptions.Unauthorized):
+        asyncio.run(deadlines.gather_datasets(
+            orders=dataset([1]),
+            stop_sales=unauthorized_dataset(),
+        ))
+
+
+def test_remaining_time():
+    async def main():
+        deadlines.set_deadline(None)
+        assert deadlines.get_remaining_time() is None
+        deadlines.set_deadline(10)
+        assert 9 < deadlines.get_remaining_time() <= 10
+        deadlines.set_deadline(0)
+        await asyncio.sleep(0.01)
+        assert deadlines.get_remaining_time() == 0
+
+    asyncio.run(main())
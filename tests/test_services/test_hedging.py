@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from core import exceptions
+from services.hedging import RequestHedger
+from services.http_client_factories import dodo_is_api_client_factory
+from services.resilience import RetryPolicy
+
+URL = '/production/productivity'
+
+
+class ScriptedUpstream:
+    # every attempt sleeps for the next scripted latency, then fails if its latency is in failing ones
+
+    def __init__(self, latencies: list[float], failing_latencies: frozenset[float] = frozenset()):
+        self.__latencies = latencies
+        self.__failing_latencies = failing_latencies
+        self.arrived_at: list[float] = []
+        self.cancelled_count = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.arrived_at.append(time.perf_counter())
+        latency = self.__latencies.pop(0)
+        try:
+            await asyncio.sleep(latency)
+        except asyncio.CancelledError:
+            self.cancelled_count += 1
+            raise
+        if latency in self.__failing_latencies:
+            raise httpx.ReadError('Connection reset', request=request)
+        return httpx.Response(200, json={'attempt': len(self.arrived_at)})
+
+
+def run_hedged(registry_factory, upstream: ScriptedUpstream, hedger: RequestHedger, calls_count: int):
+    warm_up_count = 3
+
+    async def main():
+        registry = registry_factory(
+            transport=httpx.MockTransport(upstream),
+            single_flight=None,
+            retry_policy=RetryPolicy(max_attempts=1, backoff_base=0, backoff_cap=0),
+            hedger=hedger,
+        )
+        client = dodo_is_api_client_factory(registry=registry, token='token', country_code='ru')
+        try:
+            # sequential calls give the hedger enough samples to know the latency percentile
+            for i in range(warm_up_count):
+                await client.get(URL, params={'call': i}, is_hedged=True)
+            upstream.arrived_at.clear()
+            started_at = time.perf_counter()
+            results = await asyncio.gather(
+                *(client.get(URL, params={'call': i}, is_hedged=True) for i in range(calls_count)),
+                return_exceptions=True,
+            )
+            return results, time.perf_counter() - started_at
+        finally:
+            await registry.close()
+
+    return asyncio.run(main())
+
+
+def hedger_factory(**kwargs) -> RequestHedger:
+    return RequestHedger(**{
+        'percentile': 0.5,
+        'min_delay': 0.01,
+        'budget_ratio': 1,
+        'max_budget': 10,
+        'min_samples_count': 3,
+    } | kwargs)
+
+
+def test_hedge_is_sent_after_latency_percentile_and_first_response_wins(registry_factory):
+    upstream = ScriptedUpstream([0.1, 0.1, 0.1, 1, 0.01])
+    (response,), duration = run_hedged(registry_factory, upstream, hedger_factory(), calls_count=1)
+    assert response.json() == {'attempt': 2}
+    assert upstream.arrived_at[1] - upstream.arrived_at[0] == pytest.approx(0.1, abs=0.04)
+    assert duration < 0.5
+    # the slower attempt is cancelled, not left to finish in background
+    assert upstream.cancelled_count == 1
+
+
+def test_fast_responses_are_not_hedged(registry_factory):
+    upstream = ScriptedUpstream([0.1, 0.1, 0.1, 0.05])
+    (response,), _ = run_hedged(registry_factory, upstream, hedger_factory(), calls_count=1)
+    assert response.json() == {'attempt': 1}
+    assert len(upstream.arrived_at) == 1
+
+
+def test_hedges_are_limited_by_budget(registry_factory):
+    # three slow calls at once earn one hedge together, the budget is capped at one
+    upstream = ScriptedUpstream([0.1, 0.1, 0.1, 0.3, 0.3, 0.3, 0.01])
+    hedger = hedger_factory(budget_ratio=0.5, max_budget=1)
+    responses, _ = run_hedged(registry_factory, upstream, hedger, calls_count=3)
+    assert all(response.status_code == 200 for response in responses)
+    assert len(upstream.arrived_at) == 4
+
+
+def test_call_fails_when_both_attempts_fail(registry_factory):
+    upstream = ScriptedUpstream([0.1, 0.1, 0.1, 0.2, 0.15], failing_latencies=frozenset({0.2, 0.15}))
+    results, _ = run_hedged(registry_factory, upstream, hedger_factory(), calls_count=1)
+    assert len(upstream.arrived_at) == 2
+    assert isinstance(results[0], exceptions.UpstreamUnavailable)
@@ -0,0 +1,221 @@
+import asyncio
+
+import httpx
+import pytest
+
+from core import exceptions
+from services.bulkheads import BulkheadRegistry
+from services.http_client_factories import (
+    Upstream,
+    office_manager_api_client_factory,
+    dodo_is_api_client_factory,
+)
+from services.priorities import Priority, PriorityScheduler, set_priority
+from services.rate_limiting import RateLimiterRegistry
+from services.resilience import CircuitBreakerRegistry, CircuitBreakerState, RetryPolicy
+
+
+def test_registry_reuses_client_per_upstream_and_country(registry_factory):
+    registry = registry_factory()
+    assert registry.get(Upstream.OFFICE_MANAGER, 'ru') is registry.get(Upstream.OFFICE_MANAGER, 'ru')
+    assert registry.get(Upstream.OFFICE_MANAGER, 'ru') is not registry.get(Upstream.OFFICE_MANAGER, 'by')
+    assert registry.get(Upstream.OFFICE_MANAGER, 'ru') is not registry.get(Upstream.SHIFT_MANAGER, 'ru')
+    asyncio.run(registry.close())
+
+
+def test_cookies_are_attached_per_request_and_never_persisted(registry_factory):
+    received_cookies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received_cookies.append(request.headers.get('Cookie'))
+        return httpx.Response(200, headers={'Set-Cookie': 'leaked=1'})
+
+    async def main():
+        registry = registry_factory(transport=httpx.MockTransport(handler))
+        first = office_manager_api_client_factory(registry=registry, cookies={'user': 'first'}, country_code='ru')
+        second = office_manager_api_client_factory(registry=registry, cookies={'user': 'second'}, country_code='ru')
+        await first.get('/')
+        await second.get('/')
+        await registry.close()
+
+    asyncio.run(main())
+    assert received_cookies == [
+        'user=first; SelectedLanguage7=ru-RU',
+        'user=second; SelectedLanguage7=ru-RU',
+    ]
+
+
+def test_scope_does_not_expose_credentials(registry_factory):
+    registry = registry_factory()
+    client = dodo_is_api_client_factory(registry=registry, token='secret-token', country_code='ru')
+    other_client = dodo_is_api_client_factory(registry=registry, token='other-token', country_code='ru')
+    assert 'secret-token' not in repr(client)
+    assert client.scope != other_client.scope
+    asyncio.run(registry.close())
+
+
+def test_identical_concurrent_requests_share_one_upstream_call(registry_factory):
+    upstream_calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        upstream_calls.append(request.url)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={'units': request.url.params['units']})
+
+    async def main():
+        registry = registry_factory(transport=httpx.MockTransport(handler))
+        client = dodo_is_api_client_factory(registry=registry, token='token', country_code='ru')
+        other_client = dodo_is_api_client_factory(registry=registry, token='other-token', country_code='ru')
+        responses = await asyncio.gather(
+            client.get('/production/productivity', params={'units': 'a', 'from': '1'}),
+            client.get('/production/productivity', params={'from': '1', 'units': 'a'}),
+            other_client.get('/production/productivity', params={'units': 'a', 'from': '1'}),
+        )
+        await registry.close()
+        return responses
+
+    responses = asyncio.run(main())
+    assert len(upstream_calls) == 2
+    assert [response.json() for response in responses] == [{'units': 'a'}] * 3
+
+
+def test_transient_upstream_errors_are_retried(registry_factory):
+    statuses = [503, 502, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(statuses.pop(0))
+
+    async def main():
+        registry = registry_factory(transport=httpx.MockTransport(handler))
+        client = dodo_is_api_client_factory(registry=registry, token='token', country_code='ru')
+        response = await client.get('/delivery/statistics/')
+        await registry.close()
+        return response
+
+    assert asyncio.run(main()).status_code == 200
+    assert statuses == []
+
+
+def test_open_circuit_breaker_fails_fast(registry_factory):
+    upstream_calls_count = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal upstream_calls_count
+        upstream_calls_count += 1
+        raise httpx.ConnectError('Connection refused', request=request)
+
+    async def main():
+        registry = registry_factory(transport=httpx.MockTransport(handler))
+        client = office_manager_api_client_factory(registry=registry, cookies={}, country_code='ru')
+        for _ in range(2):
+            with pytest.raises(exceptions.UpstreamUnavailable):
+                await client.get('/OfficeManager/StockBalance/Get')
+        await registry.close()
+
+    asyncio.run(main())
+    assert upstream_calls_count == 3
+
+
+def test_unit_errors_do_not_open_circuit_breaker(registry_factory):
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params['unitId'] == '1':
+            return httpx.Response(500)
+        return httpx.Response(200)
+
+    async def main():
+        registry = registry_factory(
+            transport=httpx.MockTransport(handler),
+            circuit_breakers=CircuitBreakerRegistry(failure_threshold=1, reset_timeout=60),
+        )
+        client = office_manager_api_client_factory(registry=registry, cookies={}, country_code='ru')
+        statuses = []
+        for unit_id in (1, 1, 1, 2):
+            url = '/OfficeManager/StockBalance/Get'
+            response = await client.get_unit_resource(unit_id, url, params={'unitId': unit_id})
+            statuses.append(response.status_code)
+        await registry.close()
+        return statuses, client.circuit_breaker.state
+
+    statuses, state = asyncio.run(main())
+    assert statuses == [500, 500, 500, 200]
+    assert state is CircuitBreakerState.CLOSED
+
+
+def test_calls_rejected_by_open_circuit_breaker_spend_no_rate_limit_tokens(registry_factory):
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError('Connection refused', request=request)
+
+    async def main():
+        registry = registry_factory(
+            transport=httpx.MockTransport(handler),
+            retry_policy=RetryPolicy(max_attempts=1, backoff_base=0, backoff_cap=0),
+            circuit_breakers=CircuitBreakerRegistry(failure_threshold=1, reset_timeout=60),
+            rate_limiters=RateLimiterRegistry(rate=0.001, capacity=2, max_wait=0),
+        )
+        client = office_manager_api_client_factory(registry=registry, cookies={}, country_code='ru')
+        for _ in range(5):
+            with pytest.raises(exceptions.UpstreamUnavailable):
+                await client.get('/OfficeManager/StockBalance/Get')
+        state = await client.rate_limiter.get_state()
+        await registry.close()
+        return state.tokens
+
+    assert asyncio.run(main()) == pytest.approx(1, abs=0.01)
+
+
+def test_prewarm_opens_connections_for_every_upstream_and_country(registry_factory):
+    requested_hosts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested_hosts.append(request.url.host)
+        return httpx.Response(200)
+
+    async def main():
+        registry = registry_factory(transport=httpx.MockTransport(handler))
+        await registry.prewarm(
+            upstreams=(Upstream.PUBLIC_API, Upstream.OFFICE_MANAGER),
+            country_codes=('ru', 'kz'),
+            connections_per_host=2,
+        )
+        await registry.close()
+
+    asyncio.run(main())
+    assert sorted(set(requested_hosts)) == [
+        'officemanager.dodopizza.kz',
+        'officemanager.dodopizza.ru',
+        'publicapi.dodois.io',
+    ]
+    assert len(requested_hosts) == 8
+
+
+def test_calls_queued_behind_throttled_session_do_not_hold_shared_slots(registry_factory):
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if 'throttled' in request.headers['Cookie']:
+            await asyncio.sleep(0.2)
+        return httpx.Response(200)
+
+    async def throttled_call(path: str) -> None:
+        set_priority(Priority.BULK)
+        await throttled.get(path)
+
+    async def main():
+        started_at = asyncio.get_running_loop().time()
+        throttled_calls = [asyncio.create_task(throttled_call(f'/{number}')) for number in range(4)]
+        await asyncio.sleep(0.01)
+        await interactive.get('/')
+        interactive_duration = asyncio.get_running_loop().time() - started_at - 0.01
+        await asyncio.gather(*throttled_calls)
+        await registry.close()
+        return interactive_duration
+
+    registry = registry_factory(
+        bulkheads=BulkheadRegistry(initial_limit=1, min_limit=1, max_limit=1, latency_threshold=5),
+        scheduler=PriorityScheduler(max_concurrency=2, reserved_for_interactive=0),
+        transport=httpx.MockTransport(handler),
+    )
+    throttled = office_manager_api_client_factory(registry=registry, cookies={'user': 'throttled'}, country_code='ru')
+    interactive = office_manager_api_client_factory(registry=registry, cookies={'user': 'other'}, country_code='ru')
+    assert asyncio.run(main()) < 0.1
@@ -0,0 +1,151 @@
+import asyncio
+
+import httpx
+from fastapi import APIRouter, FastAPI
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.decorator import cache
+
+from api.middlewares import AdmissionControlMiddleware, ServerTimingMiddleware
+from api.routing import TimedRoute
+from services import metrics
+from services.bulkheads import BulkheadRegistry
+from services.caching import ReportCacheBackend, ReportCoder
+from services.load_shedding import AdmissionController, LastGoodResponses
+
+
+def test_requests_beyond_route_capacity_are_rejected():
+    controller = AdmissionController(max_in_flight=3, max_in_flight_per_route=2, max_queued_upstream_calls=10)
+    assert controller.try_admit('/reports', queued_upstream_calls=0)
+    assert controller.try_admit('/reports', queued_upstream_calls=0)
+    assert not controller.try_admit('/reports', queued_upstream_calls=0)
+    assert controller.try_admit('/stocks', queued_upstream_calls=0)
+    assert not controller.try_admit('/orders', queued_upstream_calls=0)
+    controller.release('/reports')
+    assert not controller.try_admit('/reports', queued_upstream_calls=10)
+    assert controller.try_admit('/reports', queued_upstream_calls=0)
+    assert controller.rejected_by_route == {'/reports': 2, '/orders': 1}
+
+
+def test_last_good_responses_are_bounded():
+    responses = LastGoodResponses(max_count=2, max_age=60, max_body_size=3)
+    responses.set('first', [], b'1')
+    responses.set('second', [], b'2')
+    responses.set('third', [], b'3')
+    responses.set('too-large', [], b'1234')
+    assert responses.get('first') is None
+    assert responses.get('third').body == b'3'
+    assert responses.get('too-large') is None
+
+
+def test_stale_responses_do_not_replay_headers_of_another_request():
+    router = APIRouter(prefix='/v1', route_class=TimedRoute)
+
+    @router.get('/report')
+    async def get_report() -> dict:
+        return {'value': 1}
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(ServerTimingMiddleware, path_prefixes=('/v1/',), traces=None)
+    controller = AdmissionController(max_in_flight=1, max_in_flight_per_route=1, max_queued_upstream_calls=10)
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=controller,
+        last_good_responses=LastGoodResponses(max_count=10, max_age=60, max_body_size=1000),
+        retry_after=1,
+        exempt_path_prefixes=('/service',),
+    )
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            fresh_response = await client.get('/v1/report')
+            # the only slot is taken, so the next requests are rejected
+            controller.try_admit('/other', queued_upstream_calls=0)
+            stale_response = await client.get('/v1/report')
+            await client.get('/v1/unknown/1')
+            await client.get('/v1/unknown/2')
+            return fresh_response, stale_response
+
+    fresh_response, stale_response = asyncio.run(main())
+    assert 'Server-Timing' in fresh_response.headers
+    assert stale_response.status_code == 200
+    assert stale_response.json() == {'value': 1}
+    assert 'Server-Timing' not in stale_response.headers
+    assert 'Age' in stale_response.headers
+    assert controller.rejected_by_route == {'/v1/report': 1, 'unmatched': 2}
+
+
+def test_stale_responses_are_counted_by_report_cache_namespace():
+    router = APIRouter(prefix='/v1', route_class=TimedRoute)
+
+    @router.get('/cached-report')
+    @cache(expire=60, namespace='cached-report')
+    async def get_cached_report() -> dict:
+        return {'value': 1}
+
+    app = FastAPI()
+    app.include_router(router)
+    controller = AdmissionController(max_in_flight=1, max_in_flight_per_route=1, max_queued_upstream_calls=10)
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=controller,
+        last_good_responses=LastGoodResponses(max_count=10, max_age=60, max_body_size=1000),
+        retry_after=1,
+        exempt_path_prefixes=('/service',),
+    )
+    labels = {'route': '/v1/cached-report', 'namespace': 'cached-report'}
+    stale_count = metrics.STALE_RESPONSES.get(**labels)
+
+    async def main():
+        FastAPICache.reset()
+        FastAPICache.init(ReportCacheBackend(InMemoryBackend()), prefix='test', coder=ReportCoder)
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+                await client.get('/v1/cached-report')
+                controller.try_admit('/other', queued_upstream_calls=0)
+                return await client.get('/v1/cached-report')
+        finally:
+            FastAPICache.reset()
+
+    assert asyncio.run(main()).json() == {'value': 1}
+    assert metrics.STALE_RESPONSES.get(**labels) == stale_count + 1
+
+
+def test_calls_queued_in_session_bulkheads_count_as_upstream_queue(registry_factory):
+    router = APIRouter(prefix='/v1', route_class=TimedRoute)
+
+    @router.get('/report')
+    async def get_report() -> dict:
+        return {'value': 1}
+
+    app = FastAPI()
+    app.include_router(router)
+    bulkheads = BulkheadRegistry(initial_limit=1, min_limit=1, max_limit=1, latency_threshold=5)
+    app.state.http_client_registry = registry_factory(bulkheads=bulkheads)
+    controller = AdmissionController(max_in_flight=10, max_in_flight_per_route=10, max_queued_upstream_calls=2)
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=controller,
+        last_good_responses=LastGoodResponses(max_count=10, max_age=60, max_body_size=1000),
+        retry_after=1,
+        exempt_path_prefixes=('/service',),
+    )
+    released = asyncio.Event()
+
+    async def send() -> httpx.Response:
+        await released.wait()
+        return httpx.Response(200)
+
+    async def main():
+        bulkhead = bulkheads.get('throttled-session')
+        calls = [asyncio.create_task(bulkhead.call(send)) for _ in range(3)]
+        await asyncio.sleep(0)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            response = await client.get('/v1/report')
+        released.set()
+        await asyncio.gather(*calls)
+        return response
+
+    assert asyncio.run(main()).status_code == 503
+    assert bulkheads.queued == 0
@@ -0,0 +1,48 @@
+import asyncio
+import multiprocessing
+
+from benchmarks.load_test import LoadTestConfig, run_load_test
+from benchmarks.scenarios import DEFAULT_MIX
+from simulator import LatencyDistribution, SimulatorConfig
+
+
+def test_load_test_reports_latency_percentiles():
+    config = LoadTestConfig(
+        rps=20,
+        duration=1,
+        units_count=5,
+        users_count=2,
+        units_per_user=2,
+        simulator=SimulatorConfig(latency=LatencyDistribution(median=0.01)),
+    )
+    report = asyncio.run(run_load_test(config))
+    assert report['requests'] > 0
+    assert set(report['latency_ms']) == {'p50', 'p95', 'p99'}
+    assert report['latency_ms']['p50'] <= report['latency_ms']['p95'] <= report['latency_ms']['p99']
+    assert report['upstream_calls'] > 0
+    assert sum(route['requests'] for route in report['routes'].values()) == report['requests']
+    # the simulator process is stopped once the run is over
+    assert not multiprocessing.active_children()
+
+
+def test_single_scenario_is_reported_by_its_route():
+    scenario = next(scenario for scenario in DEFAULT_MIX if scenario.route.endswith('/productivity-balance'))
+    config = LoadTestConfig(
+        rps=10,
+        duration=0.5,
+        units_count=3,
+        users_count=1,
+        units_per_user=3,
+        mix=(scenario,),
+        simulator=SimulatorConfig(latency=LatencyDistribution(median=0.01)),
+    )
+    report = asyncio.run(run_load_test(config))
+    assert set(report) == {'config', 'elapsed', 'requests', 'throughput', 'latency_ms', 'upstream_calls', 'routes'}
+    assert list(report['routes']) == [scenario.route]
+    route_report = report['routes'][scenario.route]
+    assert set(route_report) == {
+        'requests', 'status_codes', 'throughput', 'latency_ms', 'upstream_calls_per_request', 'cache_hit_rate',
+    }
+    assert route_report['status_codes'] == {'200': report['requests']}
+    assert set(route_report['latency_ms']) == {'p50', 'p95', 'p99'}
+    assert route_report['upstream_calls_per_request'] > 0
@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+from services import metrics
+from services.loop_lag import LoopLagMonitor
+
+
+def block_event_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def test_stall_is_attributed_to_blocking_code():
+    monitor = LoopLagMonitor(interval=0.01, stall_threshold=0.1, max_stalls_count=10)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        block_event_loop(0.3)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    stalls_count_before = metrics.EVENT_LOOP_STALLS.get(location='test_loop_lag.py:block_event_loop')
+    asyncio.run(main())
+    [stall] = monitor.stalls
+    assert stall.duration >= 0.25
+    assert stall.location == 'test_loop_lag.py:block_event_loop'
+    assert 'time.sleep(seconds)' in stall.stack[-1]
+    assert metrics.EVENT_LOOP_STALLS.get(location='test_loop_lag.py:block_event_loop') == stalls_count_before + 1
@@ -0,0 +1,203 @@
+import asyncio
+import datetime
+import gc
+import json
+import os
+import pathlib
+import tracemalloc
+import uuid
+from typing import Any, Awaitable, Callable
+
+import httpx
+import pytest
+
+from api.common_schemas.constraints import UnitIdAndNameIn
+from api.v1 import orders as v1_orders
+from api.v1 import reports as v1_reports
+from api.v1 import stocks as v1_stocks
+from api.v1 import stop_sales as v1_stop_sales
+from api.v2 import reports as v2_reports
+from api.v2 import stop_sales as v2_stop_sales
+from services.http_client_factories import (
+    HTTPClientRegistry,
+    dodo_is_api_client_factory,
+    office_manager_api_client_factory,
+    public_api_client_factory,
+    shift_manager_api_client_factory,
+)
+from services.periods import Period
+from services.record_replay import RecordingTransport, ReplayTransport
+from simulator import SimulatorConfig, SimulatorTransport, UpstreamSimulator, generators
+
+# peak bytes allocated by a report path, run with UPDATE_MEMORY_BUDGETS=1 to store new budgets
+BUDGETS_PATH = pathlib.Path(__file__).parent / 'memory_budgets.json'
+# budgets are measured on Python 3.11 and stored with headroom for allocator noise and the larger
+# objects of Python 3.10, which CI runs on
+BUDGET_HEADROOM = 1.5
+
+SIMULATOR_CONFIG = SimulatorConfig(
+    orders_per_unit=200,
+    vouchers_per_unit=500,
+    used_promo_codes_per_unit=2000,
+)
+UNIT_IDS = list(range(1, 11))
+
+Report = Callable[[HTTPClientRegistry], Awaitable[Any]]
+
+
+def get_office_manager_client(registry: HTTPClientRegistry):
+    return office_manager_api_client_factory(registry=registry, cookies={}, country_code='ru')
+
+
+def get_dodo_is_api_client(registry: HTTPClientRegistry):
+    return dodo_is_api_client_factory(registry=registry, token='token', country_code='ru')
+
+
+def get_units() -> list[UnitIdAndNameIn]:
+    return [UnitIdAndNameIn(id=unit_id, name=generators.get_unit_name(unit_id)) for unit_id in UNIT_IDS]
+
+
+def get_unit_uuids() -> list[uuid.UUID]:
+    return [generators.get_unit_uuid(unit_id) for unit_id in UNIT_IDS]
+
+
+def get_today() -> Period:
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    return Period(start=today, end=today + datetime.timedelta(hours=23))
+
+
+async def get_revenue(registry: HTTPClientRegistry):
+    client = public_api_client_factory(registry=registry, country_code='ru')
+    # the cache decorator is bypassed, it would need the cache backend
+    return await v1_reports.get_revenue_statistics.__wrapped__(client, UNIT_IDS)
+
+
+async def get_awaiting_orders(registry: HTTPClientRegistry):
+    return await v1_reports.get_delivery_partial_statistics.__wrapped__(UNIT_IDS, get_office_manager_client(registry))
+
+
+async def get_kitchen_productivity(registry: HTTPClientRegistry):
+    return await v1_reports.get_kitchen_partial_statistics.__wrapped__(UNIT_IDS, get_office_manager_client(registry))
+
+
+async def get_bonus_system(registry: HTTPClientRegistry):
+    return await v1_reports.get_bonus_system_statistics(get_units(), get_office_manager_client(registry))
+
+
+async def get_trips_with_one_order(registry: HTTPClientRegistry):
+    unit_ids = list(range(1, 31))
+    return await v1_reports.on_get_trips_with_one_order(unit_ids, get_office_manager_client(registry))
+
+
+async def get_cheated_orders(registry: HTTPClientRegistry):
+    return await v1_orders.get_cheated_orders(get_units(), 3, get_office_manager_client(registry))
+
+
+async def get_canceled_orders(registry: HTTPClientRegistry):
+    client = shift_manager_api_client_factory(registry=registry, cookies={}, country_code='ru')
+    return await v1_orders.get_canceled_orders(get_today(), client)
+
+
+async def get_month_of_used_promo_codes(registry: HTTPClientRegistry):
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time())
+    period = Period(start=today - datetime.timedelta(days=30), end=today)
+    return await v1_orders.get_used_promo_codes(1, period, get_office_manager_client(registry))
+
+
+async def get_stocks(registry: HTTPClientRegistry):
+    return await v1_stocks.get_ingredient_stocks(UNIT_IDS, 30, get_office_manager_client(registry))
+
+
+async def get_stop_sales_by_sectors(registry: HTTPClientRegistry):
+    client = get_office_manager_client(registry)
+    return await v1_stop_sales.get_stop_sales_by_sectors(set(UNIT_IDS), get_today(), client)
+
+
+async def get_stop_sales_by_streets(registry: HTTPClientRegistry):
+    client = get_office_manager_client(registry)
+    return await v1_stop_sales.get_stop_sales_by_streets(set(UNIT_IDS), get_today(), client)
+
+
+def get_v2_report(endpoint) -> Report:
+
+    async def get_report(registry: HTTPClientRegistry):
+        return await endpoint.__wrapped__(get_unit_uuids(), get_dodo_is_api_client(registry), False)
+
+    return get_report
+
+
+def get_v2_stop_sales(endpoint) -> Report:
+
+    async def get_stop_sales(registry: HTTPClientRegistry):
+        return await endpoint(get_unit_uuids(), get_today(), get_dodo_is_api_client(registry))
+
+    return get_stop_sales
+
+
+REPORTS: dict[str, Report] = {
+    'v1.revenue': get_revenue,
+    'v1.awaiting_orders': get_awaiting_orders,
+    'v1.kitchen_productivity': get_kitchen_productivity,
+    'v1.bonus_system': get_bonus_system,
+    'v1.trips_with_one_order': get_trips_with_one_order,
+    'v1.cheated_orders': get_cheated_orders,
+    'v1.canceled_orders': get_canceled_orders,
+    'v1.used_promo_codes': get_month_of_used_promo_codes,
+    'v1.stocks': get_stocks,
+    'v1.stop_sales_by_sectors': get_stop_sales_by_sectors,
+    'v1.stop_sales_by_streets': get_stop_sales_by_streets,
+    'v2.productivity_balance': get_v2_report(v2_reports.get_productivity_balance_statistics),
+    'v2.restaurant_cooking_time': get_v2_report(v2_reports.get_restaurant_cooking_time_statistics),
+    'v2.heated_shelf_time': get_v2_report(v2_reports.get_heated_shelf_time_statistics),
+    'v2.delivery_speed': get_v2_report(v2_reports.get_delivery_speed_statistics),
+    'v2.delivery_productivity': get_v2_report(v2_reports.get_delivery_productivity_statistics),
+    'v2.being_late_certificates': get_v2_report(v2_reports.get_being_late_certificates_for_today_and_week_before),
+    'v2.stop_sales_by_channels': get_v2_stop_sales(v2_stop_sales.get_stop_sales_by_sales_channels),
+    'v2.stop_sales_by_ingredients': get_v2_stop_sales(v2_stop_sales.get_stop_sales_by_ingredients),
+}
+
+
+def run_report(
+        report: Report,
+        transport: httpx.AsyncBaseTransport,
+        registry_factory: Callable[..., HTTPClientRegistry],
+) -> None:
+    registry = registry_factory(transport=transport)
+
+    async def main():
+        try:
+            return await report(registry)
+        finally:
+            await registry.close()
+
+    asyncio.run(main())
+
+
+def measure_peak_memory(
+        report: Report,
+        cassette_path: pathlib.Path,
+        registry_factory: Callable[..., HTTPClientRegistry],
+) -> int:
+    # upstream responses are recorded first, so rendering them isn't counted
+    recording_transport = RecordingTransport(SimulatorTransport(UpstreamSimulator(SIMULATOR_CONFIG)), cassette_path)
+    run_report(report, recording_transport, registry_factory)
+    transport = ReplayTransport.from_cassette(cassette_path, latency_scale=0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run_report(report, transport, registry_factory)
+        _, peak_size = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_size
+
+
+@pytest.mark.parametrize('name', REPORTS)
+def test_report_peak_memory_is_within_budget(name: str, tmp_path: pathlib.Path, registry_factory):
+    peak_size = measure_peak_memory(REPORTS[name], tmp_path / 'cassette.jsonl.gz', registry_factory)
+    budgets = json.loads(BUDGETS_PATH.read_text()) if BUDGETS_PATH.exists() else {}
+    if os.getenv('UPDATE_MEMORY_BUDGETS'):
+        budgets[name] = int(peak_size * BUDGET_HEADROOM)
+        BUDGETS_PATH.write_text(json.dumps(budgets, indent=2, sort_keys=True) + '\n')
+    assert name in budgets, f'No memory budget for {name}, run with UPDATE_MEMORY_BUDGETS=1'
+    assert peak_size <= budgets[name], f'{name} allocated {peak_size} bytes at peak, budget is {budgets[name]}'
@@ -0,0 +1,45 @@
+import asyncio
+
+import httpx
+
+from services import metrics
+from services.http_client_factories import office_manager_api_client_factory
+
+
+def test_histogram_is_rendered_in_prometheus_text_format():
+    registry = metrics.MetricsRegistry()
+    histogram = registry.register(metrics.Histogram('duration_seconds', 'Duration.', ('path',), buckets=(0.1, 1)))
+    counter = registry.register(metrics.Counter('lookups_total', 'Lookups.', ('result',)))
+    histogram.observe(0.05, path='/a"b')
+    histogram.observe(0.5, path='/a"b')
+    histogram.observe(5, path='/a"b')
+    counter.inc(result='hit')
+    assert registry.render().splitlines() == [
+        '# HELP duration_seconds Duration.',
+        '# TYPE duration_seconds histogram',
+        'duration_seconds_bucket{path="/a\\"b",le="0.1"} 1',
+        'duration_seconds_bucket{path="/a\\"b",le="1"} 2',
+        'duration_seconds_bucket{path="/a\\"b",le="+Inf"} 3',
+        'duration_seconds_sum{path="/a\\"b"} 5.55',
+        'duration_seconds_count{path="/a\\"b"} 3',
+        '# HELP lookups_total Lookups.',
+        '# TYPE lookups_total counter',
+        'lookups_total{result="hit"} 1',
+    ]
+
+
+def test_upstream_requests_are_observed_per_path_template(registry_factory):
+    labels = {'upstream': 'office_manager', 'country_code': 'kz', 'status': '200'}
+    path = '/OfficeManager/Units/{id}/Statistics'
+    count_before = metrics.UPSTREAM_REQUEST_DURATION.get_count(path=path, **labels)
+
+    async def main():
+        registry = registry_factory(transport=httpx.MockTransport(lambda _: httpx.Response(200)))
+        client = office_manager_api_client_factory(registry=registry, cookies={}, country_code='kz')
+        await client.get('/OfficeManager/Units/42/Statistics')
+        await client.get(f'/OfficeManager/Units/{"a" * 32}/Statistics')
+        await registry.close()
+
+    asyncio.run(main())
+    assert metrics.UPSTREAM_REQUEST_DURATION.get_count(path=path, **labels) == count_before + 2
+    assert metrics.UPSTREAM_REQUESTS_IN_FLIGHT.get(upstream='office_manager', country_code='kz') == 0
@@ -0,0 +1,41 @@
+import asyncio
+import datetime
+
+import httpx
+import pytest
+
+from core import exceptions
+from services.external_dodo_api.office_manager import OfficeManagerAPI
+from services.http_client_factories import office_manager_api_client_factory
+from services.periods import Period
+
+PERIOD = Period(start=datetime.datetime(2023, 1, 1), end=datetime.datetime(2023, 1, 2))
+ERROR_PAGE = '<html><body><h1>Server Error</h1></body></html>'
+
+STREAMED_REPORTS = {
+    'stop_sales_by_sectors': lambda api: api.get_stop_sales_by_sectors(PERIOD, {1}),
+    'stop_sales_by_streets': lambda api: api.get_stop_sales_by_streets(PERIOD, {1}),
+    'restaurant_orders': lambda api: api.get_restaurant_orders([1], PERIOD),
+    'used_promo_codes': lambda api: api.get_used_promocodes(PERIOD, 42),
+}
+
+
+@pytest.mark.parametrize('status_code', [401, 500])
+@pytest.mark.parametrize('name', STREAMED_REPORTS)
+def test_error_pages_of_streamed_reports_are_not_parsed(registry_factory, name: str, status_code: int):
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(status_code, html=ERROR_PAGE)
+
+    async def main():
+        registry = registry_factory(transport=httpx.MockTransport(handler))
+        api = OfficeManagerAPI(office_manager_api_client_factory(registry=registry, cookies={}, country_code='ru'))
+        try:
+            await STREAMED_REPORTS[name](api)
+        finally:
+            await registry.close()
+
+    # used promo codes are requested per unit, the unit is reported as failed instead of the whole report
+    expected_error = exceptions.UnitIDAPIError if name == 'used_promo_codes' else exceptions.UpstreamUnavailable
+    with pytest.raises(expected_error):
+        asyncio.run(main())
@@ -0,0 +1,140 @@
+import asyncio
+import datetime
+import multiprocessing
+import os
+import pathlib
+import threading
+import time
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+import pytest
+
+from services import lxml_parsers, offloading
+from services.domain import sales
+from simulator import generators
+
+CANCELED_ORDERS_PATH = pathlib.Path(__file__).parent.parent / 'api_responses' / 'canceled_orders'
+
+
+def get_thread_name() -> str:
+    return threading.current_thread().name
+
+
+def block(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def exit_in_worker_process() -> None:
+    # a worker killed by OOM killer dies the same way
+    if multiprocessing.parent_process() is not None:
+        os._exit(1)
+
+
+def get_process_kind() -> str:
+    return 'worker' if multiprocessing.parent_process() is not None else 'main'
+
+
+def run_with_executor(coroutine_function, executor: offloading.OffloadExecutor):
+
+    async def main():
+        executor.start()
+        offloading.set_executor(executor)
+        try:
+            return await coroutine_function()
+        finally:
+            offloading.set_executor(None)
+            executor.shutdown()
+
+    return asyncio.run(main())
+
+
+def test_jobs_run_inline_without_executor():
+    assert asyncio.run(offloading.run(get_thread_name)) == threading.current_thread().name
+
+
+def test_parsing_in_threads_gives_same_result_as_inline():
+    page_path = min(CANCELED_ORDERS_PATH.glob('*.html'))
+    page = page_path.read_bytes()
+    order_uuid = uuid.uuid4()
+    executor = offloading.OffloadExecutor(workers_count=2, max_queued_count=0, is_process_pool_enabled=False)
+
+    async def main():
+        order = await offloading.parse(lxml_parsers.OrderByUUIDLxmlParser, page, order_uuid, 889, 'Доставка')
+        return order, await offloading.run(get_thread_name)
+
+    order, thread_name = run_with_executor(main, executor)
+    assert order == lxml_parsers.OrderByUUIDLxmlParser(page, order_uuid, 889, 'Доставка').parse()
+    assert thread_name.startswith('offload')
+    assert executor.kind == 'thread'
+
+
+def test_event_loop_is_not_blocked_by_jobs():
+    executor = offloading.OffloadExecutor(workers_count=1, max_queued_count=0, is_process_pool_enabled=False)
+
+    async def main():
+        job = asyncio.create_task(offloading.run(block, 0.2))
+        started_at = time.perf_counter()
+        await asyncio.sleep(0.01)
+        loop_delay = time.perf_counter() - started_at
+        await job
+        return loop_delay
+
+    assert run_with_executor(main, executor) < 0.1
+
+
+def test_jobs_over_queue_limit_wait():
+    executor = offloading.OffloadExecutor(workers_count=1, max_queued_count=1, is_process_pool_enabled=False)
+
+    async def main():
+        started_at = time.perf_counter()
+        await asyncio.gather(*(offloading.run(block, 0.05) for _ in range(4)))
+        return time.perf_counter() - started_at
+
+    assert run_with_executor(main, executor) >= 0.2
+
+
+def test_parsing_and_aggregation_in_processes_give_same_result_as_inline():
+    page = min(CANCELED_ORDERS_PATH.glob('*.html')).read_bytes()
+    order_uuid = uuid.uuid4()
+    rows = generators.generate_restaurant_orders(1, range(1, 4), datetime.date(2023, 1, 1), 20)
+    data_frame = pd.DataFrame(
+        [(*row[:3], row[3] or None, row[4]) for row in rows],
+        columns=generators.RESTAURANT_ORDERS_HEADERS,
+    )
+    executor = offloading.OffloadExecutor(workers_count=2, max_queued_count=0, is_process_pool_enabled=True)
+
+    async def main():
+        await executor.wait_until_warm()
+        return await asyncio.gather(
+            offloading.parse(lxml_parsers.OrderByUUIDLxmlParser, page, order_uuid, 889, 'Доставка'),
+            offloading.run(sales.restaurant_orders_to_cheated_orders, data_frame.groupby('Отдел'), 2),
+        )
+
+    order, cheated_orders = run_with_executor(main, executor)
+    assert executor.kind == 'process'
+    assert order == lxml_parsers.OrderByUUIDLxmlParser(page, order_uuid, 889, 'Доставка').parse()
+    assert cheated_orders == sales.restaurant_orders_to_cheated_orders(data_frame.groupby('Отдел'), 2)
+    assert cheated_orders
+
+
+def test_job_that_killed_worker_fails_and_pool_is_started_again():
+    executor = offloading.OffloadExecutor(
+        workers_count=1,
+        max_queued_count=0,
+        is_process_pool_enabled=True,
+        max_pool_restarts_count=1,
+    )
+
+    async def main():
+        await executor.wait_until_warm()
+        results = []
+        for _ in range(2):
+            with pytest.raises(BrokenProcessPool):
+                await offloading.run(exit_in_worker_process)
+            results.append((executor.kind, await offloading.run(get_process_kind)))
+        return results
+
+    # the job is never run again in the main process, after the last restart jobs go to threads
+    assert run_with_executor(main, executor) == [('process', 'worker'), ('thread', 'main')]
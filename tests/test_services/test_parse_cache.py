@@ -0,0 +1,48 @@
+import asyncio
+
+from services import metrics, parse_cache
+
+
+class CountingParser:
+    calls_count = 0
+
+    def __init__(self, body: bytes, unit_id: int):
+        self.__body = body
+        self.__unit_id = unit_id
+
+    def parse(self) -> list[str]:
+        CountingParser.calls_count += 1
+        return [f'{self.__unit_id}:{self.__body.decode()}']
+
+
+def test_unchanged_pages_are_parsed_once():
+    CountingParser.calls_count = 0
+    parse_cache.set_cache(parse_cache.ParseCache(max_count=10))
+    hits_count = metrics.PARSE_CACHE_LOOKUPS.get(parser='CountingParser', result='hit')
+
+    async def main():
+        return [
+            await parse_cache.parse(CountingParser, b'page', 1),
+            await parse_cache.parse(CountingParser, b'page', 1),
+            await parse_cache.parse(CountingParser, b'page', 2),
+            await parse_cache.parse(CountingParser, b'changed page', 1),
+        ]
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        parse_cache.set_cache(None)
+    assert results == [['1:page'], ['1:page'], ['2:page'], ['1:changed page']]
+    assert CountingParser.calls_count == 3
+    assert metrics.PARSE_CACHE_LOOKUPS.get(parser='CountingParser', result='hit') == hits_count + 1
+
+
+def test_least_recently_used_results_are_evicted():
+    cache = parse_cache.ParseCache(max_count=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert len(cache) == 2
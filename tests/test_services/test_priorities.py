@@ -0,0 +1,55 @@
+import asyncio
+
+from services import priorities
+from services.priorities import Priority, PriorityScheduler
+
+
+def test_bulk_calls_do_not_take_slots_reserved_for_interactive_ones():
+    scheduler = PriorityScheduler(max_concurrency=3, reserved_for_interactive=1)
+    release = asyncio.Event()
+    peak_bulk_in_flight = 0
+
+    async def send() -> None:
+        nonlocal peak_bulk_in_flight
+        peak_bulk_in_flight = max(peak_bulk_in_flight, scheduler.bulk_in_flight)
+        await release.wait()
+
+    async def bulk_call() -> None:
+        priorities.set_priority(Priority.BULK)
+        await scheduler.call(send)
+
+    async def main():
+        bulk_calls = [asyncio.create_task(bulk_call()) for _ in range(5)]
+        await asyncio.sleep(0)
+        interactive_call = asyncio.create_task(scheduler.call(send))
+        await asyncio.sleep(0)
+        assert scheduler.in_flight == 3
+        assert scheduler.get_queued(Priority.BULK) == 3
+        release.set()
+        await asyncio.gather(interactive_call, *bulk_calls)
+
+    asyncio.run(main())
+    assert peak_bulk_in_flight == 2
+
+
+def test_queued_interactive_calls_go_before_bulk_ones():
+    scheduler = PriorityScheduler(max_concurrency=1, reserved_for_interactive=0)
+    order = []
+
+    async def send(name: str) -> None:
+        order.append(name)
+        await asyncio.sleep(0.01)
+
+    async def call(name: str, priority: Priority) -> None:
+        priorities.set_priority(priority)
+        await scheduler.call(lambda: send(name))
+
+    async def main():
+        first = asyncio.create_task(call('first', Priority.BULK))
+        await asyncio.sleep(0)
+        bulk = asyncio.create_task(call('bulk', Priority.BULK))
+        interactive = asyncio.create_task(call('interactive', Priority.INTERACTIVE))
+        await asyncio.gather(first, bulk, interactive)
+
+    asyncio.run(main())
+    assert order == ['first', 'interactive', 'bulk']
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+from services.profiling import SamplingProfiler, render_folded_stacks, track_route
+
+
+def spin(seconds: float) -> None:
+    finishes_at = time.monotonic() + seconds
+    while time.monotonic() < finishes_at:
+        pass
+
+
+async def fetch_unit() -> None:
+    spin(0.1)
+    await asyncio.sleep(0.2)
+
+
+async def handle_request() -> None:
+    with track_route('/v1/reports'):
+        await asyncio.sleep(0.02)
+        # spawned while the profile is taken, so the task inherits the route
+        await asyncio.gather(fetch_unit(), fetch_unit())
+
+
+def test_samples_are_tagged_by_route():
+
+    async def main():
+        profiler = SamplingProfiler(interval=0.005, is_awaiting_included=True)
+        request_task = asyncio.create_task(handle_request())
+        samples = await profiler.run(0.4)
+        await request_task
+        return samples
+
+    folded_stacks = render_folded_stacks(asyncio.run(main())).splitlines()
+    assert any(
+        stack.startswith('/v1/reports;thread MainThread;') and ';spin (' in stack
+        for stack in folded_stacks
+    )
+    assert any(
+        stack.startswith('/v1/reports;awaiting;fetch_unit (') and 'sleep (' in stack
+        for stack in folded_stacks
+    )
+    assert all(stack.rsplit(' ', 1)[1].isdigit() for stack in folded_stacks)
@@ -0,0 +1,146 @@
+import asyncio
+
+import httpx
+import pytest
+
+from core import exceptions
+from services.quarantine import UnitQuarantine
+
+
+def quarantine_factory(**kwargs) -> UnitQuarantine:
+    return UnitQuarantine(**{
+        'failure_threshold': 1,
+        'base_window': 0.01,
+        'max_window': 0.02,
+        'max_probe_attempts': 100,
+        'idle_timeout': 60,
+        'max_probes_count': 100,
+        'max_tracked_count': 100,
+    } | kwargs)
+
+
+async def send_not_found() -> httpx.Response:
+    return httpx.Response(404)
+
+
+def test_unit_is_skipped_after_consecutive_failures_until_probe_sees_recovery():
+    quarantine = quarantine_factory(failure_threshold=2, base_window=0.05, max_window=1)
+    status_codes = [404, 404, 200]
+    sent_count = 0
+
+    async def send() -> httpx.Response:
+        nonlocal sent_count
+        sent_count += 1
+        return httpx.Response(status_codes.pop(0))
+
+    async def main():
+        for _ in range(2):
+            response = await quarantine.call(scope='scope', resource='/page', unit_id=1, send=send)
+            assert response.status_code == 404
+        assert quarantine.is_quarantined('scope', '/page', 1)
+        with pytest.raises(exceptions.UnitIDAPIError):
+            await quarantine.call(scope='scope', resource='/page', unit_id=1, send=send)
+        assert sent_count == 2
+        await asyncio.sleep(0.1)
+        assert not quarantine.is_quarantined('scope', '/page', 1)
+        assert sent_count == 3
+
+    asyncio.run(main())
+
+
+def test_gateway_errors_do_not_quarantine_unit():
+    quarantine = quarantine_factory(base_window=60, max_window=60)
+
+    async def send() -> httpx.Response:
+        return httpx.Response(503)
+
+    async def main():
+        await quarantine.call(scope='scope', resource='/page', unit_id=1, send=send)
+        assert not quarantine.is_quarantined('scope', '/page', 1)
+        await quarantine.close()
+
+    asyncio.run(main())
+
+
+def test_unit_is_quarantined_per_resource_and_probed_until_recovery():
+    quarantine = quarantine_factory()
+    status_codes = [404, 404, 404, 404, 404, 200]
+
+    async def send_failing() -> httpx.Response:
+        return httpx.Response(status_codes.pop(0))
+
+    async def send_working() -> httpx.Response:
+        return httpx.Response(200)
+
+    async def main():
+        await quarantine.call(scope='scope', resource='/stocks', unit_id=1, send=send_failing)
+        response = await quarantine.call(scope='scope', resource='/statistics', unit_id=1, send=send_working)
+        assert response.status_code == 200
+        assert not quarantine.is_quarantined('scope', '/statistics', 1)
+        # probes keep going at the max window while the unit is failing
+        await asyncio.sleep(0.07)
+        assert quarantine.is_quarantined('scope', '/stocks', 1)
+        await asyncio.sleep(0.1)
+        assert not quarantine.is_quarantined('scope', '/stocks', 1)
+        assert status_codes == []
+
+    asyncio.run(main())
+
+
+def test_probe_gives_up_after_max_attempts():
+    quarantine = quarantine_factory(max_probe_attempts=2)
+    sent_count = 0
+
+    async def send() -> httpx.Response:
+        nonlocal sent_count
+        sent_count += 1
+        return httpx.Response(404)
+
+    async def main():
+        await quarantine.call(scope='scope', resource='/page', unit_id=1, send=send)
+        await asyncio.sleep(0.1)
+        # live requests check the unit again once its probe gave up
+        assert not quarantine.is_quarantined('scope', '/page', 1)
+        assert sent_count == 3
+
+    asyncio.run(main())
+
+
+def test_probe_of_idle_scope_is_dropped_and_latest_send_is_probed():
+    quarantine = quarantine_factory(base_window=0.05, max_window=0.05, idle_timeout=0.07)
+    sent_by = []
+
+    def send_factory(caller: str):
+
+        async def send() -> httpx.Response:
+            sent_by.append(caller)
+            return httpx.Response(404)
+
+        return send
+
+    async def main():
+        await quarantine.call(scope='scope', resource='/page', unit_id=1, send=send_factory('first'))
+        with pytest.raises(exceptions.UnitIDAPIError):
+            await quarantine.call(scope='scope', resource='/page', unit_id=1, send=send_factory('second'))
+        await asyncio.sleep(0.2)
+        assert not quarantine.is_quarantined('scope', '/page', 1)
+
+    asyncio.run(main())
+    # credentials of the first caller are not used once a later caller has asked for the unit
+    assert sent_by == ['first', 'second']
+
+
+def test_quarantined_and_tracked_units_are_bounded():
+    quarantine = quarantine_factory(failure_threshold=2, max_probes_count=2, max_tracked_count=3)
+
+    async def main():
+        for unit_id in range(5):
+            for _ in range(2):
+                await quarantine.call(scope='scope', resource='/page', unit_id=unit_id, send=send_not_found)
+        assert quarantine.quarantined_count == 2
+        for unit_id in range(5, 10):
+            await quarantine.call(scope='scope', resource='/page', unit_id=unit_id, send=send_not_found)
+        assert quarantine.tracked_count == 3
+        await quarantine.close()
+
+    asyncio.run(main())
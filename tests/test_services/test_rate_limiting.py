@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+
+from core import exceptions
+from services.rate_limiting import RateLimiterRegistry, TokenBucket
+
+
+def test_calls_beyond_burst_are_queued():
+    bucket = TokenBucket(key='scope', rate=100, capacity=2, max_wait=1)
+
+    async def main():
+        started_at = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+        return time.monotonic() - started_at
+
+    assert asyncio.run(main()) >= 0.015
+
+
+def test_calls_fail_fast_when_queue_wait_is_too_long():
+    bucket = TokenBucket(key='scope', rate=1, capacity=1, max_wait=0.5)
+
+    async def main():
+        await bucket.acquire()
+        with pytest.raises(exceptions.RateLimitExceeded) as error:
+            await bucket.acquire()
+        assert error.value.status_code == 429
+        assert error.value.headers == {'Retry-After': '1'}
+        state = await bucket.get_state()
+        assert state.tokens < 1
+        assert state.waiting == 0
+
+    asyncio.run(main())
+
+
+def test_idle_buckets_of_gone_sessions_are_evicted():
+    registry = RateLimiterRegistry(rate=10, capacity=1, max_wait=1, idle_timeout=0.05)
+
+    async def main():
+        registry.get('gone')
+        await registry.get('queued').acquire()
+        queued_call = asyncio.create_task(registry.get('queued').acquire())
+        await asyncio.sleep(0.06)
+        registry.get('new')
+        # a bucket with queued callers is kept even when its session has not asked for it lately
+        assert [state.key for state in await registry.get_states()] == ['queued', 'new']
+        await queued_call
+
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+import asyncio
+import gzip
+import time
+
+import httpx
+import pytest
+
+from services.record_replay import RecordingTransport, ReplayTransport, read_cassette, reissue, replay_arrivals
+
+
+def test_recorded_exchanges_are_replayed_for_another_day(tmp_path):
+    cassette_path = tmp_path / 'cassette.jsonl.gz'
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=f'statistics for {request.url.params["from"]}',
+                              headers={'Set-Cookie': 'session=secret'})
+
+    async def main():
+        recording_transport = RecordingTransport(httpx.MockTransport(handler), cassette_path)
+        async with httpx.AsyncClient(transport=recording_transport, base_url='https://api.dodois.io') as client:
+            await client.get('/delivery/statistics', params={'from': '2023-01-01T00:00:00'},
+                             headers={'Authorization': 'Bearer secret'})
+
+        replay_transport = ReplayTransport.from_cassette(cassette_path, latency_scale=0)
+        async with httpx.AsyncClient(transport=replay_transport, base_url='https://api.dodois.io') as client:
+            return await client.get('/delivery/statistics', params={'from': '2023-02-01T00:00:00'})
+
+    response = asyncio.run(main())
+    assert response.text == 'statistics for 2023-01-01T00:00:00'
+    assert 'set-cookie' not in response.headers
+    assert b'secret' not in gzip.decompress(cassette_path.read_bytes())
+    assert len(read_cassette(cassette_path)) == 1
+
+
+def test_unknown_request_is_not_replayed():
+    async def main():
+        async with httpx.AsyncClient(transport=ReplayTransport([]), base_url='https://api.dodois.io') as client:
+            await client.get('/delivery/statistics')
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(main())
+
+
+def test_recorded_requests_are_reissued_at_scaled_arrival_times(tmp_path):
+    cassette_path = tmp_path / 'cassette.jsonl.gz'
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=request.content or request.url.path.encode())
+
+    async def record():
+        recording_transport = RecordingTransport(httpx.MockTransport(handler), cassette_path)
+        base_url = 'https://officemanager.dodopizza.ru'
+        async with httpx.AsyncClient(transport=recording_transport, base_url=base_url) as client:
+            await client.get('/OfficeManager/StockBalance/Get')
+            await asyncio.sleep(0.2)
+            await client.post('/Reports/Orders/Get', data={'unitsIds': '1'})
+            await asyncio.sleep(0.2)
+            await client.get('/OfficeManager/StockBalance/Get')
+
+    async def replay():
+        exchanges = read_cassette(cassette_path)
+        arrived_at = []
+        async with httpx.AsyncClient(transport=ReplayTransport(exchanges, latency_scale=0)) as client:
+
+            async def send(exchange):
+                arrived_at.append(time.perf_counter())
+                return await reissue(client, exchange)
+
+            responses = await replay_arrivals(exchanges, send, time_scale=0.5)
+        return [response.content for response in responses], [moment - arrived_at[0] for moment in arrived_at]
+
+    asyncio.run(record())
+    contents, offsets = asyncio.run(replay())
+    assert contents == [b'/OfficeManager/StockBalance/Get', b'unitsIds=1', b'/OfficeManager/StockBalance/Get']
+    assert offsets == [0, pytest.approx(0.1, abs=0.03), pytest.approx(0.2, abs=0.03)]
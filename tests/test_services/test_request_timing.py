@@ -0,0 +1,45 @@
+import asyncio
+
+import httpx
+from fastapi import APIRouter, FastAPI
+
+from api.middlewares import ServerTimingMiddleware
+from api.routing import TimedRoute
+from services import request_timing
+from services.request_timing import RequestTiming, RequestTraces, UpstreamCall
+
+
+def test_overlapping_upstream_calls_are_counted_once():
+    timing = RequestTiming(method='GET', path='/v1/ru/stocks', started_at=0)
+    for started_at, duration in ((0.1, 0.2), (0.2, 0.2), (0.5, 0.1)):
+        timing.add_upstream_call(UpstreamCall('GET', '/', '200', started_at, duration, 100))
+    timing.add_duration('parse', 0.05, {})
+    timing.add_duration('parse', 0.05, {})
+    timing.endpoint_finished_at = 0.9
+    assert timing.build_server_timing(now=1) == (
+        'upstream;dur=400.0;desc="3 calls, 300 bytes", parse;dur=100.0, serialization;dur=100.0, total;dur=1000.0'
+    )
+
+
+def test_server_timing_header_and_trace_are_built_per_request():
+    router = APIRouter(prefix='/v1', route_class=TimedRoute)
+
+    @router.get('/report')
+    async def get_report() -> dict:
+        request_timing.add_duration('aggregation', 0.01, {'report': 'test'})
+        return {}
+
+    app = FastAPI()
+    app.include_router(router)
+    traces = RequestTraces(max_count=1)
+    app.add_middleware(ServerTimingMiddleware, path_prefixes=('/v1/',), traces=traces)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:
+            return await client.get('/v1/report')
+
+    response = asyncio.run(main())
+    assert response.headers['Server-Timing'].startswith('aggregation;dur=10.0, serialization;dur=')
+    trace = traces.get(response.headers['X-Request-ID'])
+    assert trace['status_code'] == 200
+    assert trace['events'][0]['details'] == {'report': 'test'}
@@ -0,0 +1,75 @@
+import asyncio
+import datetime
+import uuid
+
+from services import parsers
+from models.external_api_responses.dodo_is_api import StopSaleBySalesChannels
+from services.external_dodo_api.dodo_is_api import DodoISAPI
+from services.external_dodo_api.shift_manager import ShiftManagerAPI
+from services.http_client_factories import dodo_is_api_client_factory, shift_manager_api_client_factory
+from services.domain import production
+from services.periods import Period, get_moscow_now
+from simulator import SimulatorConfig, SimulatorTransport, UpstreamSimulator, generators
+
+
+def test_generated_pages_are_parsed_by_upstream_parsers():
+    html = generators.render_stock_balance_page(seed=1, unit_id=42, stock_items_count=10, layout_elements_count=50)
+    assert len(parsers.StockBalanceHTMLParser(html, 42).parse()) == 10
+
+    day = datetime.date(2023, 1, 1)
+    orders = parsers.OrdersPartial(generators.render_partial_orders_page(1, day, 1, 5, 50)).parse()
+    assert [order.uuid for order in orders] == [generators.get_canceled_order_uuid(1, day, i) for i in range(5)]
+    assert parsers.OrdersPartial(generators.render_partial_orders_page(1, day, 2, 5, 50)).parse() == []
+
+
+def test_api_clients_work_through_simulator_transport(registry_factory):
+    simulator = UpstreamSimulator(SimulatorConfig(seed=1))
+    unit_uuids = [uuid.uuid4() for _ in range(3)]
+    period = Period(start=datetime.datetime(2023, 1, 1), end=datetime.datetime(2023, 1, 1, 23))
+
+    async def main():
+        registry = registry_factory(transport=SimulatorTransport(simulator))
+        dodo_is_api = DodoISAPI(dodo_is_api_client_factory(registry=registry, token='x', country_code='ru'))
+        statistics = await dodo_is_api.get_delivery_statistics(period, unit_uuids)
+        shift_manager_api = ShiftManagerAPI(
+            shift_manager_api_client_factory(registry=registry, cookies={}, country_code='ru'),
+        )
+        pages = [orders async for orders in shift_manager_api.get_partial_canceled_orders(period)]
+        await registry.close()
+        return statistics, pages
+
+    statistics, pages = asyncio.run(main())
+    assert {unit.unit_uuid for unit in statistics} == set(unit_uuids)
+    assert len(pages[0]) == simulator.config.canceled_orders_count
+    assert simulator.calls_count['dodo_is.delivery_statistics'] == 1
+    assert simulator.calls_count['shift_manager.partial_orders'] == 2
+
+
+def test_failing_units_are_stable():
+    simulator = UpstreamSimulator(SimulatorConfig(seed=1, failing_unit_ratio=0.5))
+    failing_units = [unit_id for unit_id in range(100) if simulator.is_failing_unit(unit_id)]
+    assert 20 < len(failing_units) < 80
+    assert failing_units == [unit_id for unit_id in range(100) if simulator.is_failing_unit(unit_id)]
+
+
+def test_generated_moments_of_today_are_not_in_future():
+    now = get_moscow_now()
+    today = now.date()
+    unit_uuids = [generators.get_unit_uuid(unit_id) for unit_id in range(50)]
+    stop_sales = [
+        StopSaleBySalesChannels.parse_obj(stop_sale)
+        for stop_sale in generators.generate_stop_sales_by_sales_channels(1, unit_uuids, today, 20)
+    ]
+    vouchers = generators.generate_late_delivery_vouchers(1, unit_uuids, today, 20)
+    moments = [stop_sale.started_at for stop_sale in stop_sales]
+    moments += [stop_sale.ended_at for stop_sale in stop_sales if stop_sale.is_resumed]
+    moments += [
+        datetime.datetime.fromisoformat(voucher[field])
+        for voucher in vouchers
+        for field in ('orderAcceptedAtLocal', 'orderFulfilmentFlagAtLocal') if voucher[field] is not None
+    ]
+    assert max(moments) <= get_moscow_now()
+    assert all(
+        production.calculate_unit_total_stop_duration([stop_sale], get_moscow_now()) >= 0
+        for stop_sale in stop_sales
+    )
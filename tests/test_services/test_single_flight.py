@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def test_concurrent_calls_with_same_key_are_coalesced():
+    single_flight = SingleFlight()
+    calls_count = 0
+
+    async def call() -> int:
+        nonlocal calls_count
+        calls_count += 1
+        await asyncio.sleep(0.01)
+        return calls_count
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do('key', call) for _ in range(5)))
+
+    assert asyncio.run(main()) == [1] * 5
+    assert single_flight.in_flight == 0
+
+
+def test_exception_is_shared_by_all_waiters():
+    single_flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise ValueError
+
+    async def main():
+        return await asyncio.gather(*(single_flight.do('key', call) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    single_flight = SingleFlight()
+
+    async def call() -> str:
+        await asyncio.sleep(0.01)
+        return 'done'
+
+    async def main():
+        first = asyncio.create_task(single_flight.do('key', call))
+        second = asyncio.create_task(single_flight.do('key', call))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 'done'